@@ -0,0 +1,9 @@
+"""
+Run the DIGIPIN command-line interface: python -m QDIGIPIN
+"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
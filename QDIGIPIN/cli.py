@@ -0,0 +1,435 @@
+"""
+Command-line interface for DIGIPIN encoding and decoding without QGIS
+
+Only the pure-Python core is imported, so the CLI runs on machines without
+QGIS or Qt. Records are read and written one at a time, so files of any
+size stream through in constant memory.
+
+Examples:
+    python -m QDIGIPIN encode points.csv --precision 8 > encoded.csv
+    python -m QDIGIPIN encode big.csv --precision 8 --workers 0 -o encoded.csv
+    cat codes.jsonl | python -m QDIGIPIN decode --format jsonl
+    python -m QDIGIPIN validate codes.csv --column DIGIPIN
+    python -m QDIGIPIN grid --bbox 77.0,28.4,77.4,28.8 --precision 6
+    python -m QDIGIPIN grid --bbox 77.0,28.4,77.4,28.8 --precision 8 -o cells.dpcs
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+
+from .core.digipin_engine import DigipinDecoder, DigipinValidator
+from .core.columnar import (
+    DEFAULT_BATCH_SIZE, PACKED_FORMATS, ColumnarWriter, column_names, columnar_format,
+    encode_columnar_file, import_pyarrow, iter_batches
+)
+from .core.cellstore import CELL_STORE_EXTENSION, write_grid_store
+from .core.grid_engine import GridStream
+from .core.streaming import DEFAULT_CHUNK_SIZE, parse_coordinate
+
+FORMATS = ('csv', 'jsonl', 'parquet', 'arrow')
+
+# Column names recognised for coordinates, compared case-insensitively
+LAT_COLUMNS = ('lat', 'latitude', 'y')
+LON_COLUMNS = ('lon', 'lng', 'long', 'longitude', 'x')
+
+
+def detect_format(path, explicit=None):
+    """
+    Work out the record format of a file
+    
+    Args:
+        path (str): File path, or '-' for stdin/stdout
+        explicit (str): Format given on the command line, if any
+        
+    Returns:
+        str: 'csv', 'jsonl', 'parquet' or 'arrow'
+        
+    Raises:
+        ValueError: For plain JSON and GeoJSON documents, which are not
+            record streams
+    """
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension in ('.json', '.geojson'):
+        raise ValueError(f'{path} looks like a JSON document; records must be JSON Lines '
+                         f'(.jsonl), or pass --format/--output-format')
+    return columnar_format(path) or 'csv'
+
+
+def read_records(path, fmt):
+    """
+    Stream records from a file or stdin
+    
+    Args:
+        path (str): File path, or '-' for stdin
+        fmt (str): 'csv', 'jsonl', 'parquet' or 'arrow'
+        
+    Yields:
+        dict: One record per row
+    """
+    if fmt in ('parquet', 'arrow'):
+        source = path
+        if path == '-':
+            # Parquet footers are at the end, so stdin has to be buffered
+            source = import_pyarrow().BufferReader(sys.stdin.buffer.read())
+        for batch in iter_batches(source, fmt):
+            yield from batch.to_pylist()
+        return
+    
+    stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+    try:
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+class RecordWriter:
+    """Write records to a file or stdout as they are produced"""
+    
+    def __init__(self, path, fmt):
+        """
+        Args:
+            path (str): File path, or '-' for stdout
+            fmt (str): 'csv', 'jsonl', 'parquet' or 'arrow'
+        """
+        if fmt in ('parquet', 'arrow') and path == '-':
+            raise ValueError(f'{fmt.capitalize()} output needs a file path (--output)')
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self._stream = None
+        self._csv = None
+        self._columnar = None
+        self._rows = []
+        
+        if fmt in ('parquet', 'arrow'):
+            self._columnar = ColumnarWriter(path, fmt)
+        else:
+            self._stream = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+    
+    def write(self, record):
+        """Write one record"""
+        self.count += 1
+        if self.fmt == 'csv':
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._stream, fieldnames=list(record), extrasaction='ignore')
+                self._csv.writeheader()
+            self._csv.writerow(record)
+        elif self.fmt == 'jsonl':
+            self._stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            # Buffered into record batches (Parquet row groups)
+            self._rows.append(record)
+            if len(self._rows) >= DEFAULT_BATCH_SIZE:
+                self._columnar.write_rows(self._rows)
+                self._rows = []
+    
+    def close(self):
+        """Flush and close the output"""
+        if self._columnar is not None:
+            self._columnar.write_rows(self._rows)
+            self._rows = []
+            self._columnar.close()
+        elif self._stream is sys.stdout:
+            self._stream.flush()
+        else:
+            self._stream.close()
+
+
+def _find_column(fieldnames, explicit, candidates, kind):
+    """Pick the coordinate column, either given or by a known name"""
+    if explicit:
+        if explicit not in fieldnames:
+            raise ValueError(f'{kind} column not found: {explicit}')
+        return explicit
+    for name in fieldnames:
+        if name.strip().lower() in candidates:
+            return name
+    raise ValueError(f'No {kind.lower()} column found; use --{kind.lower()}-column')
+
+
+def run_encode(args, records, writer):
+    """Add a DIGIPIN column to records with coordinates, one chunk at a time"""
+    from .core.parallel import encode_chunks
+    
+    columns = []
+    chunks = deque()
+    invalid = 0
+    
+    def coordinate_chunks():
+        while True:
+            chunk = list(islice(records, DEFAULT_CHUNK_SIZE))
+            if not chunk:
+                return
+            if not columns:
+                columns.append(_find_column(chunk[0], args.lat_column, LAT_COLUMNS, 'Lat'))
+                columns.append(_find_column(chunk[0], args.lon_column, LON_COLUMNS, 'Lon'))
+            lat_column, lon_column = columns
+            chunks.append(chunk)
+            yield (
+                [parse_coordinate(record.get(lat_column)) for record in chunk],
+                [parse_coordinate(record.get(lon_column)) for record in chunk]
+            )
+    
+    # Chunks are encoded in worker processes and come back in input order
+    for codes in encode_chunks(coordinate_chunks(), args.precision, args.workers):
+        for record, code in zip(chunks.popleft(), codes):
+            record[args.column] = code
+            if code is None:
+                invalid += 1
+            writer.write(record)
+    
+    return invalid
+
+
+def _columnar_files(args, input_format, output_format):
+    """Whether input and output are both Parquet/Arrow files"""
+    columnar = ('parquet', 'arrow')
+    return (
+        input_format in columnar and output_format in columnar and
+        args.input != '-' and args.output != '-' and
+        columnar_format(args.input) == input_format and columnar_format(args.output) == output_format
+    )
+
+
+def run_encode_columnar(args, input_format):
+    """Encode a Parquet/Arrow file column-wise, one record batch at a time"""
+    names = column_names(args.input, input_format)
+    lat_column = _find_column(names, args.lat_column, LAT_COLUMNS, 'Lat')
+    lon_column = _find_column(names, args.lon_column, LON_COLUMNS, 'Lon')
+    return encode_columnar_file(
+        args.input, args.output, lat_column, lon_column, args.precision, args.column,
+        args.packed_column, args.packed_format
+    )
+
+
+def run_decode(args, records, writer):
+    """Add center and bounds columns to records with DIGIPIN codes"""
+    invalid = 0
+    
+    for record in records:
+        if args.column not in record:
+            raise ValueError(f'DIGIPIN column not found: {args.column}')
+        try:
+            cell = DigipinDecoder.decode_cell(str(record[args.column] or ''))
+            values = cell.latitude, cell.longitude, cell.min_lat, cell.max_lat, cell.min_lon, cell.max_lon
+            values = [round(value, args.decimals) for value in values]
+        except ValueError:
+            values = [None] * 6
+            invalid += 1
+        
+        record.update(zip(('Latitude', 'Longitude', 'MinLat', 'MaxLat', 'MinLon', 'MaxLon'), values))
+        writer.write(record)
+    
+    return invalid
+
+
+def run_validate(args, records, writer):
+    """Add validity columns to records with DIGIPIN codes"""
+    invalid = 0
+    
+    for record in records:
+        if args.column not in record:
+            raise ValueError(f'DIGIPIN column not found: {args.column}')
+        is_valid, message = DigipinValidator.validate_digipin(record[args.column])
+        if not is_valid:
+            invalid += 1
+        elif args.invalid_only:
+            continue
+        
+        record['Valid'] = is_valid
+        record['Error'] = message
+        writer.write(record)
+    
+    return invalid
+
+
+def _grid_stream(args):
+    """Cell records for the grid subcommand, from a bounding box or polygons"""
+    if args.polygons:
+        with open(args.polygons, encoding='utf-8') as stream:
+            data = json.load(stream)
+        features = data.get('features', [data]) if isinstance(data, dict) else []
+        
+        # Each feature is filled on its own so overlapping features add up
+        polygons = []
+        for feature in features:
+            geometry = feature.get('geometry', feature)
+            if geometry.get('type') == 'Polygon':
+                polygons.append([geometry['coordinates']])
+            elif geometry.get('type') == 'MultiPolygon':
+                polygons.append(geometry['coordinates'])
+        
+        return GridStream.from_polygons(polygons, args.precision, args.mode, args.compact, args.limit or None)
+    
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in args.bbox.split(','))
+    except ValueError:
+        raise ValueError(f'Invalid bounding box: {args.bbox}. Expected min_lon,min_lat,max_lon,max_lat') from None
+    return GridStream.from_extent(min_lat, min_lon, max_lat, max_lon, args.precision, args.limit or None)
+
+
+def run_grid(args, writer):
+    """
+    Write the cells covering a bounding box or polygons
+    
+    Returns:
+        GridStream: The consumed stream, for its statistics
+    """
+    stream = _grid_stream(args)
+    for records in stream.batches():
+        for record in records:
+            writer.write({
+                'DIGIPIN': record.digipin,
+                'CenterLat': round(record.latitude, args.decimals),
+                'CenterLon': round(record.longitude, args.decimals),
+                'Precision': record.precision,
+                'Area_km2': record.area_km2
+            })
+    return stream
+
+
+def run_grid_store(args):
+    """Write the grid cells to a memory-mapped cell store file"""
+    if args.output == '-':
+        raise ValueError('Cell stores must be written to a file, not stdout')
+    stream = _grid_stream(args)
+    write_grid_store(args.output, stream)
+    return stream
+
+
+def build_parser():
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog='python -m QDIGIPIN',
+        description='Encode, decode and validate DIGIPIN codes without QGIS.'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    def add_io(subparser):
+        subparser.add_argument('input', nargs='?', default='-', help='Input file (default: stdin)')
+        subparser.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+        subparser.add_argument('--format', choices=FORMATS, help='Input format (default: from extension, else csv)')
+        subparser.add_argument('--output-format', choices=FORMATS, help='Output format (default: input format)')
+    
+    def add_precision(subparser, default):
+        subparser.add_argument('-p', '--precision', type=int, default=default, choices=range(1, 11),
+                               metavar='1-10', help=f'Precision level (default: {default})')
+    
+    encode = subparsers.add_parser('encode', help='Add DIGIPIN codes to coordinate records')
+    add_io(encode)
+    add_precision(encode, 10)
+    encode.add_argument('--lat-column', help='Latitude column (default: lat/latitude/y)')
+    encode.add_argument('--lon-column', help='Longitude column (default: lon/lng/longitude/x)')
+    encode.add_argument('--column', default='DIGIPIN', help='Output column (default: DIGIPIN)')
+    encode.add_argument('-j', '--workers', type=int, default=1,
+                        help='Worker processes for encoding (default: 1, 0 for every CPU)')
+    encode.add_argument('--packed-column', help='Also write packed integer codes to this column (Parquet/Arrow)')
+    encode.add_argument('--packed-format', choices=PACKED_FORMATS, default='uint64',
+                        help='Packed column type (default: uint64)')
+    
+    decode = subparsers.add_parser('decode', help='Add centers and bounds to DIGIPIN records')
+    add_io(decode)
+    decode.add_argument('--column', default='DIGIPIN', help='DIGIPIN column (default: DIGIPIN)')
+    decode.add_argument('--decimals', type=int, default=6, help='Decimal places (default: 6)')
+    
+    validate = subparsers.add_parser('validate', help='Check DIGIPIN codes; exits 1 if any are invalid')
+    add_io(validate)
+    validate.add_argument('--column', default='DIGIPIN', help='DIGIPIN column (default: DIGIPIN)')
+    validate.add_argument('--invalid-only', action='store_true', help='Only write invalid records')
+    
+    grid = subparsers.add_parser('grid', help='Write the cells covering a bounding box or polygons')
+    area = grid.add_mutually_exclusive_group(required=True)
+    area.add_argument('--bbox', help='min_lon,min_lat,max_lon,max_lat')
+    area.add_argument('--polygons', help='GeoJSON file with Polygon/MultiPolygon features')
+    add_precision(grid, 6)
+    grid.add_argument('--mode', choices=('center', 'intersects', 'contains'), default='center',
+                      help='Boundary cells kept with --polygons (default: center)')
+    grid.add_argument('--compact', action='store_true', help='Compacted mixed-precision cover with --polygons')
+    grid.add_argument('--limit', type=int, default=0, help='Stop after this many cells')
+    grid.add_argument('--decimals', type=int, default=6, help='Decimal places (default: 6)')
+    grid.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+    grid.add_argument('--output-format', choices=FORMATS + ('cellstore',),
+                      help='Output format (default: from extension, else csv; .dpcs for a cell store)')
+    
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command-line interface
+    
+    Args:
+        argv (list): Arguments (default: sys.argv[1:])
+        
+    Returns:
+        int: Exit status - 0 on success, 1 if invalid records were found
+        (validate only), 2 on errors, 141 if stdout was closed early
+    """
+    args = build_parser().parse_args(argv)
+    
+    try:
+        if args.command == 'grid':
+            if args.output_format == 'cellstore' or (
+                not args.output_format and args.output.lower().endswith(CELL_STORE_EXTENSION)
+            ):
+                stream = run_grid_store(args)
+            else:
+                writer = RecordWriter(args.output, detect_format(args.output, args.output_format))
+                stream = run_grid(args, writer)
+                writer.close()
+            print(f'Wrote {stream.count:,} cells ({stream.cells_per_second:,.0f} cells/s)', file=sys.stderr)
+            return 0
+        
+        input_format = detect_format(args.input, args.format)
+        output_format = args.output_format or (
+            detect_format(args.output) if args.output != '-' else input_format
+        )
+        
+        if args.command == 'encode' and _columnar_files(args, input_format, output_format):
+            stats = run_encode_columnar(args, input_format)
+            print(f'Wrote {stats["rows"]:,} records ({stats["errors"]:,} invalid)', file=sys.stderr)
+            return 0
+        if args.command == 'encode' and args.packed_column:
+            raise ValueError('--packed-column needs Parquet or Arrow input and output files')
+        
+        records = read_records(args.input, input_format)
+        writer = RecordWriter(args.output, output_format)
+        runner = {'encode': run_encode, 'decode': run_decode, 'validate': run_validate}[args.command]
+        try:
+            invalid = runner(args, records, writer)
+        finally:
+            writer.close()
+    except BrokenPipeError:
+        # The reader went away (grid | head): stop quietly, and point stdout
+        # at devnull so the flush at exit does not fail again
+        try:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        except (OSError, ValueError):
+            pass
+        return 141
+    except (OSError, ValueError) as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    
+    print(f'Wrote {writer.count:,} records ({invalid:,} invalid)', file=sys.stderr)
+    if args.command == 'validate' and invalid:
+        return 1
+    return 0
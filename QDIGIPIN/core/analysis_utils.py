@@ -3,20 +3,39 @@ Spatial analysis utilities for DIGIPIN data
 """
 
 from qgis.core import (
-    QgsVectorLayer, QgsFeature, QgsGeometry, QgsField,
-    QgsPointXY, QgsProject, QgsDistanceArea
+    QgsVectorLayer, QgsFeature, QgsFeatureRequest, QgsGeometry, QgsField
 )
 from qgis.PyQt.QtCore import QVariant
-from ..core.digipin_engine import DigipinEncoder, DigipinDecoder
+from ..core.digipin_engine import DigipinDecoder
+from ..core.packed import PackedDigipin
+from ..core.topology import DigipinTopology
+from ..core.hierarchy import DigipinHierarchy
+from ..core.index import DigipinIndex
 from collections import defaultdict
-import math
 
 
 class DigipinSpatialAnalysis:
     """Spatial analysis tools for DIGIPIN data"""
     
     @staticmethod
-    def calculate_density(layer, digipin_field, precision):
+    def build_index(layer, digipin_field):
+        """
+        Index a layer's DIGIPIN field for repeated queries
+        
+        Pass the index to the functions below to skip rescanning the layer,
+        or query it directly (cell, cells, bbox) for feature ids.
+        
+        Args:
+            layer: Input layer
+            digipin_field: Name of DIGIPIN field
+            
+        Returns:
+            DigipinIndex: Index keyed by feature id
+        """
+        return DigipinIndex.from_layer(layer, digipin_field)
+    
+    @staticmethod
+    def calculate_density(layer, digipin_field, precision, packed=False, store_path=None, index=None):
         """
         Calculate point density per DIGIPIN cell
         
@@ -24,24 +43,47 @@ class DigipinSpatialAnalysis:
             layer: Input point layer
             digipin_field: Name of DIGIPIN field
             precision: Grid precision for density calculation
-            
+            packed: Return packed integer codes instead of DIGIPIN strings
+            store_path: Also write the counts to this cell store file
+                (see core.cellstore)
+            index: DigipinIndex of the layer (see build_index), used instead
+                of reading the layer
+                
         Returns:
             dict: DIGIPIN -> count mapping
         """
-        density_map = defaultdict(int)
+        if index is not None:
+            density_map = index.counts(precision)
+        else:
+            density_map = defaultdict(int)
+            
+            field_idx = layer.fields().indexOf(digipin_field)
+            if field_idx == -1:
+                return {}
+            
+            for feature in layer.getFeatures():
+                digipin = feature.attribute(digipin_field)
+                if digipin:
+                    try:
+                        code = PackedDigipin.pack(digipin)
+                    except (ValueError, AttributeError):
+                        continue
+                    # Truncate to specified precision if needed
+                    if PackedDigipin.precision(code) > precision:
+                        code = PackedDigipin.truncate(code, precision)
+                    density_map[code] += 1
         
-        field_idx = layer.fields().indexOf(digipin_field)
-        if field_idx == -1:
-            return {}
+        if store_path:
+            from .cellstore import write_density_store
+            write_density_store(store_path, density_map)
         
-        for feature in layer.getFeatures():
-            digipin = feature.attribute(digipin_field)
-            if digipin:
-                # Truncate to specified precision if needed
-                digipin_clean = digipin.replace('-', '')[:precision]
-                density_map[digipin_clean] += 1
+        if packed:
+            return dict(density_map)
         
-        return dict(density_map)
+        return {
+            PackedDigipin.unpack(code, add_hyphens=False): count
+            for code, count in density_map.items()
+        }
     
     @staticmethod
     def find_neighbors(digipin, include_diagonals=True):
@@ -53,150 +95,170 @@ class DigipinSpatialAnalysis:
             include_diagonals: Include diagonal neighbors
             
         Returns:
-            list: List of neighboring DIGIPIN codes
+            list: List of neighboring DIGIPIN codes, hyphenated as
+            DigipinEncoder.encode returns them
         """
         try:
-            result = DigipinDecoder.decode(digipin)
-            center_lat = result['latitude']
-            center_lon = result['longitude']
-            bounds = result['bounds']
-            
-            # Calculate cell size
-            lat_size = bounds['maxLat'] - bounds['minLat']
-            lon_size = bounds['maxLon'] - bounds['minLon']
-            
-            precision = len(digipin.replace('-', ''))
-            
-            neighbors = []
-            
-            # Define offsets for neighbors
-            if include_diagonals:
-                offsets = [
-                    (-1, -1), (-1, 0), (-1, 1),
-                    (0, -1),           (0, 1),
-                    (1, -1),  (1, 0),  (1, 1)
-                ]
-            else:
-                offsets = [
-                    (-1, 0),
-                    (0, -1), (0, 1),
-                    (1, 0)
-                ]
-            
-            for lat_offset, lon_offset in offsets:
-                neighbor_lat = center_lat + (lat_offset * lat_size)
-                neighbor_lon = center_lon + (lon_offset * lon_size)
-                
-                try:
-                    neighbor_digipin = DigipinEncoder.encode(neighbor_lat, neighbor_lon, precision)
-                    if neighbor_digipin != digipin:
-                        neighbors.append(neighbor_digipin)
-                except ValueError:
-                    pass
-            
-            return neighbors
-            
+            code = PackedDigipin.pack(digipin)
         except ValueError:
             return []
+        
+        return [
+            PackedDigipin.unpack(neighbor)
+            for neighbor in DigipinTopology.neighbors(code, include_diagonals)
+        ]
     
     @staticmethod
-    def calculate_coverage(layer, digipin_field, total_area_km2=None):
+    def calculate_coverage(layer, digipin_field, total_area_km2=None, zone=None, index=None):
         """
         Calculate coverage statistics
         
+        Cells are compacted (see DigipinHierarchy.compact), so duplicate and
+        nested cells are counted once and the covered area is exact.
+        
         Args:
             layer: Input layer with DIGIPIN field
             digipin_field: Name of DIGIPIN field
             total_area_km2: Total area to calculate coverage percentage
-            
+            zone: Optional packed codes defining a zone, compacted or not;
+                adds how many of the layer's cells fall inside it
+            index: DigipinIndex of the layer (see build_index), used instead
+                of reading the layer
+                
         Returns:
             dict: Coverage statistics
         """
-        field_idx = layer.fields().indexOf(digipin_field)
-        if field_idx == -1:
-            return {}
-        
         unique_digipins = set()
         precision_counts = defaultdict(int)
         
-        for feature in layer.getFeatures():
-            digipin = feature.attribute(digipin_field)
-            if digipin:
-                digipin_clean = digipin.replace('-', '')
-                unique_digipins.add(digipin_clean)
-                precision = len(digipin_clean)
-                precision_counts[precision] += 1
+        if index is not None:
+            for code, count in index.counts().items():
+                unique_digipins.add(code)
+                precision_counts[PackedDigipin.precision(code)] += count
+        else:
+            field_idx = layer.fields().indexOf(digipin_field)
+            if field_idx == -1:
+                return {}
+            
+            for feature in layer.getFeatures():
+                digipin = feature.attribute(digipin_field)
+                if digipin:
+                    try:
+                        code = PackedDigipin.pack(digipin)
+                    except (ValueError, AttributeError):
+                        continue
+                    unique_digipins.add(code)
+                    precision_counts[PackedDigipin.precision(code)] += 1
+        
+        compacted = DigipinHierarchy.compact(unique_digipins)
         
         stats = {
             'unique_cells': len(unique_digipins),
+            'compacted_cells': len(compacted),
             'precision_distribution': dict(precision_counts),
             'total_features': layer.featureCount()
         }
         
         if total_area_km2:
-            # Estimate covered area (approximate)
-            # This is a rough estimate based on average cell size
-            avg_precision = sum(p * c for p, c in precision_counts.items()) / sum(precision_counts.values()) if precision_counts else 0
-            if avg_precision > 0:
-                from ..core.constants import PRECISION_INFO
-                avg_cell_size = PRECISION_INFO.get(int(avg_precision), {}).get('cell_size_km', 1)
-                covered_area = len(unique_digipins) * avg_cell_size
-                stats['covered_area_km2'] = covered_area
-                stats['coverage_percentage'] = (covered_area / total_area_km2) * 100 if total_area_km2 > 0 else 0
+            covered_area = sum(DigipinDecoder.decode_packed(code).area_km2 for code in compacted)
+            stats['covered_area_km2'] = covered_area
+            stats['coverage_percentage'] = (covered_area / total_area_km2) * 100 if total_area_km2 > 0 else 0
+        
+        if zone is not None:
+            zone_cells = set(DigipinHierarchy.compact(zone))
+            inside = sum(1 for code in unique_digipins if DigipinHierarchy.covers(zone_cells, code))
+            stats['zone_cells'] = len(zone_cells)
+            stats['cells_in_zone'] = inside
+            stats['zone_percentage'] = (inside / len(unique_digipins)) * 100 if unique_digipins else 0
         
         return stats
     
     @staticmethod
-    def calculate_distance_matrix(layer, digipin_field, max_features=100):
+    def _layer_centers(layer, digipin_field, max_features=None):
+        """DIGIPIN codes of a layer with their cell centers, geometry not read"""
+        field_idx = layer.fields().indexOf(digipin_field)
+        if field_idx == -1:
+            return [], [], []
+        
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([field_idx])
+        
+        digipins = []
+        lats = []
+        lons = []
+        for feature in layer.getFeatures(request):
+            if max_features is not None and len(digipins) >= max_features:
+                break
+            
+            digipin = feature.attribute(field_idx)
+            if digipin:
+                try:
+                    cell = DigipinDecoder.decode_cell(digipin)
+                except (ValueError, AttributeError):
+                    continue
+                digipins.append(digipin)
+                lats.append(cell.latitude)
+                lons.append(cell.longitude)
+        
+        return digipins, lats, lons
+    
+    @staticmethod
+    def calculate_distance_matrix(layer, digipin_field, max_features=100, method='haversine'):
         """
         Calculate distance matrix between DIGIPIN centers
         
+        Distances are computed in vectorized tiles (see core.distance). The
+        result is a dictionary of dictionaries, so keep max_features small;
+        use calculate_distance_array for large matrices.
+        
         Args:
             layer: Input layer
             digipin_field: DIGIPIN field name
-            max_features: Maximum features to process (to prevent memory issues)
+            max_features: Maximum features to process (None for all)
+            method: 'haversine' or 'vincenty' (WGS84 ellipsoid)
             
         Returns:
-            dict: Distance matrix
+            dict: Distance matrix in km
         """
-        field_idx = layer.fields().indexOf(digipin_field)
-        if field_idx == -1:
-            return {}
+        digipins, matrix = DigipinSpatialAnalysis.calculate_distance_array(
+            layer, digipin_field, max_features, method
+        )
         
-        # Collect DIGIPIN codes and their centers
-        digipins = []
-        centers = []
+        result = {}
+        for i, digipin1 in enumerate(digipins):
+            result[digipin1] = {}
+            for j, (digipin2, distance) in enumerate(zip(digipins, matrix[i].tolist())):
+                if i != j:
+                    result[digipin1][digipin2] = distance
         
-        count = 0
-        for feature in layer.getFeatures():
-            if count >= max_features:
-                break
+        return result
+    
+    @staticmethod
+    def calculate_distance_array(layer, digipin_field, max_features=None, method='haversine', path=None):
+        """
+        Calculate a dense distance matrix between DIGIPIN centers
+        
+        Args:
+            layer: Input layer
+            digipin_field: DIGIPIN field name
+            max_features: Maximum features to process (None for all)
+            method: 'haversine' or 'vincenty' (WGS84 ellipsoid)
+            path: Write the matrix to this .npy file, memory-mapped, instead
+                of holding it in memory
                 
-            digipin = feature.attribute(digipin_field)
-            if digipin:
-                try:
-                    result = DigipinDecoder.decode(digipin)
-                    digipins.append(digipin)
-                    centers.append((result['latitude'], result['longitude']))
-                    count += 1
-                except ValueError:
-                    pass
-        
-        # Calculate distances
-        distance_calc = QgsDistanceArea()
-        distance_calc.setEllipsoid('WGS84')
-        
-        matrix = {}
-        for i, (digipin1, center1) in enumerate(zip(digipins, centers)):
-            matrix[digipin1] = {}
-            for j, (digipin2, center2) in enumerate(zip(digipins, centers)):
-                if i != j:
-                    point1 = QgsPointXY(center1[1], center1[0])
-                    point2 = QgsPointXY(center2[1], center2[0])
-                    distance_m = distance_calc.measureLine(point1, point2)
-                    matrix[digipin1][digipin2] = distance_m / 1000  # Convert to km
+        Returns:
+            tuple: (list of DIGIPIN codes, float32 NumPy matrix in km)
+        """
+        import numpy
+        from ..core.distance import DistanceMatrix
+        
+        digipins, lats, lons = DigipinSpatialAnalysis._layer_centers(layer, digipin_field, max_features)
+        out = None
+        if path:
+            out = numpy.lib.format.open_memmap(path, 'w+', numpy.float32, (len(digipins), len(digipins)))
         
-        return matrix
+        return digipins, DistanceMatrix.dense(lats, lons, method=method, out=out)
     
     @staticmethod
     def create_density_layer(density_map, layer_name='DIGIPIN_Density'):
@@ -231,15 +293,11 @@ class DigipinSpatialAnalysis:
         features = []
         for digipin, count in density_map.items():
             try:
-                result = DigipinDecoder.decode(digipin)
-                bounds = result['bounds']
+                cell = DigipinDecoder.decode_cell(digipin)
                 
                 # Create polygon
                 from qgis.core import QgsRectangle
-                rect = QgsRectangle(
-                    bounds['minLon'], bounds['minLat'],
-                    bounds['maxLon'], bounds['maxLat']
-                )
+                rect = QgsRectangle(cell.min_lon, cell.min_lat, cell.max_lon, cell.max_lat)
                 polygon = QgsGeometry.fromRect(rect)
                 
                 # Classify density
@@ -0,0 +1,443 @@
+"""
+Memory-mapped cell store files
+A sorted array of packed cell codes with fixed-width attribute columns, for
+zero-copy random access shared between processes
+
+File layout (little-endian):
+    header      magic 'DPCS', version (u16), reserved (u16), cell count (u64),
+                column count (u32), data offset (u32)
+    columns     per column: name length (u16), UTF-8 name, type (u8 ASCII
+                struct code), data offset (u64)
+    data        packed codes as u64, then each column as a contiguous array,
+                every array starting on an 8-byte boundary
+"""
+
+import array
+import mmap
+import operator
+import os
+import struct
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from .digipin_engine import DigipinDecoder
+from .packed import PackedDigipin
+
+CELL_STORE_MAGIC = b'DPCS'
+CELL_STORE_VERSION = 1
+CELL_STORE_EXTENSION = '.dpcs'
+
+# Column type name -> struct/array type code
+COLUMN_TYPES = {
+    'float64': 'd',
+    'float32': 'f',
+    'int64': 'q',
+    'int32': 'i',
+    'uint64': 'Q',
+    'uint32': 'I'
+}
+
+# Columns written for plain cells (grid and polyfill outputs)
+CELL_COLUMNS = [('latitude', 'float64'), ('longitude', 'float64'), ('area_km2', 'float64')]
+
+_HEADER = struct.Struct('<4sHHQII')
+_COLUMN = struct.Struct('<BQ')
+
+
+def _align(offset):
+    """Round an offset up to the next 8-byte boundary"""
+    return (offset + 7) & ~7
+
+
+def _check_byte_order():
+    """Cell stores are mapped as native arrays, which must be little-endian"""
+    if sys.byteorder != 'little':
+        raise ValueError('Cell stores can only be used on little-endian machines')
+
+
+class CellStoreWriter:
+    """
+    Build a cell store file
+    
+    Cells may be added in any order; they are sorted when the file is
+    written. Values are buffered in compact typed arrays, so memory is
+    roughly the size of the final file.
+    """
+    
+    def __init__(self, path, columns, unique=True):
+        """
+        Args:
+            path (str): Output file
+            columns (list): (name, type) pairs, type one of COLUMN_TYPES
+            unique (bool): Reject cells added more than once; with False,
+                rows of the same cell are kept together in insertion order
+                
+        Raises:
+            ValueError: If a column type is unknown or a name is repeated
+        """
+        _check_byte_order()
+        names = [name for name, _ in columns]
+        if len(set(names)) != len(names):
+            raise ValueError('Column names must be unique')
+        for name, kind in columns:
+            if kind not in COLUMN_TYPES:
+                raise ValueError(f'Invalid column type for {name}: {kind}. Must be one of {", ".join(COLUMN_TYPES)}')
+        
+        self.path = path
+        self.columns = list(columns)
+        self.unique = unique
+        self._codes = array.array('Q')
+        self._values = [array.array(COLUMN_TYPES[kind]) for _, kind in columns]
+        self._sorted = True
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+    
+    def __len__(self):
+        return len(self._codes)
+    
+    def add(self, code, values):
+        """
+        Add one cell
+        
+        Args:
+            code (int): Packed code (see core.packed)
+            values (sequence): One value per column, in column order
+        """
+        if len(values) != len(self._values):
+            raise ValueError(f'Expected {len(self._values)} values, got {len(values)}')
+        if self._sorted and self._codes and code < self._codes[-1]:
+            self._sorted = False
+        self._codes.append(code)
+        for column, value in zip(self._values, values):
+            column.append(value)
+    
+    def add_many(self, codes, columns):
+        """
+        Add many cells at once
+        
+        Args:
+            codes (sequence): Packed codes
+            columns (list): One sequence of values per column, in column order
+        """
+        if len(columns) != len(self._values):
+            raise ValueError(f'Expected {len(self._values)} columns, got {len(columns)}')
+        start = len(self._codes)
+        self._codes.extend(codes)
+        for column, values in zip(self._values, columns):
+            column.extend(values)
+            if len(column) != len(self._codes):
+                raise ValueError('Every column needs one value per cell')
+        
+        if self._sorted:
+            codes = self._codes
+            first = max(start - 1, 0)
+            self._sorted = all(map(operator.le, islice(codes, first, None), islice(codes, first + 1, None)))
+    
+    def close(self):
+        """
+        Sort the cells and write the file
+        
+        Raises:
+            ValueError: If a cell was added more than once
+        """
+        codes = self._codes
+        values = self._values
+        if not self._sorted:
+            order = self._sort_order()
+            codes = array.array('Q', (codes[index] for index in order))
+            values = [array.array(column.typecode, (column[index] for index in order)) for column in values]
+        
+        if self.unique:
+            for index in range(1, len(codes)):
+                if codes[index] == codes[index - 1]:
+                    raise ValueError(f'Cell added more than once: {PackedDigipin.unpack(codes[index])}')
+        
+        encoded_names = [name.encode('utf-8') for name, _ in self.columns]
+        offset = _HEADER.size + sum(2 + len(name) + _COLUMN.size for name in encoded_names)
+        data_offset = _align(offset)
+        
+        offsets = []
+        position = _align(data_offset + len(codes) * 8)
+        for column in values:
+            offsets.append(position)
+            position = _align(position + len(column) * column.itemsize)
+        
+        with open(self.path, 'wb') as f:
+            f.write(_HEADER.pack(
+                CELL_STORE_MAGIC, CELL_STORE_VERSION, 0, len(codes), len(self.columns), data_offset
+            ))
+            for name, (_, kind), column_offset in zip(encoded_names, self.columns, offsets):
+                f.write(struct.pack('<H', len(name)) + name)
+                f.write(_COLUMN.pack(ord(COLUMN_TYPES[kind]), column_offset))
+            
+            for start, data in zip([data_offset] + offsets, [codes] + values):
+                f.write(b'\0' * (start - f.tell()))
+                data.tofile(f)
+    
+    def discard(self):
+        """Drop the buffered cells without writing, removing any existing file at path"""
+        self._codes = array.array('Q')
+        self._values = [array.array(column.typecode) for column in self._values]
+        self._sorted = True
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def _sort_order(self):
+        """Indices that sort the codes"""
+        try:
+            import numpy
+        except ImportError:
+            return sorted(range(len(self._codes)), key=self._codes.__getitem__)
+        return numpy.argsort(numpy.frombuffer(self._codes, dtype=numpy.uint64), kind='stable').tolist()
+
+
+def write_cell_store(path, cells, columns):
+    """
+    Write cells to a cell store file
+    
+    Args:
+        path (str): Output file
+        cells (iterable): (code, values) pairs
+        columns (list): (name, type) pairs
+        
+    Returns:
+        int: Number of cells written
+    """
+    with CellStoreWriter(path, columns) as writer:
+        for code, values in cells:
+            writer.add(code, values)
+    return len(writer)
+
+
+def write_grid_store(path, cells):
+    """
+    Write grid cells with their center and area (see CELL_COLUMNS)
+    
+    Args:
+        path (str): Output file
+        cells (iterable): DigipinCell or GridRecord objects, e.g. a GridStream
+            (see core.grid_engine)
+            
+    Returns:
+        int: Number of cells written
+    """
+    return write_cell_store(
+        path,
+        ((cell.code, (cell.latitude, cell.longitude, cell.area_km2)) for cell in cells),
+        CELL_COLUMNS
+    )
+
+
+def write_density_store(path, density_map):
+    """
+    Write a density map from DigipinSpatialAnalysis.calculate_density
+    
+    Args:
+        path (str): Output file
+        density_map (dict): Packed code or DIGIPIN string -> count
+        
+    Returns:
+        int: Number of cells written
+    """
+    def cells():
+        for code, count in density_map.items():
+            if isinstance(code, str):
+                code = PackedDigipin.pack(code)
+            cell = DigipinDecoder.decode_packed(code)
+            yield code, (count, cell.latitude, cell.longitude, cell.area_km2)
+    
+    return write_cell_store(path, cells(), [('count', 'int64')] + CELL_COLUMNS)
+
+
+class CellStore:
+    """
+    Read-only, memory-mapped view of a cell store file
+    
+    Opening maps the file without reading it, so any number of processes
+    can share one copy through the page cache. Lookups binary-search the
+    code array in O(log n).
+    """
+    
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Cell store file
+            
+        Raises:
+            ValueError: If the file is not a cell store
+        """
+        _check_byte_order()
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f'Not a cell store file: {path}') from None
+        
+        try:
+            self._read_header()
+        except (ValueError, struct.error):
+            self.close()
+            raise ValueError(f'Not a cell store file: {path}') from None
+    
+    def _read_header(self):
+        """Parse the header and map the code and column arrays"""
+        buffer = self._mmap
+        magic, version, _, count, column_count, data_offset = _HEADER.unpack_from(buffer, 0)
+        if magic != CELL_STORE_MAGIC:
+            raise ValueError('Bad magic')
+        if version != CELL_STORE_VERSION:
+            raise ValueError(f'Unsupported cell store version: {version}')
+        
+        view = memoryview(buffer)
+        self._views = [view]
+        self.count = count
+        self.codes = self._map(data_offset, 'Q')
+        
+        self.columns = []
+        self._columns = {}
+        position = _HEADER.size
+        types = {code: name for name, code in COLUMN_TYPES.items()}
+        for _ in range(column_count):
+            (length,) = struct.unpack_from('<H', buffer, position)
+            name = bytes(buffer[position + 2:position + 2 + length]).decode('utf-8')
+            type_code, offset = _COLUMN.unpack_from(buffer, position + 2 + length)
+            position += 2 + length + _COLUMN.size
+            
+            type_code = chr(type_code)
+            if type_code not in types:
+                raise ValueError('Corrupt cell store')
+            self.columns.append((name, types[type_code]))
+            self._columns[name] = self._map(offset, type_code)
+    
+    def _map(self, offset, type_code):
+        """Zero-copy typed view of one array in the file"""
+        size = struct.calcsize(type_code)
+        if offset + self.count * size > len(self._mmap):
+            raise ValueError('Truncated cell store')
+        view = self._views[0][offset:offset + self.count * size].cast(type_code)
+        self._views.append(view)
+        return view
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+    
+    def __len__(self):
+        return self.count
+    
+    def __iter__(self):
+        return iter(self.codes)
+    
+    def __contains__(self, code):
+        return self.find(code) >= 0
+    
+    def close(self):
+        """Unmap the file; arrays from array() keep it mapped until released"""
+        try:
+            for view in reversed(getattr(self, '_views', [])):
+                view.release()
+            self._mmap.close()
+        except BufferError:
+            # NumPy arrays still reference the mapping; it closes with them
+            pass
+        self._views = []
+        self._file.close()
+    
+    def find(self, code):
+        """
+        Find the row of a cell
+        
+        Returns:
+            int: Row index (the first, if the cell has several rows), or -1
+            if the cell is not stored
+        """
+        index = bisect_left(self.codes, code)
+        if index < self.count and self.codes[index] == code:
+            return index
+        return -1
+    
+    def row(self, index):
+        """Attribute dictionary of a row, including its 'code'"""
+        result = {'code': self.codes[index]}
+        for name, _ in self.columns:
+            result[name] = self._columns[name][index]
+        return result
+    
+    def get(self, code):
+        """
+        Look up the attributes of a cell
+        
+        Returns:
+            dict: Column values with 'code', or None if the cell is not stored
+        """
+        index = self.find(code)
+        return self.row(index) if index >= 0 else None
+    
+    def value(self, code, column, default=None):
+        """Look up one attribute of a cell"""
+        index = self.find(code)
+        return self._columns[column][index] if index >= 0 else default
+    
+    def column(self, name):
+        """
+        Zero-copy view of a whole column
+        
+        Returns:
+            memoryview: Typed values in code order
+        """
+        return self._columns[name]
+    
+    def within(self, code):
+        """
+        Rows of the stored cells inside a cell, including the cell itself
+        
+        Descendants of a cell are contiguous in code order, so this is two
+        binary searches.
+        
+        Returns:
+            range: Row indices
+        """
+        first, last = PackedDigipin.descendant_range(code)
+        return range(bisect_left(self.codes, first), bisect_right(self.codes, last))
+    
+    def array(self, name=None):
+        """
+        Zero-copy NumPy array of the codes or of a column
+        
+        Args:
+            name (str): Column name, or None for the packed codes
+            
+        Returns:
+            numpy.ndarray: Read-only array backed by the mapped file
+        """
+        import numpy
+        view = self.codes if name is None else self._columns[name]
+        return numpy.frombuffer(view, dtype=view.format)
+    
+    def find_array(self, codes):
+        """
+        Find the rows of many cells with NumPy
+        
+        Args:
+            codes (array-like): Packed codes
+            
+        Returns:
+            numpy.ndarray: int64 row indices, -1 where a cell is not stored
+        """
+        import numpy
+        codes = numpy.asarray(codes, dtype=numpy.uint64)
+        stored = self.array()
+        index = numpy.searchsorted(stored, codes)
+        clipped = numpy.minimum(index, max(self.count - 1, 0))
+        found = (index < self.count) & (stored[clipped] == codes) if self.count else numpy.zeros(codes.shape, bool)
+        return numpy.where(found, index, -1).astype(numpy.int64)
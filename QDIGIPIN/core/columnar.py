@@ -0,0 +1,305 @@
+"""
+Columnar batch encoding for Apache Arrow and Parquet files
+Coordinate columns go straight into the vectorized encoder, one record batch at a time
+"""
+
+import os
+import time
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+# Rows per record batch, and so per Parquet row group when writing
+DEFAULT_BATCH_SIZE = 65536
+
+# Column types for packed integer codes
+PACKED_UINT64 = 'uint64'
+PACKED_DICTIONARY = 'dictionary'
+PACKED_FORMATS = (PACKED_UINT64, PACKED_DICTIONARY)
+
+
+def import_pyarrow():
+    """
+    Import pyarrow, with a readable error when it is missing
+    
+    Returns:
+        module: pyarrow, with pyarrow.parquet and pyarrow.ipc loaded
+        
+    Raises:
+        ValueError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError('Parquet and Arrow support requires pyarrow (pip install pyarrow)') from None
+    return pyarrow
+
+
+def columnar_format(path):
+    """
+    Work out the columnar format of a file from its extension
+    
+    Returns:
+        str: 'parquet', 'arrow', or None for other files
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if extension in ARROW_EXTENSIONS:
+        return 'arrow'
+    return None
+
+
+def column_names(path, fmt=None):
+    """
+    Read the column names of a Parquet or Arrow file without reading its rows
+    
+    Returns:
+        list: Column names
+    """
+    pyarrow = import_pyarrow()
+    fmt = fmt or columnar_format(path)
+    if fmt == 'parquet':
+        return list(pyarrow.parquet.ParquetFile(path).schema_arrow.names)
+    with pyarrow.memory_map(path) as source:
+        try:
+            return list(pyarrow.ipc.open_file(source).schema.names)
+        except pyarrow.ArrowInvalid:
+            source.seek(0)
+            return list(pyarrow.ipc.open_stream(source).schema.names)
+
+
+def iter_batches(source, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream record batches from a Parquet or Arrow IPC source
+    
+    Parquet files are read row group by row group; Arrow files are memory
+    mapped. Only one batch is materialised at a time.
+    
+    Args:
+        source: File path or pyarrow buffer
+        fmt (str): 'parquet' or 'arrow'
+        batch_size (int): Maximum rows per Parquet batch
+        
+    Yields:
+        pyarrow.RecordBatch: Record batches in file order
+    """
+    pyarrow = import_pyarrow()
+    if fmt == 'parquet':
+        yield from pyarrow.parquet.ParquetFile(source).iter_batches(batch_size=batch_size)
+        return
+    
+    if isinstance(source, str):
+        source = pyarrow.memory_map(source)
+    try:
+        reader = pyarrow.ipc.open_file(source)
+    except pyarrow.ArrowInvalid:
+        # Arrow IPC stream rather than file format
+        source.seek(0)
+        yield from pyarrow.ipc.open_stream(source)
+        return
+    for index in range(reader.num_record_batches):
+        yield reader.get_batch(index)
+
+
+class ColumnarWriter:
+    """Write record batches to Parquet (one row group per batch) or Arrow IPC"""
+    
+    def __init__(self, path, fmt):
+        """
+        Args:
+            path (str): Output file
+            fmt (str): 'parquet' or 'arrow'
+        """
+        self._pyarrow = import_pyarrow()
+        self.path = path
+        self.fmt = fmt
+        self.schema = None
+        self.count = 0
+        self._writer = None
+        self._sink = None
+    
+    def write_batch(self, batch):
+        """Write one record batch; the first batch fixes the schema"""
+        if self._writer is None:
+            self.schema = batch.schema
+            if self.fmt == 'parquet':
+                self._writer = self._pyarrow.parquet.ParquetWriter(self.path, self.schema)
+            else:
+                self._sink = self._pyarrow.OSFile(self.path, 'wb')
+                # IPC files allow one dictionary per column, so dictionary
+                # columns need the stream format, which may replace it per batch
+                if any(self._pyarrow.types.is_dictionary(field.type) for field in self.schema):
+                    self._writer = self._pyarrow.ipc.new_stream(self._sink, self.schema)
+                else:
+                    self._writer = self._pyarrow.ipc.new_file(self._sink, self.schema)
+        elif batch.schema != self.schema:
+            batch = self._pyarrow.Table.from_batches([batch]).cast(self.schema).to_batches()[0]
+        
+        self._writer.write_batch(batch)
+        self.count += batch.num_rows
+    
+    def write_rows(self, rows):
+        """Write a list of row dictionaries as one batch"""
+        if not rows:
+            return
+        pyarrow = self._pyarrow
+        if self.schema is None:
+            table = pyarrow.Table.from_pylist(rows)
+        else:
+            table = pyarrow.Table.from_pylist(rows, schema=self.schema)
+        for batch in table.to_batches():
+            self.write_batch(batch)
+    
+    def close(self):
+        """Finish the file"""
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+def _coordinate_array(pyarrow, column):
+    """Float64 NumPy array of a coordinate column (NaN where null or malformed)"""
+    try:
+        column = pyarrow.compute.cast(column, pyarrow.float64())
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError):
+        from .streaming import parse_coordinate
+        values = [parse_coordinate(value) for value in column.to_pylist()]
+        column = pyarrow.array(values, type=pyarrow.float64())
+    return column.to_numpy(zero_copy_only=False)
+
+
+def encode_batch(batch, lat_field, lon_field, precision=10, field_name='DIGIPIN',
+                 packed_field=None, packed_format=PACKED_UINT64):
+    """
+    Add DIGIPIN columns to a record batch
+    
+    Args:
+        batch (pyarrow.RecordBatch): Input rows
+        lat_field (str): Latitude column
+        lon_field (str): Longitude column
+        precision (int): Precision level (1-10)
+        field_name (str): String code column to add (None to skip it)
+        packed_field (str): Packed integer code column to add, if any
+        packed_format (str): 'uint64' or 'dictionary' (dictionary-encoded
+            uint64, compact when many rows share a cell)
+            
+    Returns:
+        tuple: (batch with the new columns, number of invalid rows); existing
+        columns of the same name are replaced and invalid rows are null
+        
+    Raises:
+        ValueError: If a column is missing or packed_format is unknown
+    """
+    from .vectorized import VectorizedEncoder
+    
+    pyarrow = import_pyarrow()
+    if packed_format not in PACKED_FORMATS:
+        raise ValueError(f'Invalid packed format: {packed_format}. Must be one of {", ".join(PACKED_FORMATS)}')
+    names = batch.schema.names
+    for field in (lat_field, lon_field):
+        if field not in names:
+            raise ValueError(f'Column not found: {field}')
+    
+    lats = _coordinate_array(pyarrow, batch.column(names.index(lat_field)))
+    lons = _coordinate_array(pyarrow, batch.column(names.index(lon_field)))
+    
+    columns = {}
+    valid = None
+    if field_name:
+        codes, valid = VectorizedEncoder.encode(lats, lons, precision)
+        columns[field_name] = pyarrow.array(codes, type=pyarrow.string(), mask=~valid)
+    if packed_field:
+        packed, valid = VectorizedEncoder.encode_packed(lats, lons, precision)
+        array = pyarrow.array(packed, type=pyarrow.uint64(), mask=~valid)
+        if packed_format == PACKED_DICTIONARY:
+            array = array.dictionary_encode()
+        columns[packed_field] = array
+    
+    arrays = [batch.column(index) for index, name in enumerate(names) if name not in columns]
+    fields = [batch.schema.field(index) for index, name in enumerate(names) if name not in columns]
+    for name, array in columns.items():
+        arrays.append(array)
+        fields.append(pyarrow.field(name, array.type))
+    
+    invalid = int((~valid).sum()) if valid is not None else 0
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=pyarrow.schema(fields, batch.schema.metadata)), invalid
+
+
+def encode_columnar_file(input_path, output_path, lat_field, lon_field, precision=10, field_name='DIGIPIN',
+                         packed_field=None, packed_format=PACKED_UINT64, batch_size=DEFAULT_BATCH_SIZE,
+                         on_batch=None):
+    """
+    Encode a Parquet or Arrow file batch by batch
+    
+    Each record batch is encoded with whole-column operations and written
+    as it finishes, so memory stays at one batch however large the file.
+    Input and output formats follow the file extensions and may differ.
+    
+    Args:
+        input_path (str): Parquet or Arrow file
+        output_path (str): Parquet or Arrow file
+        lat_field (str): Latitude column
+        lon_field (str): Longitude column
+        precision (int): Precision level (1-10)
+        field_name (str): String code column (None to skip it)
+        packed_field (str): Packed integer code column, if any
+        packed_format (str): 'uint64' or 'dictionary'
+        batch_size (int): Rows per batch
+        on_batch (callable): Called as on_batch(batch, rows_done, total_rows)
+            with each encoded batch (total_rows is None for Arrow input);
+            returning False cancels the run
+            
+    Returns:
+        dict: 'rows', 'success', 'errors', 'canceled', 'seconds' and
+        'rows_per_second'
+        
+    Raises:
+        ValueError: If pyarrow is missing, a format is unknown or a column
+        is missing
+    """
+    pyarrow = import_pyarrow()
+    input_format = columnar_format(input_path)
+    output_format = columnar_format(output_path)
+    if input_format is None or output_format is None:
+        raise ValueError('Columnar files must end in .parquet, .pq, .arrow, .feather or .ipc')
+    
+    if input_format == 'parquet':
+        total = pyarrow.parquet.ParquetFile(input_path).metadata.num_rows
+    else:
+        total = None
+    
+    started = time.perf_counter()
+    rows = 0
+    errors = 0
+    canceled = False
+    
+    writer = ColumnarWriter(output_path, output_format)
+    try:
+        for batch in iter_batches(input_path, input_format, batch_size):
+            encoded, invalid = encode_batch(
+                batch, lat_field, lon_field, precision, field_name, packed_field, packed_format
+            )
+            writer.write_batch(encoded)
+            rows += batch.num_rows
+            errors += invalid
+            
+            if on_batch is not None and on_batch(encoded, rows, total) is False:
+                canceled = True
+                break
+    finally:
+        writer.close()
+    
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'success': rows - errors,
+        'errors': errors,
+        'canceled': canceled,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0
+    }
@@ -18,6 +18,10 @@ BOUNDS = {
     'maxLon': 99.5
 }
 
+# Fixed-point grid: at the finest level each axis is split into 4^10 steps
+GRID_LEVELS = 10
+GRID_SIZE = 4 ** GRID_LEVELS
+
 # Precision levels and their approximate cell sizes
 PRECISION_INFO = {
     1: {'name': 'Level 1', 'cell_size_km': 900, 'accuracy': '~900 km'},
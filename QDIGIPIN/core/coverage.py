@@ -0,0 +1,111 @@
+"""
+Exact enumeration of the DIGIPIN cells covering an area
+Cells are found from integer row/column ranges on the DIGIPIN grid
+"""
+
+from .constants import BOUNDS, GRID_LEVELS
+from .digipin_engine import DigipinGrid, DigipinCell
+
+
+def _check_precision(precision):
+    """Raise ValueError for precision outside 1-10"""
+    if precision < 1 or precision > GRID_LEVELS:
+        raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+
+
+class DigipinCoverage:
+    """Find the cells that cover an extent"""
+    
+    @staticmethod
+    def extent_ranges(min_lat, min_lon, max_lat, max_lon, precision):
+        """
+        Grid row and column ranges of the cells intersecting an extent
+        
+        The extent is clipped to the DIGIPIN bounds. Its edges are quantized
+        exactly as DigipinEncoder.encode quantizes points, so the cells are
+        precisely those that encode some point of the extent.
+        
+        Args:
+            min_lat (float): Southern edge
+            min_lon (float): Western edge
+            max_lat (float): Northern edge
+            max_lon (float): Eastern edge
+            precision (int): Precision level (1-10)
+            
+        Returns:
+            tuple: (y_min, y_max, x_min, x_max) inclusive, or None if the
+            extent lies outside the DIGIPIN bounds
+            
+        Raises:
+            ValueError: If precision is out of range
+        """
+        _check_precision(precision)
+        
+        min_lat = max(min_lat, BOUNDS['minLat'])
+        max_lat = min(max_lat, BOUNDS['maxLat'])
+        min_lon = max(min_lon, BOUNDS['minLon'])
+        max_lon = min(max_lon, BOUNDS['maxLon'])
+        if min_lat > max_lat or min_lon > max_lon:
+            return None
+        
+        shift = 2 * (GRID_LEVELS - precision)
+        y_min, x_min = DigipinGrid.quantize(min_lat, min_lon)
+        y_max, x_max = DigipinGrid.quantize(max_lat, max_lon)
+        return y_min >> shift, y_max >> shift, x_min >> shift, x_max >> shift
+    
+    @staticmethod
+    def extent_count(min_lat, min_lon, max_lat, max_lon, precision):
+        """
+        Exact number of cells intersecting an extent
+        
+        Returns:
+            int: Cell count (0 outside the DIGIPIN bounds)
+        """
+        ranges = DigipinCoverage.extent_ranges(min_lat, min_lon, max_lat, max_lon, precision)
+        if ranges is None:
+            return 0
+        y_min, y_max, x_min, x_max = ranges
+        return (y_max - y_min + 1) * (x_max - x_min + 1)
+    
+    @staticmethod
+    def extent_cells(min_lat, min_lon, max_lat, max_lon, precision):
+        """
+        Generate every cell intersecting an extent
+        
+        Cells are generated row by row from the south, west to east, without
+        building the full set in memory.
+        
+        Args:
+            min_lat (float): Southern edge
+            min_lon (float): Western edge
+            max_lat (float): Northern edge
+            max_lon (float): Eastern edge
+            precision (int): Precision level (1-10)
+            
+        Yields:
+            DigipinCell: Cells in deterministic order
+        """
+        ranges = DigipinCoverage.extent_ranges(min_lat, min_lon, max_lat, max_lon, precision)
+        if ranges is None:
+            return
+        y_min, y_max, x_min, x_max = ranges
+        for y in range(y_min, y_max + 1):
+            for x in range(x_min, x_max + 1):
+                yield DigipinCell(precision, y, x)
+    
+    @staticmethod
+    def extent_codes(min_lat, min_lon, max_lat, max_lon, precision):
+        """
+        Generate the packed codes of every cell intersecting an extent
+        
+        Yields:
+            int: Packed codes, in the same order as extent_cells
+        """
+        ranges = DigipinCoverage.extent_ranges(min_lat, min_lon, max_lat, max_lon, precision)
+        if ranges is None:
+            return
+        y_min, y_max, x_min, x_max = ranges
+        to_packed = DigipinGrid.to_packed
+        for y in range(y_min, y_max + 1):
+            for x in range(x_min, x_max + 1):
+                yield to_packed(y, x, precision)
@@ -3,7 +3,281 @@ DIGIPIN Encoder and Decoder Engine
 Core functionality for encoding coordinates to DIGIPIN and decoding back
 """
 
-from .constants import DIGIPIN_GRID, BOUNDS, VALID_CHARS
+import math
+
+from .constants import DIGIPIN_GRID, BOUNDS, VALID_CHARS, GRID_LEVELS, GRID_SIZE
+from .packed import PackedDigipin, _hyphenate
+
+_LAT_SPAN = BOUNDS['maxLat'] - BOUNDS['minLat']
+_LON_SPAN = BOUNDS['maxLon'] - BOUNDS['minLon']
+
+# One level, keyed by (y digit << 2 | x digit); y digits count rows from the
+# south, so the grid row is 3 - y digit
+_LEVEL_CHARS = [DIGIPIN_GRID[3 - (key >> 2)][key & 3] for key in range(16)]
+_LEVEL_NIBBLES = [(3 - (key >> 2)) * 4 + (key & 3) for key in range(16)]
+
+# Two levels per lookup, keyed by (y digit pair << 4 | x digit pair)
+_PAIR_KEYS = [
+    (((key >> 6) & 3) << 2 | ((key >> 2) & 3), ((key >> 4) & 3) << 2 | (key & 3))
+    for key in range(256)
+]
+_PAIR_CHARS = [_LEVEL_CHARS[high] + _LEVEL_CHARS[low] for high, low in _PAIR_KEYS]
+_PAIR_NIBBLES = [_LEVEL_NIBBLES[high] << 4 | _LEVEL_NIBBLES[low] for high, low in _PAIR_KEYS]
+
+# Reverse lookups for decoding: character ordinal -> level key, and
+# character pair (or packed nibble pair) -> (y digit pair, x digit pair)
+_CHAR_LOOKUP = [None] * 128
+for _key, _char in enumerate(_LEVEL_CHARS):
+    _CHAR_LOOKUP[ord(_char)] = _key
+_PAIR_LOOKUP = {_PAIR_CHARS[key]: (key >> 4, key & 15) for key in range(256)}
+_NIBBLE_PAIR_LOOKUP = [None] * 256
+for _key, _nibbles in enumerate(_PAIR_NIBBLES):
+    _NIBBLE_PAIR_LOOKUP[_nibbles] = (_key >> 4, _key & 15)
+
+# Cell size in degrees (lat, lon) for each precision
+_CELL_SIZES = [(_LAT_SPAN / 4 ** level, _LON_SPAN / 4 ** level) for level in range(GRID_LEVELS + 1)]
+
+
+def _grid_to_pin(y, x, precision):
+    """Build the unhyphenated DIGIPIN for grid coordinates at precision"""
+    pin = ''
+    shift = 2 * precision
+    while shift >= 4:
+        shift -= 4
+        pin += _PAIR_CHARS[((y >> shift) & 15) << 4 | ((x >> shift) & 15)]
+    if shift:
+        pin += _LEVEL_CHARS[(y & 3) << 2 | (x & 3)]
+    return pin
+
+
+class DigipinGrid:
+    """
+    Fixed-point integer grid underlying DIGIPIN cells
+    
+    At precision p each axis of BOUNDS is split into 4^p steps and a cell is
+    addressed by integer (y, x): y counts rows from the south, x columns from
+    the west. Coordinates are quantized once at the finest level; every
+    coarser cell is found by shifting, so all levels agree on boundaries.
+    """
+    
+    @staticmethod
+    def quantize(lat, lon):
+        """
+        Quantize a coordinate to finest-level grid coordinates
+        
+        Args:
+            lat (float): Latitude within BOUNDS
+            lon (float): Longitude within BOUNDS
+            
+        Returns:
+            tuple: (y, x) at precision 10
+        """
+        y = int((lat - BOUNDS['minLat']) * GRID_SIZE / _LAT_SPAN)
+        x = int((lon - BOUNDS['minLon']) * GRID_SIZE / _LON_SPAN)
+        
+        # The northern and eastern edges belong to the last row/column
+        return min(y, GRID_SIZE - 1), min(x, GRID_SIZE - 1)
+    
+    @staticmethod
+    def to_packed(y, x, precision):
+        """
+        Convert grid coordinates at a precision to a packed code
+        
+        Args:
+            y (int): Row from the south at this precision
+            x (int): Column from the west at this precision
+            precision (int): Precision level (1-10)
+            
+        Returns:
+            int: Packed code (see core.packed)
+        """
+        digits = 0
+        shift = 2 * precision
+        while shift >= 4:
+            shift -= 4
+            digits = (digits << 8) | _PAIR_NIBBLES[((y >> shift) & 15) << 4 | ((x >> shift) & 15)]
+        if shift:
+            digits = (digits << 4) | _LEVEL_NIBBLES[(y & 3) << 2 | (x & 3)]
+        return (digits << 4 * (GRID_LEVELS + 1 - precision)) | precision
+    
+    @staticmethod
+    def to_digipin(y, x, precision):
+        """
+        Convert grid coordinates at a precision to a DIGIPIN string
+        
+        Returns:
+            str: DIGIPIN code, hyphenated as DigipinEncoder.encode returns it
+        """
+        return _hyphenate(_grid_to_pin(y, x, precision))
+    
+    @staticmethod
+    def from_packed(code):
+        """
+        Convert a packed code to grid coordinates at its own precision
+        
+        Returns:
+            tuple: (precision, y, x)
+        """
+        precision = code & 15
+        digits = code >> 4 * (GRID_LEVELS + 1 - precision)
+        y = x = 0
+        shift = 4 * precision
+        while shift >= 8:
+            shift -= 8
+            pair_y, pair_x = _NIBBLE_PAIR_LOOKUP[(digits >> shift) & 255]
+            y = (y << 4) | pair_y
+            x = (x << 4) | pair_x
+        if shift:
+            nibble = digits & 15
+            y = (y << 2) | (3 - (nibble >> 2))
+            x = (x << 2) | (nibble & 3)
+        return precision, y, x
+    
+    @staticmethod
+    def cell_size(precision):
+        """
+        Cell size in degrees at a precision
+        
+        Returns:
+            tuple: (lat_size, lon_size)
+        """
+        return _CELL_SIZES[precision]
+    
+    @staticmethod
+    def cell_bounds(y, x, precision):
+        """
+        Bounds of the cell at grid coordinates (y, x)
+        
+        Edges are computed directly from the integer coordinates, so cells
+        sharing an edge report the same value at every level.
+        
+        Returns:
+            tuple: (min_lat, min_lon, max_lat, max_lon)
+        """
+        lat_size, lon_size = _CELL_SIZES[precision]
+        return (
+            BOUNDS['minLat'] + y * lat_size,
+            BOUNDS['minLon'] + x * lon_size,
+            BOUNDS['minLat'] + (y + 1) * lat_size,
+            BOUNDS['minLon'] + (x + 1) * lon_size
+        )
+    
+    @staticmethod
+    def cell_center(y, x, precision):
+        """
+        Center of the cell at grid coordinates (y, x)
+        
+        Returns:
+            tuple: (lat, lon)
+        """
+        lat_size, lon_size = _CELL_SIZES[precision]
+        return (
+            BOUNDS['minLat'] + (2 * y + 1) * (lat_size / 2),
+            BOUNDS['minLon'] + (2 * x + 1) * (lon_size / 2)
+        )
+
+
+class DigipinCell:
+    """
+    Decoded DIGIPIN cell
+    
+    Lightweight value object with full-precision center and bounds. Values
+    are only rounded by to_dict(), for display.
+    """
+    
+    __slots__ = (
+        'precision', 'y', 'x', 'latitude', 'longitude',
+        'min_lat', 'min_lon', 'max_lat', 'max_lon'
+    )
+    
+    def __init__(self, precision, y, x):
+        """
+        Args:
+            precision (int): Precision level (1-10)
+            y (int): Row from the south at this precision
+            x (int): Column from the west at this precision
+        """
+        lat_size, lon_size = _CELL_SIZES[precision]
+        self.precision = precision
+        self.y = y
+        self.x = x
+        self.latitude = BOUNDS['minLat'] + (2 * y + 1) * (lat_size / 2)
+        self.longitude = BOUNDS['minLon'] + (2 * x + 1) * (lon_size / 2)
+        self.min_lat = BOUNDS['minLat'] + y * lat_size
+        self.min_lon = BOUNDS['minLon'] + x * lon_size
+        self.max_lat = BOUNDS['minLat'] + (y + 1) * lat_size
+        self.max_lon = BOUNDS['minLon'] + (x + 1) * lon_size
+    
+    @property
+    def code(self):
+        """Packed integer code (see core.packed)"""
+        return DigipinGrid.to_packed(self.y, self.x, self.precision)
+    
+    @property
+    def digipin(self):
+        """Hyphenated DIGIPIN string, as DigipinEncoder.encode returns it"""
+        return _hyphenate(_grid_to_pin(self.y, self.x, self.precision))
+    
+    @property
+    def center(self):
+        """Center as (lat, lon)"""
+        return self.latitude, self.longitude
+    
+    @property
+    def bounds(self):
+        """Bounds as (min_lat, min_lon, max_lat, max_lon)"""
+        return self.min_lat, self.min_lon, self.max_lat, self.max_lon
+    
+    @property
+    def area_km2(self):
+        """Approximate cell area in km²"""
+        # 1 degree latitude ≈ 111 km, 1 degree longitude ≈ 111 * cos(latitude) km
+        lat_km = (self.max_lat - self.min_lat) * 111
+        lon_km = (self.max_lon - self.min_lon) * 111 * math.cos(math.radians(self.latitude))
+        return lat_km * lon_km
+    
+    @property
+    def polygon(self):
+        """Closed exterior ring as a list of (lon, lat) tuples"""
+        return [
+            (self.min_lon, self.min_lat),
+            (self.max_lon, self.min_lat),
+            (self.max_lon, self.max_lat),
+            (self.min_lon, self.max_lat),
+            (self.min_lon, self.min_lat)
+        ]
+    
+    def to_dict(self, decimals=6):
+        """
+        Format as the dictionary returned by DigipinDecoder.decode
+        
+        Args:
+            decimals (int): Decimal places to round to
+            
+        Returns:
+            dict: Dictionary with 'latitude', 'longitude', 'bounds'
+        """
+        return {
+            'latitude': round(self.latitude, decimals),
+            'longitude': round(self.longitude, decimals),
+            'bounds': {
+                'minLat': round(self.min_lat, decimals),
+                'maxLat': round(self.max_lat, decimals),
+                'minLon': round(self.min_lon, decimals),
+                'maxLon': round(self.max_lon, decimals)
+            }
+        }
+    
+    def __eq__(self, other):
+        if not isinstance(other, DigipinCell):
+            return NotImplemented
+        return (self.precision, self.y, self.x) == (other.precision, other.y, other.x)
+    
+    def __hash__(self):
+        return hash((self.precision, self.y, self.x))
+    
+    def __repr__(self):
+        return f'DigipinCell({self.digipin!r})'
 
 
 class DigipinEncoder:
@@ -25,6 +299,60 @@ class DigipinEncoder:
         Raises:
             ValueError: If coordinates are out of range
         """
+        y, x = DigipinEncoder._grid_position(lat, lon, precision)
+        return _hyphenate(_grid_to_pin(y, x, precision))
+    
+    @staticmethod
+    def encode_multi(lat, lon, precisions):
+        """
+        Encode a coordinate pair at several precisions in one pass
+        
+        The coordinate is encoded once at the finest requested precision and
+        every coarser code is derived by prefix truncation.
+        
+        Args:
+            lat (float): Latitude
+            lon (float): Longitude
+            precisions (iterable): Precision levels (1-10)
+            
+        Returns:
+            dict: precision -> DIGIPIN code, identical to encode() at each level
+            
+        Raises:
+            ValueError: If coordinates or any precision are out of range
+        """
+        levels = sorted(set(precisions))
+        if not levels:
+            return {}
+        if levels[0] < 1:
+            raise ValueError(f'Precision must be between 1 and 10, got {levels[0]}')
+        
+        y, x = DigipinEncoder._grid_position(lat, lon, levels[-1])
+        pin = _grid_to_pin(y, x, levels[-1])
+        return {level: _hyphenate(pin[:level]) for level in levels}
+    
+    @staticmethod
+    def encode_packed(lat, lon, precision=10):
+        """
+        Encode a coordinate pair to a packed integer DIGIPIN
+        
+        Args:
+            lat (float): Latitude
+            lon (float): Longitude
+            precision (int): Precision level (1-10)
+            
+        Returns:
+            int: Packed code (see core.packed)
+            
+        Raises:
+            ValueError: If coordinates are out of range
+        """
+        y, x = DigipinEncoder._grid_position(lat, lon, precision)
+        return DigipinGrid.to_packed(y, x, precision)
+    
+    @staticmethod
+    def _grid_position(lat, lon, precision):
+        """Validate inputs and return the grid coordinates at precision"""
         if lat < BOUNDS['minLat'] or lat > BOUNDS['maxLat']:
             raise ValueError(f'Latitude {lat} out of range [{BOUNDS["minLat"]}, {BOUNDS["maxLat"]}]')
         if lon < BOUNDS['minLon'] or lon > BOUNDS['maxLon']:
@@ -33,39 +361,9 @@ class DigipinEncoder:
         if precision < 1 or precision > 10:
             raise ValueError(f'Precision must be between 1 and 10, got {precision}')
         
-        min_lat = BOUNDS['minLat']
-        max_lat = BOUNDS['maxLat']
-        min_lon = BOUNDS['minLon']
-        max_lon = BOUNDS['maxLon']
-        
-        digipin = ''
-        
-        for level in range(1, precision + 1):
-            lat_div = (max_lat - min_lat) / 4
-            lon_div = (max_lon - min_lon) / 4
-            
-            # REVERSED row logic (to match original)
-            row = 3 - int((lat - min_lat) / lat_div)
-            col = int((lon - min_lon) / lon_div)
-            
-            # Clamp to valid range
-            row = max(0, min(row, 3))
-            col = max(0, min(col, 3))
-            
-            digipin += DIGIPIN_GRID[row][col]
-            
-            # Add hyphens at positions 3 and 6
-            if level == 3 or level == 6:
-                digipin += '-'
-            
-            # Update bounds (reverse logic for row)
-            max_lat = min_lat + lat_div * (4 - row)
-            min_lat = min_lat + lat_div * (3 - row)
-            
-            min_lon = min_lon + lon_div * col
-            max_lon = min_lon + lon_div
-        
-        return digipin
+        y, x = DigipinGrid.quantize(lat, lon)
+        shift = 2 * (GRID_LEVELS - precision)
+        return y >> shift, x >> shift
     
     @staticmethod
     def encode_batch(coordinates, precision=10):
@@ -87,6 +385,22 @@ class DigipinEncoder:
             except ValueError as e:
                 results.append(None)
         return results
+    
+    @staticmethod
+    def encode_array(lats, lons, precision=10):
+        """
+        Encode latitude/longitude arrays in whole-array operations
+        
+        Args:
+            lats (array-like): Latitudes
+            lons (array-like): Longitudes
+            precision (int): Precision level (1-10)
+        
+        Returns:
+            tuple: (codes, valid) NumPy arrays, see VectorizedEncoder.encode
+        """
+        from .vectorized import VectorizedEncoder
+        return VectorizedEncoder.encode(lats, lons, precision)
 
 
 class DigipinDecoder:
@@ -106,66 +420,63 @@ class DigipinDecoder:
         Raises:
             ValueError: If DIGIPIN is invalid
         """
-        # Remove hyphens
-        pin = digipin.replace('-', '')
+        return DigipinDecoder.decode_cell(digipin).to_dict()
+    
+    @staticmethod
+    def decode_cell(digipin):
+        """
+        Decode a DIGIPIN to a DigipinCell
         
-        if len(pin) < 1 or len(pin) > 10:
-            raise ValueError(f'Invalid DIGIPIN length: {len(pin)}. Must be 1-10 characters.')
-        
-        # Validate characters
-        for char in pin:
-            if char not in VALID_CHARS:
-                raise ValueError(f'Invalid character in DIGIPIN: {char}')
-        
-        min_lat = BOUNDS['minLat']
-        max_lat = BOUNDS['maxLat']
-        min_lon = BOUNDS['minLon']
-        max_lon = BOUNDS['maxLon']
-        
-        for i, char in enumerate(pin):
-            # Locate character in DIGIPIN grid
-            found = False
-            ri, ci = -1, -1
-            
-            for r in range(4):
-                for c in range(4):
-                    if DIGIPIN_GRID[r][c] == char:
-                        ri, ci = r, c
-                        found = True
-                        break
-                if found:
-                    break
-            
-            if not found:
-                raise ValueError(f'Invalid character in DIGIPIN: {char}')
-            
-            lat_div = (max_lat - min_lat) / 4
-            lon_div = (max_lon - min_lon) / 4
+        Args:
+            digipin (str): DIGIPIN code (with or without hyphens)
             
-            lat1 = max_lat - lat_div * (ri + 1)
-            lat2 = max_lat - lat_div * ri
-            lon1 = min_lon + lon_div * ci
-            lon2 = min_lon + lon_div * (ci + 1)
+        Returns:
+            DigipinCell: Cell with full-precision center and bounds
             
-            # Update bounding box for next level
-            min_lat = lat1
-            max_lat = lat2
-            min_lon = lon1
-            max_lon = lon2
+        Raises:
+            ValueError: If DIGIPIN is invalid
+        """
+        # Remove hyphens
+        pin = digipin.replace('-', '')
+        precision = len(pin)
         
-        center_lat = (min_lat + max_lat) / 2
-        center_lon = (min_lon + max_lon) / 2
+        if precision < 1 or precision > 10:
+            raise ValueError(f'Invalid DIGIPIN length: {precision}. Must be 1-10 characters.')
         
-        return {
-            'latitude': round(center_lat, 6),
-            'longitude': round(center_lon, 6),
-            'bounds': {
-                'minLat': round(min_lat, 6),
-                'maxLat': round(max_lat, 6),
-                'minLon': round(min_lon, 6),
-                'maxLon': round(max_lon, 6)
-            }
-        }
+        # Resolve two levels per lookup; unknown characters fail the lookup
+        y = x = 0
+        try:
+            for i in range(0, precision - 1, 2):
+                pair_y, pair_x = _PAIR_LOOKUP[pin[i:i + 2]]
+                y = (y << 4) | pair_y
+                x = (x << 4) | pair_x
+            if precision & 1:
+                key = _CHAR_LOOKUP[ord(pin[-1])]
+                y = (y << 2) | (key >> 2)
+                x = (x << 2) | (key & 3)
+        except (KeyError, IndexError, TypeError):
+            invalid = next(char for char in pin if char not in VALID_CHARS)
+            raise ValueError(f'Invalid character in DIGIPIN: {invalid}') from None
+        
+        return DigipinCell(precision, y, x)
+    
+    @staticmethod
+    def decode_packed(code):
+        """
+        Decode a packed integer DIGIPIN to a DigipinCell
+        
+        Args:
+            code (int): Packed code (see core.packed)
+            
+        Returns:
+            DigipinCell: Cell with full-precision center and bounds
+            
+        Raises:
+            ValueError: If the packed code is invalid
+        """
+        if not PackedDigipin.is_valid(code):
+            raise ValueError(f'Invalid packed DIGIPIN: {code}')
+        return DigipinCell(*DigipinGrid.from_packed(code))
     
     @staticmethod
     def decode_batch(digipins):
@@ -187,6 +498,21 @@ class DigipinDecoder:
                 results.append(None)
         return results
 
+    @staticmethod
+    def decode_array(digipins):
+        """
+        Decode an array of DIGIPIN codes in whole-array operations
+        
+        Args:
+            digipins (array-like): DIGIPIN codes
+        
+        Returns:
+            dict: Center, bounds, precision and validity arrays,
+            see VectorizedDecoder.decode
+        """
+        from .vectorized import VectorizedDecoder
+        return VectorizedDecoder.decode(digipins)
+
 
 class DigipinValidator:
     """Validate DIGIPIN codes and coordinates"""
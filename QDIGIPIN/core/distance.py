@@ -0,0 +1,345 @@
+"""
+Blockwise great-circle and ellipsoidal distance matrices for NumPy arrays
+Pairs are computed one tile at a time, so memory is bounded by the tile size rather than n²
+"""
+
+import numpy as np
+
+# Mean Earth radius (IUGG) for haversine distances
+EARTH_RADIUS_KM = 6371.0088
+
+# WGS84 ellipsoid for Vincenty distances
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+METHOD_HAVERSINE = 'haversine'
+METHOD_VINCENTY = 'vincenty'
+METHODS = (METHOD_HAVERSINE, METHOD_VINCENTY)
+
+# Rows and columns per tile: a 2048 x 2048 tile needs ~32 MB per float64 temporary
+DEFAULT_TILE_SIZE = 2048
+
+
+def _coordinates(lats, lons):
+    """Float64 latitude and longitude arrays of equal length"""
+    lat = np.asarray(lats, dtype=np.float64).ravel()
+    lon = np.asarray(lons, dtype=np.float64).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError(f'Latitude and longitude arrays differ in length: {lat.size} != {lon.size}')
+    return lat, lon
+
+
+def _points(lats, lons):
+    """Coordinates with the radians and cosines every tile reuses"""
+    lat, lon = _coordinates(lats, lons)
+    lat_radians = np.radians(lat)
+    return lat, lon, lat_radians, np.radians(lon), np.cos(lat_radians)
+
+
+def _take(points, rows):
+    """Slice of a _points tuple"""
+    return tuple(values[rows] for values in points)
+
+
+def _block(a, b, method):
+    """Distances between two _points tuples as a float64 (len(a), len(b)) array"""
+    if method == METHOD_VINCENTY:
+        return vincenty_km(a[0][:, None], a[1][:, None], b[0][None, :], b[1][None, :])
+    
+    # Haversine with the per-point cosines hoisted out of the pair loop
+    h = np.sin((b[2][None, :] - a[2][:, None]) / 2)
+    h *= h
+    s = np.sin((b[3][None, :] - a[3][:, None]) / 2)
+    s *= s
+    s *= a[4][:, None]
+    s *= b[4][None, :]
+    h += s
+    np.minimum(h, 1.0, out=h)
+    np.sqrt(h, out=h)
+    np.arcsin(h, out=h)
+    h *= 2 * EARTH_RADIUS_KM
+    return h
+
+
+def _check_method(method):
+    """Raise ValueError for an unknown distance method"""
+    if method not in METHODS:
+        raise ValueError(f'Invalid distance method: {method}. Must be one of {", ".join(METHODS)}')
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance on a sphere of radius EARTH_RADIUS_KM
+    
+    Arguments are in degrees and broadcast against each other.
+    
+    Returns:
+        numpy.ndarray: Distances in km
+    """
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    h = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin(np.radians(np.subtract(lon2, lon1)) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def vincenty_km(lat1, lon1, lat2, lon2, iterations=100, tolerance=1e-12):
+    """
+    Geodesic distance on the WGS84 ellipsoid (Vincenty's inverse formula)
+    
+    Arguments are in degrees and broadcast against each other. The few
+    nearly antipodal pairs where the iteration does not converge fall back
+    to the haversine distance.
+    
+    Returns:
+        numpy.ndarray: Distances in km
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        np.asarray(lat1, dtype=np.float64), np.asarray(lon1, dtype=np.float64),
+        np.asarray(lat2, dtype=np.float64), np.asarray(lon2, dtype=np.float64)
+    )
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(U1), np.cos(U1)
+    sin_u2, cos_u2 = np.sin(U2), np.cos(U2)
+    
+    lam = L
+    converged = np.zeros(L.shape, dtype=bool)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma > 0, cos_u1 * cos_u2 * sin_lam / sin_sigma, 0.0)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # Both points on the equator: cos2_alpha is 0 and the term drops out
+            cos_2sigma_m = np.where(cos2_alpha > 0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha, 0.0)
+            C = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+            previous = lam
+            lam = L + (1 - C) * WGS84_F * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            converged = np.abs(lam - previous) < tolerance
+            if converged.all():
+                break
+    
+    u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+        B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+    ))
+    distance = WGS84_B * A * (sigma - delta_sigma) / 1000
+    
+    if not converged.all():
+        distance = np.where(converged, distance, haversine_km(lat1, lon1, lat2, lon2))
+    return distance
+
+
+class DistanceMatrix:
+    """Pairwise distances between point sets, computed in tiles"""
+    
+    @staticmethod
+    def block(lats_a, lons_a, lats_b, lons_b, method=METHOD_HAVERSINE):
+        """
+        Distances from every point of A to every point of B
+        
+        Args:
+            lats_a, lons_a (array-like): Row points in degrees
+            lats_b, lons_b (array-like): Column points in degrees
+            method (str): 'haversine' or 'vincenty'
+            
+        Returns:
+            numpy.ndarray: float64 array of shape (len(A), len(B)) in km
+        """
+        _check_method(method)
+        return _block(_points(lats_a, lons_a), _points(lats_b, lons_b), method)
+    
+    @staticmethod
+    def tiles(lats, lons, other_lats=None, other_lons=None, method=METHOD_HAVERSINE,
+              tile_size=DEFAULT_TILE_SIZE):
+        """
+        Generate the matrix tile by tile
+        
+        Without a second point set the matrix is symmetric and only tiles
+        on or above the diagonal are generated.
+        
+        Args:
+            lats, lons (array-like): Row points in degrees
+            other_lats, other_lons (array-like): Column points (default: the rows)
+            method (str): 'haversine' or 'vincenty'
+            tile_size (int): Rows and columns per tile
+            
+        Yields:
+            tuple: (row_start, column_start, float32 tile)
+        """
+        _check_method(method)
+        points = _points(lats, lons)
+        symmetric = other_lats is None
+        other = points if symmetric else _points(other_lats, other_lons)
+        
+        for row in range(0, points[0].size, tile_size):
+            rows = _take(points, slice(row, row + tile_size))
+            for column in range(row if symmetric else 0, other[0].size, tile_size):
+                tile = _block(rows, _take(other, slice(column, column + tile_size)), method)
+                yield row, column, tile.astype(np.float32)
+    
+    @staticmethod
+    def dense(lats, lons, other_lats=None, other_lons=None, method=METHOD_HAVERSINE,
+              tile_size=DEFAULT_TILE_SIZE, out=None):
+        """
+        Full distance matrix as a float32 array
+        
+        For matrices larger than memory, pass a disk-backed array as out,
+        e.g. numpy.lib.format.open_memmap(path, 'w+', numpy.float32, shape).
+        
+        Args:
+            out (numpy.ndarray): Array to fill (default: a new array)
+            
+        Returns:
+            numpy.ndarray: float32 distances in km, shape (len(rows), len(columns))
+        """
+        n = np.size(lats)
+        m = n if other_lats is None else np.size(other_lats)
+        if out is None:
+            out = np.empty((n, m), dtype=np.float32)
+        elif out.shape != (n, m):
+            raise ValueError(f'Output array has shape {out.shape}, expected {(n, m)}')
+        
+        for row, column, tile in DistanceMatrix.tiles(lats, lons, other_lats, other_lons, method, tile_size):
+            out[row:row + tile.shape[0], column:column + tile.shape[1]] = tile
+            if other_lats is None and column != row:
+                out[column:column + tile.shape[1], row:row + tile.shape[0]] = tile.T
+        return out
+    
+    @staticmethod
+    def condensed(lats, lons, path=None, method=METHOD_HAVERSINE, tile_size=DEFAULT_TILE_SIZE, progress=None):
+        """
+        Upper triangle of the symmetric matrix, row by row
+        
+        The layout matches scipy.spatial.distance.pdist: d(0, 1), d(0, 2),
+        ..., d(0, n-1), d(1, 2), ... (see condensed_index). Rows are
+        computed in strips of about tile_size² pairs and written as they
+        finish, so a 50,000-point matrix streams to disk in bounded memory.
+        
+        Args:
+            lats, lons (array-like): Points in degrees
+            path (str): File for the raw float32 values (default: return an array)
+            method (str): 'haversine' or 'vincenty'
+            tile_size (int): Tile edge; strips hold about tile_size² pairs
+            progress (callable): Called as progress(rows_done, rows); returning
+                False stops early
+                
+        Returns:
+            numpy.ndarray or int: The condensed array, or with a path the
+            number of values written
+        """
+        _check_method(method)
+        points = _points(lats, lons)
+        n = points[0].size
+        strip = max(1, tile_size * tile_size // max(n, 1))
+        
+        target = open(path, 'wb') if path else None
+        result = None if target else np.empty(n * (n - 1) // 2, dtype=np.float32)
+        written = 0
+        try:
+            for row in range(0, n, strip):
+                rows = slice(row, min(row + strip, n))
+                block = _block(_take(points, rows), _take(points, slice(row, None)), method)
+                # Row i keeps its columns i+1..n-1
+                values = block.astype(np.float32)[np.triu_indices(block.shape[0], 1, block.shape[1])]
+                if target is not None:
+                    values.tofile(target)
+                else:
+                    result[written:written + values.size] = values
+                written += values.size
+                
+                if progress is not None and progress(rows.stop, n) is False:
+                    break
+        finally:
+            if target is not None:
+                target.close()
+        return written if target is not None else result
+    
+    @staticmethod
+    def nearest(lats, lons, k, other_lats=None, other_lons=None, method=METHOD_HAVERSINE,
+                tile_size=DEFAULT_TILE_SIZE):
+        """
+        The k nearest column points of every row point
+        
+        Keeps a running top-k per row across column tiles, so memory is
+        one tile plus the n x k result whatever the number of columns.
+        
+        Args:
+            lats, lons (array-like): Query points in degrees
+            k (int): Neighbours per point
+            other_lats, other_lons (array-like): Candidate points (default:
+                the query points, excluding each point itself)
+            method (str): 'haversine' or 'vincenty'
+            tile_size (int): Rows and columns per tile
+            
+        Returns:
+            tuple: (indices, distances) arrays of shape (n, k), nearest
+            first; int64 column indices (-1 where there are fewer than k
+            candidates) and float32 km (inf there)
+        """
+        _check_method(method)
+        if k < 1:
+            raise ValueError(f'k must be at least 1, got {k}')
+        points = _points(lats, lons)
+        symmetric = other_lats is None
+        other = points if symmetric else _points(other_lats, other_lons)
+        
+        n = points[0].size
+        indices = np.full((n, k), -1, dtype=np.int64)
+        distances = np.full((n, k), np.inf, dtype=np.float32)
+        for row in range(0, n, tile_size):
+            rows = slice(row, row + tile_size)
+            row_points = _take(points, rows)
+            best_index = indices[rows]
+            best_distance = distances[rows]
+            for column in range(0, other[0].size, tile_size):
+                tile = _block(row_points, _take(other, slice(column, column + tile_size)), method)
+                tile = tile.astype(np.float32)
+                candidates = np.arange(column, column + tile.shape[1])
+                if symmetric:
+                    tile[np.arange(row, row + tile.shape[0])[:, None] == candidates[None, :]] = np.inf
+                
+                # Reduce the tile to its own top k before merging
+                tile_index = np.broadcast_to(candidates, tile.shape)
+                if tile.shape[1] > k:
+                    keep = np.argpartition(tile, k - 1, axis=1)[:, :k]
+                    tile = np.take_along_axis(tile, keep, axis=1)
+                    tile_index = candidates[keep]
+                
+                merged_distance = np.concatenate([best_distance, tile], axis=1)
+                merged_index = np.concatenate([best_index, tile_index], axis=1)
+                if merged_distance.shape[1] > k:
+                    keep = np.argpartition(merged_distance, k - 1, axis=1)[:, :k]
+                    merged_distance = np.take_along_axis(merged_distance, keep, axis=1)
+                    merged_index = np.take_along_axis(merged_index, keep, axis=1)
+                best_distance[:] = merged_distance
+                best_index[:] = merged_index
+            
+            order = np.argsort(best_distance, axis=1, kind='stable')
+            best_distance[:] = np.take_along_axis(best_distance, order, axis=1)
+            best_index[:] = np.take_along_axis(best_index, order, axis=1)
+        
+        indices[np.isinf(distances)] = -1
+        return indices, distances
+
+
+def condensed_index(i, j, n):
+    """
+    Position of the pair (i, j), i != j, in a condensed matrix of n points
+    
+    Returns:
+        int: Index into DistanceMatrix.condensed output
+    """
+    if i > j:
+        i, j = j, i
+    return n * i - i * (i + 1) // 2 + j - i - 1
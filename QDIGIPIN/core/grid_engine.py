@@ -0,0 +1,209 @@
+"""
+Streaming DIGIPIN grid engine
+One source of grid cell records for the dialog's memory layer, the
+Processing feature sink and file writers
+"""
+
+import math
+import time
+from collections import namedtuple
+from itertools import islice
+
+from .constants import BOUNDS
+from .coverage import DigipinCoverage
+from .digipin_engine import DigipinGrid
+
+# Attribute names of a grid cell, in the order of GridRecord.attributes()
+GRID_FIELDS = ('DIGIPIN', 'CenterLat', 'CenterLon', 'Precision', 'Area_km2')
+
+# Records handed to consumers at a time
+DEFAULT_BATCH_SIZE = 5000
+
+
+class GridRecord(namedtuple('GridRecord', [
+        'digipin', 'latitude', 'longitude', 'precision', 'area_km2',
+        'min_lat', 'min_lon', 'max_lat', 'max_lon', 'y', 'x'])):
+    """
+    One grid cell: its GRID_FIELDS values followed by its bounds and grid position
+    
+    Values are identical to the corresponding DigipinCell properties.
+    """
+    
+    __slots__ = ()
+    
+    def attributes(self):
+        """Values of GRID_FIELDS as a list"""
+        return list(self[:5])
+    
+    @property
+    def code(self):
+        """Packed integer code (see core.packed)"""
+        return DigipinGrid.to_packed(self.y, self.x, self.precision)
+
+
+def _extent_records(y_min, y_max, x_min, x_max, precision):
+    """Records for a block of grid rows and columns, row by row from the south"""
+    lat_size, lon_size = DigipinGrid.cell_size(precision)
+    to_digipin = DigipinGrid.to_digipin
+    
+    # Everything but the code is shared along a column or a row
+    columns = []
+    for x in range(x_min, x_max + 1):
+        min_lon = BOUNDS['minLon'] + x * lon_size
+        max_lon = BOUNDS['minLon'] + (x + 1) * lon_size
+        columns.append((x, BOUNDS['minLon'] + (2 * x + 1) * (lon_size / 2), min_lon, max_lon,
+                        (max_lon - min_lon) * 111))
+    
+    for y in range(y_min, y_max + 1):
+        latitude = BOUNDS['minLat'] + (2 * y + 1) * (lat_size / 2)
+        min_lat = BOUNDS['minLat'] + y * lat_size
+        max_lat = BOUNDS['minLat'] + (y + 1) * lat_size
+        lat_km = (max_lat - min_lat) * 111
+        cos_lat = math.cos(math.radians(latitude))
+        for x, longitude, min_lon, max_lon, lon_km in columns:
+            yield GridRecord(
+                to_digipin(y, x, precision), latitude, longitude, precision,
+                lat_km * (lon_km * cos_lat), min_lat, min_lon, max_lat, max_lon, y, x
+            )
+
+
+def _cell_records(cells):
+    """Records for DigipinCell objects, in their order"""
+    for cell in cells:
+        yield GridRecord(
+            DigipinGrid.to_digipin(cell.y, cell.x, cell.precision), cell.latitude, cell.longitude,
+            cell.precision, cell.area_km2, cell.min_lat, cell.min_lon, cell.max_lat, cell.max_lon,
+            cell.y, cell.x
+        )
+
+
+class GridStream:
+    """
+    Grid cell records generated in batches, in a deterministic order
+    
+    Only one batch is held in memory at a time. After (or while) the stream
+    is consumed, count, seconds and cells_per_second describe the run.
+    """
+    
+    def __init__(self, records, total=None, max_cells=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Use from_extent, from_cells or from_polygons to build a stream
+        
+        Args:
+            records (iterable): GridRecord objects
+            total (int): Number of records, if known, for progress
+            max_cells (int): Stop after this many records (default: no limit)
+            batch_size (int): Records per batch
+        """
+        if max_cells:
+            records = islice(records, max_cells)
+            total = max_cells if total is None else min(total, max_cells)
+        self._records = records
+        self.total = total
+        self.batch_size = batch_size
+        self.count = 0
+        self.seconds = 0.0
+        self.canceled = False
+    
+    @staticmethod
+    def from_extent(min_lat, min_lon, max_lat, max_lon, precision, max_cells=None,
+                    batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Stream every cell intersecting an extent
+        
+        Cells are the same as DigipinCoverage.extent_cells, in the same order:
+        row by row from the south, west to east.
+        
+        Args:
+            min_lat (float): Southern edge
+            min_lon (float): Western edge
+            max_lat (float): Northern edge
+            max_lon (float): Eastern edge
+            precision (int): Precision level (1-10)
+            max_cells (int): Stop after this many cells (default: no limit)
+            batch_size (int): Records per batch
+            
+        Returns:
+            GridStream: The stream
+            
+        Raises:
+            ValueError: If precision is out of range
+        """
+        ranges = DigipinCoverage.extent_ranges(min_lat, min_lon, max_lat, max_lon, precision)
+        if ranges is None:
+            return GridStream(iter(()), 0, max_cells, batch_size)
+        y_min, y_max, x_min, x_max = ranges
+        total = (y_max - y_min + 1) * (x_max - x_min + 1)
+        return GridStream(_extent_records(y_min, y_max, x_min, x_max, precision), total, max_cells, batch_size)
+    
+    @staticmethod
+    def from_cells(cells, total=None, max_cells=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Stream DigipinCell objects (which may mix precisions) in their order"""
+        return GridStream(_cell_records(cells), total, max_cells, batch_size)
+    
+    @staticmethod
+    def from_polygons(features, precision, mode='center', compact=False, max_cells=None,
+                      batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Stream the cells covering features (see DigipinPolyfill.polyfill_features)
+        
+        Args:
+            features (list): One list of polygons per feature, each polygon
+                a list of rings of (lon, lat) points
+            precision (int): Precision level (1-10)
+            mode (str): 'center', 'intersects' or 'contains'
+            compact (bool): Replace complete blocks of cells by their parent
+            max_cells (int): Stop after this many cells (default: no limit)
+            batch_size (int): Records per batch
+            
+        Returns:
+            GridStream: The stream, in packed-code order
+        """
+        from .digipin_engine import DigipinDecoder
+        from .polyfill import DigipinPolyfill
+        
+        cells = (
+            DigipinDecoder.decode_packed(code)
+            for code in DigipinPolyfill.polyfill_features(features, precision, mode, compact)
+        )
+        return GridStream.from_cells(cells, None, max_cells, batch_size)
+    
+    @property
+    def cells_per_second(self):
+        """Records produced per second of wall time so far"""
+        return self.count / self.seconds if self.seconds > 0 else 0.0
+    
+    def batches(self, progress=None):
+        """
+        Generate lists of records
+        
+        The time between batches, spent by the consumer, counts towards
+        seconds, so cells_per_second is the throughput of the whole
+        pipeline.
+        
+        Args:
+            progress (callable): Called as progress(count, total) after each
+                batch is consumed (total may be None); returning False
+                stops the stream and sets canceled
+                
+        Yields:
+            list: GridRecord objects, at most batch_size per batch
+        """
+        started = time.perf_counter() - self.seconds
+        while True:
+            batch = list(islice(self._records, self.batch_size))
+            if not batch:
+                break
+            yield batch
+            
+            self.count += len(batch)
+            self.seconds = time.perf_counter() - started
+            if progress is not None and progress(self.count, self.total) is False:
+                self.canceled = True
+                break
+        self.seconds = time.perf_counter() - started
+    
+    def __iter__(self):
+        """Generate records one by one"""
+        for batch in self.batches():
+            yield from batch
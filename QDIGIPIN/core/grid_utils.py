@@ -3,35 +3,125 @@ Grid generation utilities with optimized approach for high precision levels
 """
 
 from qgis.core import (
-    QgsVectorLayer, QgsFeature, QgsGeometry, QgsField,
-    QgsRectangle, QgsPointXY, QgsProject
+    QgsVectorLayer, QgsFeature, QgsGeometry, QgsField, QgsFields,
+    QgsRectangle
 )
 from qgis.PyQt.QtCore import QVariant
-from ..core.digipin_engine import DigipinEncoder, DigipinDecoder
-from ..core.constants import BOUNDS
+from ..core.coverage import DigipinCoverage
+from ..core.grid_engine import DEFAULT_BATCH_SIZE, GRID_FIELDS, GridStream
 import math
 
+# QVariant type of each of GRID_FIELDS
+GRID_FIELD_TYPES = (QVariant.String, QVariant.Double, QVariant.Double, QVariant.Int, QVariant.Double)
+
 
 class OptimizedGridGenerator:
     """Optimized grid generator that prevents freezing for high precision levels"""
     
     @staticmethod
     def estimate_cell_count(extent, precision):
-        """Estimate number of cells for given extent and precision"""
-        lat_range = extent.yMaximum() - extent.yMinimum()
-        lon_range = extent.xMaximum() - extent.xMinimum()
+        """Exact number of cells intersecting the extent at precision"""
+        return DigipinCoverage.extent_count(
+            extent.yMinimum(), extent.xMinimum(),
+            extent.yMaximum(), extent.xMaximum(),
+            precision
+        )
+    
+    @staticmethod
+    def grid_fields():
+        """QgsFields for GRID_FIELDS (see core.grid_engine)"""
+        fields = QgsFields()
+        for name, field_type in zip(GRID_FIELDS, GRID_FIELD_TYPES):
+            fields.append(QgsField(name, field_type))
+        return fields
+    
+    @staticmethod
+    def create_layer(precision):
+        """
+        Empty memory layer with the grid fields
+        
+        Args:
+            precision: Precision level, used in the layer name
+            
+        Returns:
+            QgsVectorLayer: Polygon layer in EPSG:4326
+        """
+        layer = QgsVectorLayer('Polygon?crs=EPSG:4326', f'DIGIPIN_Grid_L{precision}', 'memory')
+        layer.dataProvider().addAttributes(OptimizedGridGenerator.grid_fields().toList())
+        layer.updateFields()
+        return layer
+    
+    @staticmethod
+    def grid_stream(extent, precision, max_cells=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Stream of the cells intersecting an extent
+        
+        Args:
+            extent: QgsRectangle defining the area
+            precision: Precision level (1-10)
+            max_cells: Maximum cells to generate (default: no limit)
+            batch_size: Records per batch
+            
+        Returns:
+            GridStream: Cells row by row from the south, west to east
+        """
+        return GridStream.from_extent(
+            extent.yMinimum(), extent.xMinimum(),
+            extent.yMaximum(), extent.xMaximum(),
+            precision, max_cells, batch_size
+        )
+    
+    @staticmethod
+    def record_features(records, fields=None):
+        """
+        Polygon features for grid records
         
-        # Approximate cells per degree at each precision level
-        cells_per_degree = 4 ** precision / 36  # Rough estimate
+        Args:
+            records: GridRecord objects (see core.grid_engine)
+            fields: QgsFields for the features, e.g. a Processing sink's
+                (default: none, as for a memory layer provider)
+                
+        Returns:
+            list: QgsFeature objects with the GRID_FIELDS attributes
+        """
+        features = []
+        for record in records:
+            feature = QgsFeature() if fields is None else QgsFeature(fields)
+            feature.setGeometry(QgsGeometry.fromRect(
+                QgsRectangle(record.min_lon, record.min_lat, record.max_lon, record.max_lat)
+            ))
+            feature.setAttributes(record.attributes())
+            features.append(feature)
+        return features
+    
+    @staticmethod
+    def feature_batches(stream, fields=None, progress=None):
+        """
+        Generate grid features in batches
+        
+        At most one batch is held in memory; see GridStream.batches for
+        progress and cancellation.
         
-        estimated_cells = lat_range * lon_range * cells_per_degree
-        return int(estimated_cells)
+        Args:
+            stream: GridStream to consume
+            fields: QgsFields for the features (see record_features)
+            progress: Called as progress(count, total) after each batch;
+                returning False stops
+                
+        Yields:
+            list: QgsFeature objects with the GRID_FIELDS attributes
+        """
+        for records in stream.batches(progress):
+            yield OptimizedGridGenerator.record_features(records, fields)
     
     @staticmethod
     def generate_grid_chunked(extent, precision, progress_callback=None, max_cells=10000):
         """
         Generate grid with chunking to prevent freezing
         
+        Runs in the calling thread; the dialog uses GridGenerationTask
+        (gui.tasks) to run the same batches in the background.
+        
         Args:
             extent: QgsRectangle defining the area
             precision: Precision level (1-10)
@@ -41,123 +131,16 @@ class OptimizedGridGenerator:
         Returns:
             QgsVectorLayer: Generated grid layer
         """
-        # Constrain to India bounds
-        min_lat = max(extent.yMinimum(), BOUNDS['minLat'])
-        max_lat = min(extent.yMaximum(), BOUNDS['maxLat'])
-        min_lon = max(extent.xMinimum(), BOUNDS['minLon'])
-        max_lon = min(extent.xMaximum(), BOUNDS['maxLon'])
-        
-        # Create layer
-        layer = QgsVectorLayer('Polygon?crs=EPSG:4326', f'DIGIPIN_Grid_L{precision}', 'memory')
+        layer = OptimizedGridGenerator.create_layer(precision)
         provider = layer.dataProvider()
         
-        # Add fields
-        provider.addAttributes([
-            QgsField('DIGIPIN', QVariant.String),
-            QgsField('CenterLat', QVariant.Double),
-            QgsField('CenterLon', QVariant.Double),
-            QgsField('Precision', QVariant.Int),
-            QgsField('Area_km2', QVariant.Double)
-        ])
-        layer.updateFields()
+        stream = OptimizedGridGenerator.grid_stream(extent, precision, max_cells, 100)
         
-        # Use adaptive sampling based on precision
-        if precision <= 5:
-            # For low precision, sample more densely
-            sample_points = 50
-        elif precision <= 7:
-            # Medium precision
-            sample_points = 100
-        else:
-            # High precision - use intelligent sampling
-            sample_points = 200
-        
-        lat_step = (max_lat - min_lat) / sample_points
-        lon_step = (max_lon - min_lon) / sample_points
-        
-        # Collect unique DIGIPINs
-        digipins_dict = {}
-        total_samples = sample_points * sample_points
-        processed = 0
-        
-        lat = min_lat
-        while lat <= max_lat:
-            lon = min_lon
-            while lon <= max_lon:
-                try:
-                    digipin = DigipinEncoder.encode(lat, lon, precision)
-                    if digipin not in digipins_dict:
-                        digipins_dict[digipin] = True
-                        
-                        # Safety check
-                        if len(digipins_dict) >= max_cells:
-                            break
-                            
-                except ValueError:
-                    pass
-                
-                lon += lon_step
-                processed += 1
-                
-                if progress_callback and processed % 100 == 0:
-                    progress = int((processed / total_samples) * 50)  # First 50% for sampling
-                    progress_callback(progress)
-            
-            if len(digipins_dict) >= max_cells:
-                break
-            lat += lat_step
-        
-        # Create features in chunks
-        features = []
-        chunk_size = 100
-        total_cells = len(digipins_dict)
+        def progress(count, total):
+            if progress_callback:
+                progress_callback(int(count * 100 / max(total, 1)))
         
-        for idx, digipin in enumerate(digipins_dict.keys()):
-            try:
-                result = DigipinDecoder.decode(digipin)
-                bounds = result['bounds']
-                
-                # Create polygon
-                rect = QgsRectangle(
-                    bounds['minLon'], bounds['minLat'],
-                    bounds['maxLon'], bounds['maxLat']
-                )
-                
-                polygon = QgsGeometry.fromRect(rect)
-                
-                # Calculate area in km²
-                area_km2 = OptimizedGridGenerator.calculate_area_km2(
-                    bounds['minLat'], bounds['maxLat'],
-                    bounds['minLon'], bounds['maxLon']
-                )
-                
-                # Create feature
-                feature = QgsFeature()
-                feature.setGeometry(polygon)
-                feature.setAttributes([
-                    digipin,
-                    result['latitude'],
-                    result['longitude'],
-                    precision,
-                    area_km2
-                ])
-                
-                features.append(feature)
-                
-                # Add features in chunks
-                if len(features) >= chunk_size:
-                    provider.addFeatures(features)
-                    features = []
-                    
-                    if progress_callback:
-                        progress = 50 + int((idx / total_cells) * 50)  # Second 50% for feature creation
-                        progress_callback(progress)
-                        
-            except ValueError:
-                pass
-        
-        # Add remaining features
-        if features:
+        for features in OptimizedGridGenerator.feature_batches(stream, progress=progress):
             provider.addFeatures(features)
         
         layer.updateExtents()
@@ -0,0 +1,264 @@
+"""
+Parent, child and descendant operations on packed DIGIPIN codes
+Every operation is integer arithmetic on the packed layout (see core.packed)
+"""
+
+from .packed import PackedDigipin, MAX_PRECISION, PRECISION_MASK
+
+CHILDREN_PER_CELL = 16
+
+
+def _validate(code):
+    """Return the precision of a packed code, validating it"""
+    if not PackedDigipin.is_valid(code):
+        raise ValueError(f'Invalid packed DIGIPIN: {code}')
+    return code & PRECISION_MASK
+
+
+def _level_shift(level):
+    """Bit position of the nibble holding a level"""
+    return 4 * (MAX_PRECISION + 1 - level)
+
+
+class DigipinHierarchy:
+    """Move up and down the DIGIPIN cell hierarchy"""
+    
+    @staticmethod
+    def parent(code, level=None):
+        """
+        Find the ancestor of a cell at a coarser level
+        
+        Args:
+            code (int): Packed code
+            level (int): Ancestor level (default: one level up)
+            
+        Returns:
+            int: Packed code of the ancestor
+            
+        Raises:
+            ValueError: If the code is invalid or level is not coarser
+        """
+        precision = _validate(code)
+        if level is None:
+            level = precision - 1
+        if level < 1 or level >= precision:
+            raise ValueError(f'Parent level must be between 1 and {precision - 1}, got {level}')
+        return PackedDigipin.truncate(code, level)
+    
+    @staticmethod
+    def children(code):
+        """
+        Find the 16 children of a cell, in packed (grid) order
+        
+        Raises:
+            ValueError: If the code is invalid or already at level 10
+        """
+        precision = _validate(code)
+        if precision == MAX_PRECISION:
+            raise ValueError('Cells at level 10 have no children')
+        return list(DigipinHierarchy.descendant_range(code, precision + 1))
+    
+    @staticmethod
+    def siblings(code):
+        """
+        Find the other cells sharing this cell's parent
+        
+        Returns:
+            list: 15 packed codes (empty for level 1 cells, which have no parent)
+        """
+        precision = _validate(code)
+        if precision == 1:
+            return []
+        parent = PackedDigipin.truncate(code, precision - 1)
+        return [child for child in DigipinHierarchy.children(parent) if child != code]
+    
+    @staticmethod
+    def descendant_range(code, level):
+        """
+        Return the descendants of a cell at a finer level as an integer range
+        
+        The descendants at one level are evenly spaced in packed order, so
+        they form a Python range: it is lazy, supports len() and constant
+        time membership tests, and its start/stop bound an index query.
+        
+        Args:
+            code (int): Packed code
+            level (int): Descendant level, no coarser than the code's own
+            
+        Returns:
+            range: Packed codes of the descendants in sorted order
+            
+        Raises:
+            ValueError: If the code is invalid or level is out of range
+        """
+        precision = _validate(code)
+        if level < precision or level > MAX_PRECISION:
+            raise ValueError(f'Descendant level must be between {precision} and {MAX_PRECISION}, got {level}')
+        
+        step = 1 << _level_shift(level)
+        first = (code & ~PRECISION_MASK) | level
+        count = CHILDREN_PER_CELL ** (level - precision)
+        return range(first, first + count * step, step)
+    
+    @staticmethod
+    def descendants(code, level):
+        """
+        Lazily generate the descendants of a cell at a finer level
+        
+        Args:
+            code (int): Packed code
+            level (int): Descendant level
+            
+        Yields:
+            int: Packed codes in sorted order
+        """
+        yield from DigipinHierarchy.descendant_range(code, level)
+    
+    @staticmethod
+    def common_ancestor(code_a, code_b):
+        """
+        Find the lowest common ancestor of two cells
+        
+        Args:
+            code_a (int): Packed code
+            code_b (int): Packed code
+            
+        Returns:
+            int: Packed code of the finest cell containing both, or None if
+            they differ at level 1
+            
+        Raises:
+            ValueError: If either code is invalid
+        """
+        precision = min(_validate(code_a), _validate(code_b))
+        
+        # Leading nibbles that agree give the shared prefix length
+        difference = (code_a ^ code_b) >> 4
+        level = MAX_PRECISION - (difference.bit_length() + 3) // 4
+        level = min(level, precision)
+        if level < 1:
+            return None
+        return PackedDigipin.truncate(code_a, level)
+    
+    @staticmethod
+    def compact(codes):
+        """
+        Replace every complete set of 16 siblings with their parent
+        
+        Applied recursively, so a fully covered area collapses to the
+        coarsest cells possible. Duplicates and cells lying inside another
+        cell of the set are dropped.
+        
+        Args:
+            codes (iterable): Packed codes, at any mix of precisions
+            
+        Returns:
+            list: Compacted packed codes in sorted order
+            
+        Raises:
+            ValueError: If any code is invalid
+        """
+        # Ancestors sort directly before their descendants and complete
+        # sibling sets are contiguous, so one sorted pass with a stack both
+        # drops covered cells and merges siblings bottom-up
+        cells = []
+        covered_until = -1
+        for code in sorted(set(codes)):
+            precision = _validate(code)
+            if code <= covered_until:
+                continue
+            covered_until = code | ((1 << _level_shift(precision)) - 1)
+            cells.append(code)
+            
+            # The last child closes a sibling set: merge while sets complete
+            while precision > 1 and (code >> _level_shift(precision)) & 15 == 15 and len(cells) >= 16:
+                siblings = cells[-16:]
+                if any(sibling & PRECISION_MASK != precision for sibling in siblings):
+                    break
+                parent = PackedDigipin.truncate(code, precision - 1)
+                if siblings[0] != (parent & ~PRECISION_MASK) | precision:
+                    break
+                del cells[-16:]
+                precision -= 1
+                code = parent
+                cells.append(code)
+        
+        return cells
+    
+    @staticmethod
+    def uncompact(codes, level):
+        """
+        Expand cells to their descendants at one level
+        
+        Args:
+            codes (iterable): Packed codes, none finer than level
+            level (int): Target level
+            
+        Yields:
+            int: Packed codes at level (sorted if the input is sorted)
+            
+        Raises:
+            ValueError: If a code is invalid or finer than level
+        """
+        for code in codes:
+            yield from DigipinHierarchy.descendant_range(code, level)
+    
+    @staticmethod
+    def covers(cells, code):
+        """
+        Check whether a set of cells covers a cell
+        
+        Works on compacted sets: the cell and each of its ancestors is
+        looked up, so the cost is at most 10 set lookups.
+        
+        Args:
+            cells (set): Packed codes, e.g. from compact()
+            code (int): Packed code to test
+            
+        Returns:
+            bool: True if the cell or one of its ancestors is in cells
+        """
+        precision = code & PRECISION_MASK
+        for level in range(1, precision + 1):
+            shift = _level_shift(level)
+            if ((code >> shift) << shift) | level in cells:
+                return True
+        return False
+    
+    @staticmethod
+    def rollup(codes, level):
+        """
+        Map many cells to their ancestors at one level
+        
+        Cells already coarser than the level are returned as None.
+        
+        Args:
+            codes (iterable): Packed codes
+            level (int): Target level
+            
+        Returns:
+            list: Packed ancestor codes (None for invalid or coarser cells)
+        """
+        shift = _level_shift(level)
+        results = []
+        for code in codes:
+            if PackedDigipin.is_valid(code) and code & PRECISION_MASK >= level:
+                results.append(((code >> shift) << shift) | level)
+            else:
+                results.append(None)
+        return results
+    
+    @staticmethod
+    def rollup_array(codes, level):
+        """
+        Map an array of cells to their ancestors at one level with NumPy
+        
+        Args:
+            codes (array-like): Packed codes, all at level or finer
+            level (int): Target level
+            
+        Returns:
+            numpy.ndarray: uint64 packed ancestor codes
+        """
+        from .vectorized import VectorizedGrid
+        return VectorizedGrid.truncate(codes, level)
@@ -0,0 +1,360 @@
+"""
+Prefix-sorted index of DIGIPIN codes
+Entries are kept in packed-code order, so the entries inside any cell form
+one contiguous range found by binary search
+"""
+
+import array
+import operator
+from bisect import bisect_left, bisect_right
+from itertools import count, groupby, islice
+
+from .constants import GRID_LEVELS
+from .coverage import DigipinCoverage
+from .digipin_engine import DigipinEncoder, DigipinGrid
+from .hierarchy import DigipinHierarchy
+from .packed import MAX_PRECISION, PRECISION_MASK, PackedDigipin
+
+
+def _to_code(code):
+    """Packed code of a DIGIPIN string or packed integer"""
+    if isinstance(code, str):
+        return PackedDigipin.pack(code)
+    if not PackedDigipin.is_valid(code):
+        raise ValueError(f'Invalid packed DIGIPIN: {code}')
+    return int(code)
+
+
+class DigipinIndex:
+    """
+    Sorted packed codes with an id per entry (a feature id or row number)
+    
+    Cell, bounding box and multi-cell queries cost O(log n + k) for k
+    results. Several entries may share a cell, and entries may mix
+    precisions: a query cell matches itself and every finer cell inside it.
+    """
+    
+    def __init__(self, codes, ids, store=None):
+        """
+        Use the from_* constructors or load() to build an index
+        
+        Args:
+            codes: Packed codes in sorted order (array or memoryview)
+            ids: Entry ids in the same order
+            store (CellStore): Mapped file backing the arrays, if any
+        """
+        self.codes = codes
+        self.ids = ids
+        self._store = store
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+    
+    @staticmethod
+    def _sorted(codes, ids):
+        """Index from unsorted code and id arrays, sorting stably by code"""
+        if all(map(operator.le, codes, islice(codes, 1, None))):
+            return DigipinIndex(codes, ids)
+        
+        try:
+            import numpy
+        except ImportError:
+            order = sorted(range(len(codes)), key=codes.__getitem__)
+            return DigipinIndex(
+                array.array('Q', (codes[i] for i in order)),
+                array.array('q', (ids[i] for i in order))
+            )
+        
+        code_array = numpy.frombuffer(codes, dtype=numpy.uint64)
+        order = numpy.argsort(code_array, kind='stable')
+        return DigipinIndex(
+            array.array('Q', code_array[order].tobytes()),
+            array.array('q', numpy.frombuffer(ids, dtype=numpy.int64)[order].tobytes())
+        )
+    
+    @staticmethod
+    def _from_pairs(pairs):
+        """Index from (code, id) pairs, skipping empty and invalid codes"""
+        packed = array.array('Q')
+        kept = array.array('q')
+        for code, entry in pairs:
+            try:
+                code = _to_code(code)
+            except (TypeError, ValueError, AttributeError):
+                continue
+            packed.append(code)
+            kept.append(entry)
+        return DigipinIndex._sorted(packed, kept)
+    
+    @staticmethod
+    def from_codes(codes, ids=None):
+        """
+        Build an index from DIGIPIN codes
+        
+        Args:
+            codes (iterable): DIGIPIN strings (with or without hyphens) or
+                packed codes; empty and invalid values are skipped
+            ids (iterable): Integer id per code (default: position in codes)
+            
+        Returns:
+            DigipinIndex: The index
+        """
+        return DigipinIndex._from_pairs(zip(codes, count() if ids is None else ids))
+    
+    @staticmethod
+    def from_coordinates(lats, lons, precision=10, ids=None):
+        """
+        Build an index by encoding coordinates
+        
+        Large inputs are encoded with the vectorized encoder when NumPy is
+        available.
+        
+        Args:
+            lats (sequence): Latitudes (None or NaN for missing values)
+            lons (sequence): Longitudes
+            precision (int): Precision level (1-10)
+            ids (sequence): Integer id per point (default: position)
+            
+        Returns:
+            DigipinIndex: The index; points outside India are skipped
+            
+        Raises:
+            ValueError: If precision is out of range
+        """
+        from .streaming import VECTORIZE_MIN_ROWS
+        
+        if precision < 1 or precision > 10:
+            raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+        
+        numpy = None
+        if len(lats) >= VECTORIZE_MIN_ROWS:
+            try:
+                import numpy
+            except ImportError:
+                pass
+        
+        if numpy is not None:
+            from .vectorized import VectorizedEncoder
+            codes, valid = VectorizedEncoder.encode_packed(
+                numpy.array(lats, dtype=float), numpy.array(lons, dtype=float), precision
+            )
+            ids = numpy.arange(len(codes)) if ids is None else numpy.asarray(ids)
+            codes = codes[valid]
+            ids = ids[valid].astype(numpy.int64)
+            order = numpy.argsort(codes, kind='stable')
+            return DigipinIndex(array.array('Q', codes[order].tobytes()), array.array('q', ids[order].tobytes()))
+        
+        packed = array.array('Q')
+        kept = array.array('q')
+        for lat, lon, entry in zip(lats, lons, count() if ids is None else ids):
+            try:
+                packed.append(DigipinEncoder.encode_packed(lat, lon, precision))
+            except (TypeError, ValueError):
+                continue
+            kept.append(entry)
+        return DigipinIndex._sorted(packed, kept)
+    
+    @staticmethod
+    def from_layer(layer, digipin_field):
+        """
+        Build an index from a layer's DIGIPIN field, keyed by feature id
+        
+        Only the DIGIPIN attribute is read; geometries are skipped.
+        
+        Args:
+            layer (QgsVectorLayer): Layer with a DIGIPIN field
+            digipin_field (str): Name of the DIGIPIN field
+            
+        Returns:
+            DigipinIndex: The index
+            
+        Raises:
+            ValueError: If the field does not exist
+        """
+        from qgis.core import QgsFeatureRequest
+        
+        field_idx = layer.fields().indexOf(digipin_field)
+        if field_idx == -1:
+            raise ValueError(f'Field not found: {digipin_field}')
+        
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([field_idx])
+        
+        return DigipinIndex._from_pairs(
+            (feature.attribute(field_idx), feature.id()) for feature in layer.getFeatures(request)
+        )
+    
+    @staticmethod
+    def load(path):
+        """
+        Open an index saved with save(), memory-mapped rather than read
+        
+        Raises:
+            ValueError: If the file is not a saved index
+        """
+        from .cellstore import CellStore
+        
+        store = CellStore(path)
+        if [name for name, _ in store.columns] != ['id']:
+            store.close()
+            raise ValueError(f'Not a DIGIPIN index file: {path}')
+        return DigipinIndex(store.codes, store.column('id'), store)
+    
+    def save(self, path):
+        """Write the index as a cell store file with an 'id' column"""
+        from .cellstore import CellStoreWriter
+        
+        writer = CellStoreWriter(path, [('id', 'int64')], unique=False)
+        writer.add_many(self.codes, [self.ids])
+        writer.close()
+    
+    def close(self):
+        """Unmap the file of a loaded index"""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+    
+    def cell_range(self, code, lo=0, hi=None):
+        """
+        Positions of the entries inside a cell
+        
+        Args:
+            code: DIGIPIN string or packed code
+            
+        Returns:
+            tuple: (start, stop) positions in codes and ids
+            
+        Raises:
+            ValueError: If code is invalid
+        """
+        first, last = PackedDigipin.descendant_range(_to_code(code))
+        hi = len(self.codes) if hi is None else hi
+        start = bisect_left(self.codes, first, lo, hi)
+        return start, bisect_right(self.codes, last, start, hi)
+    
+    def count(self, code):
+        """Number of entries inside a cell"""
+        start, stop = self.cell_range(code)
+        return stop - start
+    
+    def cell(self, code):
+        """
+        Ids of the entries inside a cell
+        
+        Args:
+            code: DIGIPIN string or packed code
+            
+        Returns:
+            list: Entry ids in code order
+        """
+        start, stop = self.cell_range(code)
+        return self.ids[start:stop].tolist()
+    
+    def cells(self, codes):
+        """
+        Ids of the entries inside any of several cells
+        
+        The cells are compacted first, so overlapping or repeated cells
+        return each entry once.
+        
+        Args:
+            codes (iterable): DIGIPIN strings or packed codes
+            
+        Returns:
+            list: Entry ids in code order
+        """
+        results = []
+        for code in DigipinHierarchy.compact(_to_code(code) for code in codes):
+            start, stop = self.cell_range(code)
+            results.extend(self.ids[start:stop].tolist())
+        return results
+    
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Ids of the entries whose cell intersects a bounding box
+        
+        Descends the grid from level 1, taking whole ranges for cells
+        inside the box and stopping at cells with no entries, so only cells
+        along the box edge are split.
+        
+        Returns:
+            list: Entry ids in code order
+        """
+        ranges = DigipinCoverage.extent_ranges(min_lat, min_lon, max_lat, max_lon, GRID_LEVELS)
+        if ranges is None or not len(self.codes):
+            return []
+        y_min, y_max, x_min, x_max = ranges
+        
+        found = []
+        shift = 2 * (GRID_LEVELS - 1)
+        pending = [
+            (1, y, x, 0, len(self.codes))
+            for y in range(y_min >> shift, (y_max >> shift) + 1)
+            for x in range(x_min >> shift, (x_max >> shift) + 1)
+        ]
+        while pending:
+            level, y, x, lo, hi = pending.pop()
+            code = DigipinGrid.to_packed(y, x, level)
+            start, stop = self.cell_range(code, lo, hi)
+            if start == stop:
+                continue
+            
+            shift = 2 * (GRID_LEVELS - level)
+            if (y_min <= y << shift and ((y + 1) << shift) - 1 <= y_max and
+                    x_min <= x << shift and ((x + 1) << shift) - 1 <= x_max):
+                found.append((start, stop))
+                continue
+            
+            # Entries for the edge cell itself intersect the box too
+            own = bisect_right(self.codes, code, start, stop)
+            if own > start:
+                found.append((start, own))
+            
+            shift -= 2
+            for child_y in range(max(4 * y, y_min >> shift), min(4 * y + 3, y_max >> shift) + 1):
+                for child_x in range(max(4 * x, x_min >> shift), min(4 * x + 3, x_max >> shift) + 1):
+                    pending.append((level + 1, child_y, child_x, own, stop))
+        
+        results = []
+        for start, stop in sorted(found):
+            results.extend(self.ids[start:stop].tolist())
+        return results
+    
+    def unique_codes(self):
+        """Distinct packed codes in sorted order"""
+        return [code for code, _ in groupby(self.codes)]
+    
+    def counts(self, precision=None):
+        """
+        Number of entries per cell
+        
+        Args:
+            precision (int): Roll finer cells up to this precision; coarser
+                cells are counted as they are (default: no roll-up)
+                
+        Returns:
+            dict: Packed code -> entry count
+        """
+        results = {}
+        if precision is None:
+            for code, group in groupby(self.codes):
+                results[code] = sum(1 for _ in group)
+            return results
+        
+        shift = 4 * (MAX_PRECISION + 1 - precision)
+        
+        def rolled_up(code):
+            if code & PRECISION_MASK > precision:
+                return ((code >> shift) << shift) | precision
+            return code
+        
+        for code, group in groupby(self.codes, rolled_up):
+            results[code] = results.get(code, 0) + sum(1 for _ in group)
+        return results
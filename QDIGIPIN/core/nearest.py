@@ -0,0 +1,288 @@
+"""
+k-nearest-neighbour search over points bucketed by DIGIPIN cell
+Rings of cells are searched outwards from the query cell until no unvisited cell can hold a closer point
+"""
+
+import array
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+
+from .constants import BOUNDS, GRID_LEVELS
+from .coverage import DigipinCoverage
+from .digipin_engine import DigipinDecoder, DigipinGrid
+from .index import DigipinIndex
+
+# Mean Earth radius in km, as core.distance
+EARTH_RADIUS_KM = 6371.0088
+
+# Cells with more reference points than this are split into their children
+LEAF_SIZE = 32
+
+_LAT_SPAN = BOUNDS['maxLat'] - BOUNDS['minLat']
+_LON_SPAN = BOUNDS['maxLon'] - BOUNDS['minLon']
+
+
+def _clamp(value, low, high):
+    return low if value < low else high if value > high else value
+
+
+class DigipinNearest:
+    """
+    Nearest reference points to query locations, by haversine distance
+    
+    Reference points are indexed by their DIGIPIN cell (see
+    core.index). A query visits square rings of cells around its own cell
+    and stops once the k-th nearest point found so far is closer than any
+    point outside the rings could be, so it touches only the cells near
+    the answer.
+    """
+    
+    def __init__(self, lats, lons, ids=None, precision=None, k=1):
+        """
+        Args:
+            lats (sequence): Reference latitudes
+            lons (sequence): Reference longitudes
+            ids (sequence): Integer id per reference point (default: position);
+                points outside India are left out
+            precision (int): Bucket cell level (default: chosen so cells hold
+                about k points on average over the reference extent)
+            k (int): Typical number of neighbours queried, for the default
+                precision
+                
+        Raises:
+            ValueError: If precision is out of range
+        """
+        index = DigipinIndex.from_coordinates(lats, lons, GRID_LEVELS)
+        positions = index.ids
+        self.index = index
+        self.ids = array.array('q', (positions if ids is None else (ids[i] for i in positions)))
+        
+        # Coordinates in index order, so a cell's points are one slice
+        self._lat = array.array('d', (math.radians(lats[i]) for i in positions))
+        self._lon = array.array('d', (math.radians(lons[i]) for i in positions))
+        self._cos = array.array('d', (math.cos(lat) for lat in self._lat))
+        
+        if precision is None:
+            precision = self._default_precision(k)
+        elif precision < 1 or precision > GRID_LEVELS:
+            raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+        self.precision = precision
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _default_precision(self, k):
+        """Finest level whose cells over the reference extent hold about k points each"""
+        if not len(self._lat):
+            return 1
+        lats = [math.degrees(lat) for lat in self._lat]
+        lons = [math.degrees(lon) for lon in self._lon]
+        extent = min(lats), min(lons), max(lats), max(lons)
+        target = max(len(lats) // max(k, 1), 1)
+        precision = 1
+        for level in range(2, GRID_LEVELS + 1):
+            if DigipinCoverage.extent_count(*extent, level) > target:
+                break
+            precision = level
+        return precision
+    
+    def _cell_position(self, lat, lon):
+        """Grid row and column of a query at the bucket level, clamped to the grid"""
+        y, x = DigipinGrid.quantize(
+            _clamp(lat, BOUNDS['minLat'], BOUNDS['maxLat']),
+            _clamp(lon, BOUNDS['minLon'], BOUNDS['maxLon'])
+        )
+        shift = 2 * (GRID_LEVELS - self.precision)
+        return y >> shift, x >> shift
+    
+    def _outside_bound(self, lat, lon, y, x, ring, level):
+        """Lower bound in km on the distance to any point outside the searched rings"""
+        size = 4 ** level
+        lat_step = _LAT_SPAN / size
+        lon_step = _LON_SPAN / size
+        bound = math.inf
+        
+        # Grid edges that the rings reach have no points beyond them
+        if y - ring > 0:
+            bound = min(bound, math.radians(lat - (BOUNDS['minLat'] + (y - ring) * lat_step)))
+        if y + ring < size - 1:
+            bound = min(bound, math.radians(BOUNDS['minLat'] + (y + ring + 1) * lat_step - lat))
+        
+        delta = math.inf
+        if x - ring > 0:
+            delta = min(delta, lon - (BOUNDS['minLon'] + (x - ring) * lon_step))
+        if x + ring < size - 1:
+            delta = min(delta, BOUNDS['minLon'] + (x + ring + 1) * lon_step - lon)
+        if delta < math.inf:
+            # Distance to the nearest meridian that far east or west
+            delta = math.radians(min(max(delta, 0.0), 90.0))
+            bound = min(bound, math.asin(math.cos(math.radians(lat)) * math.sin(delta)))
+        
+        return max(bound, 0.0) * EARTH_RADIUS_KM
+    
+    @staticmethod
+    def _ring_cells(y, x, ring, level):
+        """Grid positions of the cells at Chebyshev distance ring inside the grid"""
+        size = 4 ** level
+        if ring == 0:
+            return [(y, x)]
+        
+        cells = []
+        x_low, x_high = max(x - ring, 0), min(x + ring, size - 1)
+        for row in (y - ring, y + ring):
+            if 0 <= row < size:
+                cells.extend((row, column) for column in range(x_low, x_high + 1))
+        for row in range(max(y - ring + 1, 0), min(y + ring - 1, size - 1) + 1):
+            for column in (x - ring, x + ring):
+                if 0 <= column < size:
+                    cells.append((row, column))
+        return cells
+    
+    def query(self, lat, lon, k=1, max_distance_km=None):
+        """
+        Find the k nearest reference points to a location
+        
+        Cells of a ring that cannot beat the current k-th distance are
+        skipped, and cells holding many points are split into their child
+        cells, nearest first, so dense clusters are not scanned whole.
+        While nothing has been found the rings move up to the parent level,
+        so queries far from every point cross empty areas in a few steps.
+        
+        Args:
+            lat (float): Query latitude
+            lon (float): Query longitude
+            k (int): Number of neighbours
+            max_distance_km (float): Ignore points farther than this
+            
+        Returns:
+            list: (id, distance_km) pairs, nearest first (ties by id); fewer
+            than k when there are not enough points in range
+        """
+        if k < 1:
+            raise ValueError(f'k must be at least 1, got {k}')
+        if not len(self.ids):
+            return []
+        
+        limit = math.inf if max_distance_km is None else max_distance_km
+        y, x = self._cell_position(lat, lon)
+        lat_r = math.radians(lat)
+        lon_r = math.radians(lon)
+        cos_q = math.cos(lat_r)
+        codes, ref_lat, ref_lon, ref_cos, ids = self.index.codes, self._lat, self._lon, self._cos, self.ids
+        tan_q = math.tan(lat_r)
+        sin, cos, asin, atan2, sqrt, radians = math.sin, math.cos, math.asin, math.atan2, math.sqrt, math.radians
+        to_packed = DigipinGrid.to_packed
+        diameter = 2 * EARTH_RADIUS_KM
+        
+        # Max-heap of the best k as (-distance, -id)
+        best = []
+        
+        def worst():
+            return -best[0][0] if len(best) == k else limit
+        
+        def cell_distance(level, row, column):
+            """Distance in km from the query to the nearest point of a cell"""
+            lat_step = _LAT_SPAN / 4 ** level
+            lon_step = _LON_SPAN / 4 ** level
+            south = BOUNDS['minLat'] + row * lat_step
+            west = BOUNDS['minLon'] + column * lon_step
+            if west <= lon <= west + lon_step:
+                north = south + lat_step
+                d_lat = south - lat if lat < south else lat - north if lat > north else 0.0
+                return radians(d_lat) * EARTH_RADIUS_KM
+            
+            # Nearest point on the closer meridian edge: the foot of the
+            # perpendicular from the query, clamped to the edge
+            edge = radians(west if lon < west else west + lon_step)
+            foot = atan2(tan_q, cos(edge - lon_r))
+            foot = min(max(foot, radians(south)), radians(south + lat_step))
+            h = sin((foot - lat_r) / 2) ** 2 + cos_q * cos(foot) * sin((edge - lon_r) / 2) ** 2
+            return diameter * asin(sqrt(min(h, 1.0)))
+        
+        def visit(level, row, column, start, stop):
+            if stop - start > LEAF_SIZE and level < GRID_LEVELS:
+                children = []
+                shift = 4 * (GRID_LEVELS - level)
+                for child_row in range(4 * row, 4 * row + 4):
+                    for child_column in range(4 * column, 4 * column + 4):
+                        code = to_packed(child_row, child_column, level + 1)
+                        first = bisect_left(codes, code, start, stop)
+                        last = bisect_right(codes, code | ((1 << shift) - 1), first, stop)
+                        if first < last:
+                            children.append((cell_distance(level + 1, child_row, child_column),
+                                             child_row, child_column, first, last))
+                children.sort()
+                for bound, child_row, child_column, first, last in children:
+                    if bound > worst():
+                        break
+                    visit(level + 1, child_row, child_column, first, last)
+                return
+            
+            for i in range(start, stop):
+                h = sin((ref_lat[i] - lat_r) / 2) ** 2 + cos_q * ref_cos[i] * sin((ref_lon[i] - lon_r) / 2) ** 2
+                distance = diameter * asin(sqrt(min(h, 1.0)))
+                if distance > limit:
+                    continue
+                item = (-distance, -ids[i])
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+        
+        level = self.precision
+        ring = 0
+        while True:
+            for row, column in self._ring_cells(y, x, ring, level):
+                start, stop = self.index.cell_range(to_packed(row, column, level))
+                if start < stop and cell_distance(level, row, column) <= worst():
+                    visit(level, row, column, start, stop)
+            
+            bound = self._outside_bound(lat, lon, y, x, ring, level)
+            if bound == math.inf or bound > worst():
+                break
+            
+            if not best and ring >= 3 and level > 1:
+                # Everything searched so far is empty: continue on the parent
+                # grid, from the largest parent ring inside the searched square
+                level -= 1
+                y >>= 2
+                x >>= 2
+                ring = (ring - 3) // 4
+            ring += 1
+        
+        return [(-negative_id, -negative_distance) for negative_distance, negative_id in sorted(best, reverse=True)]
+    
+    def query_digipin(self, digipin, k=1, max_distance_km=None):
+        """
+        Find the k nearest reference points to the center of a DIGIPIN cell
+        
+        Raises:
+            ValueError: If digipin is invalid
+        """
+        cell = DigipinDecoder.decode_cell(digipin)
+        return self.query(cell.latitude, cell.longitude, k, max_distance_km)
+    
+    def query_batch(self, lats, lons, k=1, max_distance_km=None, progress=None):
+        """
+        Find the k nearest reference points to many locations
+        
+        Args:
+            lats (sequence): Query latitudes
+            lons (sequence): Query longitudes
+            k (int): Number of neighbours
+            max_distance_km (float): Ignore points farther than this
+            progress (callable): Called as progress(done, total) every 1,000
+                queries; returning False stops early
+                
+        Returns:
+            list: One list of (id, distance_km) pairs per query (None for
+            queries not run after stopping early)
+        """
+        total = len(lats)
+        results = [None] * total
+        for position, (lat, lon) in enumerate(zip(lats, lons)):
+            if progress is not None and position % 1000 == 0 and progress(position, total) is False:
+                break
+            results[position] = self.query(lat, lon, k, max_distance_km)
+        return results
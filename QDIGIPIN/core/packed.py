@@ -0,0 +1,167 @@
+"""
+Packed 64-bit integer representation of DIGIPIN codes
+
+Each level is stored as a 4-bit grid index (row * 4 + col), level 1 in the
+most significant nibble, followed by a 4-bit precision tag:
+    
+    bits 43-40  level 1
+    ...
+    bits  7-4   level 10
+    bits  3-0   precision (1-10)
+    
+Unused levels are zero. Sorting packed codes places every cell directly
+before its descendants, and the descendants of a cell form one contiguous
+integer range, so prefix containment becomes a range check.
+"""
+
+from .constants import DIGIPIN_GRID
+
+# Hexadecimal nibble for each DIGIPIN character, in grid order
+_HEX_DIGITS = '0123456789abcdef'
+_GRID_CHARS = ''.join(char for row in DIGIPIN_GRID for char in row)
+
+# Every other ASCII character maps to 'x' so int(..., 16) rejects it
+_PACK_TABLE = {code: 'x' for code in range(128)}
+_PACK_TABLE.update({ord(char): _HEX_DIGITS[i] for i, char in enumerate(_GRID_CHARS)})
+_UNPACK_TABLE = str.maketrans(_HEX_DIGITS, _GRID_CHARS)
+
+MAX_PRECISION = 10
+PRECISION_MASK = 0xF
+CODE_BITS = 4 * (MAX_PRECISION + 1)
+
+
+def _hyphenate(pin):
+    """Add hyphens after levels 3 and 6, as DigipinEncoder.encode returns them"""
+    if len(pin) >= 6:
+        return f'{pin[:3]}-{pin[3:6]}-{pin[6:]}'
+    if len(pin) >= 3:
+        return f'{pin[:3]}-{pin[3:]}'
+    return pin
+
+
+class PackedDigipin:
+    """Convert DIGIPIN codes to and from packed integers"""
+    
+    @staticmethod
+    def pack(digipin):
+        """
+        Pack a DIGIPIN into an integer
+        
+        Args:
+            digipin (str): DIGIPIN code (with or without hyphens)
+            
+        Returns:
+            int: Packed code (fits in an unsigned 64-bit integer)
+            
+        Raises:
+            ValueError: If DIGIPIN is invalid
+        """
+        pin = digipin.replace('-', '')
+        precision = len(pin)
+        
+        if precision < 1 or precision > MAX_PRECISION:
+            raise ValueError(f'Invalid DIGIPIN length: {precision}. Must be 1-10 characters.')
+        
+        try:
+            if not pin.isascii():
+                raise ValueError
+            digits = int(pin.translate(_PACK_TABLE), 16)
+        except ValueError:
+            invalid = next(char for char in pin if char not in _GRID_CHARS)
+            raise ValueError(f'Invalid character in DIGIPIN: {invalid}') from None
+        
+        return (digits << 4 * (MAX_PRECISION + 1 - precision)) | precision
+    
+    @staticmethod
+    def unpack(code, add_hyphens=True):
+        """
+        Convert a packed integer back to its DIGIPIN string
+        
+        Args:
+            code (int): Packed code
+            add_hyphens (bool): Whether to add hyphens
+            
+        Returns:
+            str: DIGIPIN code, hyphenated as DigipinEncoder.encode returns it
+            
+        Raises:
+            ValueError: If the packed code is invalid
+        """
+        if not PackedDigipin.is_valid(code):
+            raise ValueError(f'Invalid packed DIGIPIN: {code}')
+        
+        precision = code & PRECISION_MASK
+        digits = code >> 4 * (MAX_PRECISION + 1 - precision)
+        pin = format(digits, f'0{precision}x').translate(_UNPACK_TABLE)
+        
+        return _hyphenate(pin) if add_hyphens else pin
+    
+    @staticmethod
+    def is_valid(code):
+        """
+        Check that an integer is a well-formed packed code
+        
+        Returns:
+            bool: True if the precision tag is 1-10 and unused levels are zero
+        """
+        code = int(code)
+        precision = code & PRECISION_MASK
+        if precision < 1 or precision > MAX_PRECISION or code >> CODE_BITS:
+            return False
+        unused_bits = 4 * (MAX_PRECISION - precision)
+        return (code >> 4) & ((1 << unused_bits) - 1) == 0
+    
+    @staticmethod
+    def precision(code):
+        """Return the precision level of a packed code"""
+        return code & PRECISION_MASK
+    
+    @staticmethod
+    def truncate(code, precision):
+        """
+        Truncate a packed code to a coarser precision (its ancestor cell)
+        
+        Args:
+            code (int): Packed code
+            precision (int): Target precision, no finer than the code's own
+            
+        Returns:
+            int: Packed code of the containing cell
+            
+        Raises:
+            ValueError: If precision is out of range
+        """
+        current = code & PRECISION_MASK
+        if precision < 1 or precision > current:
+            raise ValueError(f'Precision must be between 1 and {current}, got {precision}')
+        shift = 4 * (MAX_PRECISION + 1 - precision)
+        return ((code >> shift) << shift) | precision
+    
+    @staticmethod
+    def descendant_range(code):
+        """
+        Return the inclusive range of packed codes contained by a cell
+        
+        The range includes the cell itself and every finer cell within it.
+        
+        Returns:
+            tuple: (first, last) packed codes
+        """
+        precision = code & PRECISION_MASK
+        shift = 4 * (MAX_PRECISION + 1 - precision)
+        return code, code | ((1 << shift) - 1)
+    
+    @staticmethod
+    def contains(container, code):
+        """
+        Check whether a cell contains another (or is the same cell)
+        
+        Args:
+            container (int): Packed code of the containing cell
+            code (int): Packed code to test
+            
+        Returns:
+            bool: True if code lies within container
+        """
+        first, last = PackedDigipin.descendant_range(container)
+        return first <= code <= last
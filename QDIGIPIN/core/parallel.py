@@ -0,0 +1,264 @@
+"""
+Parallel batch encoding across processes
+Inputs are split into row-range shards, encoded in a process pool and merged in input order
+"""
+
+import csv
+import io
+import os
+import shutil
+import sys
+import time
+from collections import deque
+
+from .streaming import DEFAULT_CHUNK_SIZE, encode_coordinates, encode_coordinates_multi, parse_coordinate
+
+
+def resolve_workers(workers):
+    """
+    Resolve a worker count setting
+    
+    Args:
+        workers (int): Worker processes; None or 0 uses every CPU
+        
+    Returns:
+        int: Worker count, at least 1
+    """
+    if not workers:
+        return os.cpu_count() or 1
+    if workers < 0:
+        raise ValueError(f'Worker count must be non-negative, got {workers}')
+    return workers
+
+
+def _python_executable():
+    """Python interpreter for worker processes when embedded in another program"""
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return None
+    
+    # Inside QGIS sys.executable is the QGIS binary, which cannot run workers
+    candidates = [
+        os.path.join(sys.exec_prefix, 'pythonw.exe'),
+        os.path.join(sys.exec_prefix, 'python.exe'),
+        os.path.join(sys.exec_prefix, 'bin', 'python3'),
+        shutil.which('python3'),
+        shutil.which('python')
+    ]
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _pool_context():
+    """Spawn-based multiprocessing context (forking a GUI process is unsafe)"""
+    import multiprocessing
+    context = multiprocessing.get_context('spawn')
+    executable = _python_executable()
+    if executable:
+        context.set_executable(executable)
+    return context
+
+
+def ordered_map(function, shards, workers=None):
+    """
+    Apply a function to shards in a process pool, yielding results in order
+    
+    At most two shards per worker are in flight, so memory stays bounded
+    however many shards the input produces. With one worker the function
+    runs in this process.
+    
+    Args:
+        function (callable): Module-level function called as function(*shard)
+        shards (iterable): Argument tuples, consumed lazily
+        workers (int): Worker processes; None or 0 uses every CPU
+        
+    Yields:
+        Results in the order of shards
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for shard in shards:
+            yield function(*shard)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+    pending = deque()
+    try:
+        for shard in shards:
+            pending.append(pool.submit(function, *shard))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _encode_csv_shard(rows, width, lat_index, lon_index, field_index, precision):
+    """Worker: encode raw CSV rows and format them as CSV text"""
+    lats = []
+    lons = []
+    for row in rows:
+        lats.append(parse_coordinate(row[lat_index]) if lat_index < len(row) else None)
+        lons.append(parse_coordinate(row[lon_index]) if lon_index < len(row) else None)
+    codes = encode_coordinates(lats, lons, precision)
+    
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for row, code in zip(rows, codes):
+        # Pad or trim to the header like csv.DictWriter does
+        row = row[:width] + [''] * (width - len(row))
+        if field_index == len(row):
+            row.append(code or '')
+        else:
+            row[field_index] = code or ''
+        writer.writerow(row)
+    return codes, output.getvalue()
+
+
+def encode_chunks(chunks, precision=10, workers=None):
+    """
+    Encode coordinate chunks in parallel
+    
+    Args:
+        chunks (iterable): (lats, lons) list pairs, consumed lazily
+        precision (int): Precision level (1-10)
+        workers (int): Worker processes; None or 0 uses every CPU
+        
+    Yields:
+        list: DIGIPIN codes per chunk (None where invalid), in input order
+    """
+    return ordered_map(encode_coordinates, ((lats, lons, precision) for lats, lons in chunks), workers)
+
+
+def encode_multi_chunks(chunks, levels, workers=None):
+    """
+    Encode coordinate chunks at several precisions in parallel
+    
+    Args:
+        chunks (iterable): (lats, lons) list pairs, consumed lazily
+        levels (iterable): Precision levels (1-10)
+        workers (int): Worker processes; None or 0 uses every CPU
+        
+    Yields:
+        list: Per chunk, a tuple of codes in the order of levels per
+        coordinate (None where invalid), in input order
+    """
+    levels = list(levels)
+    return ordered_map(encode_coordinates_multi, ((lats, lons, levels) for lats, lons in chunks), workers)
+
+
+def encode_multi_parallel(lats, lons, levels, workers=None, shard_size=DEFAULT_CHUNK_SIZE):
+    """
+    Encode coordinates at several precisions in parallel
+    
+    Args:
+        lats (list): Latitudes (None for missing values)
+        lons (list): Longitudes (None for missing values)
+        levels (iterable): Precision levels (1-10)
+        workers (int): Worker processes; None or 0 uses every CPU
+        shard_size (int): Rows per shard
+        
+    Returns:
+        list: Tuples of codes in the order of levels, in input order (None
+        where invalid)
+    """
+    chunks = (
+        (lats[start:start + shard_size], lons[start:start + shard_size])
+        for start in range(0, len(lats), shard_size)
+    )
+    results = []
+    for codes in encode_multi_chunks(chunks, levels, workers):
+        results.extend(codes)
+    return results
+
+
+def encode_csv_file_parallel(input_path, output_path, lat_field, lon_field, precision=10, field_name='DIGIPIN',
+                             chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, workers=None):
+    """
+    Encode a CSV file with row-range shards in a process pool
+    
+    This process only splits rows and writes the CSV text the workers
+    return, so quoted fields with embedded newlines are handled correctly.
+    Arguments and result match core.streaming.encode_csv_file.
+    
+    Args:
+        workers (int): Worker processes; None or 0 uses every CPU
+        
+    Raises:
+        ValueError: If the coordinate columns are missing
+    """
+    total_bytes = os.path.getsize(input_path) or 1
+    started = time.perf_counter()
+    rows_read = 0
+    errors = 0
+    canceled = False
+    
+    with open(input_path, newline='', encoding='utf-8-sig') as source:
+        reader = csv.reader(source)
+        headers = next(reader, [])
+        for field in (lat_field, lon_field):
+            if field not in headers:
+                raise ValueError(f'Column not found in CSV: {field}')
+        
+        fieldnames = list(headers) if field_name in headers else list(headers) + [field_name]
+        field_index = fieldnames.index(field_name)
+        lat_index = headers.index(lat_field)
+        lon_index = headers.index(lon_field)
+        
+        def shards():
+            chunk = []
+            for row in reader:
+                if not row:
+                    continue
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    pending.append(chunk)
+                    yield chunk, len(headers), lat_index, lon_index, field_index, precision
+                    chunk = []
+            if chunk:
+                pending.append(chunk)
+                yield chunk, len(headers), lat_index, lon_index, field_index, precision
+        
+        pending = deque()
+        target = open(output_path, 'w', newline='', encoding='utf-8') if output_path else None
+        try:
+            if target is not None:
+                csv.writer(target).writerow(fieldnames)
+            
+            results = ordered_map(_encode_csv_shard, shards(), workers)
+            try:
+                for codes, text in results:
+                    rows = pending.popleft()
+                    rows_read += len(rows)
+                    errors += codes.count(None)
+                    if target is not None:
+                        target.write(text)
+                    
+                    if on_chunk is not None:
+                        records = []
+                        for row, code in zip(rows, codes):
+                            record = dict(zip(headers, row + [''] * (len(headers) - len(row))))
+                            record[field_name] = code or ''
+                            records.append(record)
+                        progress = min(source.buffer.tell() / total_bytes, 1.0)
+                        if on_chunk(records, fieldnames, progress) is False:
+                            canceled = True
+                            break
+            finally:
+                results.close()
+        finally:
+            if target is not None:
+                target.close()
+    
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows_read,
+        'success': rows_read - errors,
+        'errors': errors,
+        'canceled': canceled,
+        'seconds': seconds,
+        'rows_per_second': rows_read / seconds if seconds > 0 else 0.0
+    }
@@ -0,0 +1,294 @@
+"""
+Cover polygons with DIGIPIN cells
+Recursive descent of the cell hierarchy that only tests cells on the boundary
+"""
+
+import heapq
+
+from .constants import BOUNDS, GRID_LEVELS, GRID_SIZE
+from .packed import PRECISION_MASK
+
+_LAT_SPAN = BOUNDS['maxLat'] - BOUNDS['minLat']
+_LON_SPAN = BOUNDS['maxLon'] - BOUNDS['minLon']
+
+# Which boundary cells belong to the cover
+MODE_CENTER = 'center'
+MODE_INTERSECTS = 'intersects'
+MODE_CONTAINS = 'contains'
+MODES = (MODE_CENTER, MODE_INTERSECTS, MODE_CONTAINS)
+
+
+def _ring_edges(polygons):
+    """Polygon edges as (x1, y1, x2, y2) in finest-level grid units"""
+    lon_scale = GRID_SIZE / _LON_SPAN
+    lat_scale = GRID_SIZE / _LAT_SPAN
+    edges = []
+    for polygon in polygons:
+        for ring in polygon:
+            points = [
+                ((lon - BOUNDS['minLon']) * lon_scale, (lat - BOUNDS['minLat']) * lat_scale)
+                for lon, lat in ring
+            ]
+            if len(points) < 3:
+                continue
+            if points[0] != points[-1]:
+                points.append(points[0])
+            edges.extend(
+                (x1, y1, x2, y2)
+                for (x1, y1), (x2, y2) in zip(points, points[1:])
+                if (x1, y1) != (x2, y2)
+            )
+    return edges
+
+
+def _segment_hits_box(edge, x0, y0, x1, y1):
+    """Check whether an edge touches a closed box whose bounding boxes overlap"""
+    ex1, ey1, ex2, ey2 = edge
+    dx = ex2 - ex1
+    dy = ey2 - ey1
+    # The line misses the box when all four corners lie strictly on one side
+    sides = [dx * (cy - ey1) - dy * (cx - ex1) for cx, cy in ((x0, y0), (x1, y0), (x0, y1), (x1, y1))]
+    return not (all(side > 0 for side in sides) or all(side < 0 for side in sides))
+
+
+def _horizontal_crossings(edges, y, x_from, x_to):
+    """Number of edges crossing the horizontal segment, half-open like a ray cast"""
+    low, high = min(x_from, x_to), max(x_from, x_to)
+    count = 0
+    for x1, y1, x2, y2 in edges:
+        if (y1 > y) != (y2 > y):
+            x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            if low < x <= high:
+                count += 1
+    return count
+
+
+def _vertical_crossings(edges, x, y_from, y_to):
+    """Number of edges crossing the vertical segment, half-open like a ray cast"""
+    low, high = min(y_from, y_to), max(y_from, y_to)
+    count = 0
+    for x1, y1, x2, y2 in edges:
+        if (x1 > x) != (x2 > x):
+            y = y1 + (x - x1) * (y2 - y1) / (x2 - x1)
+            if low < y <= high:
+                count += 1
+    return count
+
+
+class DigipinPolyfill:
+    """Find the DIGIPIN cells covering polygons"""
+    
+    @staticmethod
+    def polyfill(polygons, precision, mode=MODE_CENTER, compact=False):
+        """
+        Cover polygons with cells at one precision
+        
+        The hierarchy is descended from level 1. A cell that no polygon
+        edge touches lies wholly inside or outside, so it is accepted or
+        dropped without visiting its descendants; only cells on the
+        boundary are subdivided. Whether a cell center is inside is carried
+        down from the parent by counting edge crossings inside the parent,
+        so each level only looks at the edges of its own cell.
+        
+        Args:
+            polygons (list): Polygons, each a list of rings (exterior first,
+                then holes), each ring a sequence of (lon, lat) pairs
+            precision (int): Precision level (1-10)
+            mode (str): Which boundary cells to keep - 'center' (center
+                inside the polygon), 'intersects' (any overlap) or
+                'contains' (cell wholly inside)
+            compact (bool): Emit every fully covered cell at the coarsest
+                level possible instead of expanding it to precision
+                
+        Yields:
+            int: Packed codes in sorted order (see core.packed)
+            
+        Raises:
+            ValueError: If precision or mode is invalid
+        """
+        if precision < 1 or precision > GRID_LEVELS:
+            raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+        if mode not in MODES:
+            raise ValueError(f'Invalid polyfill mode: {mode}. Must be one of {", ".join(MODES)}')
+        
+        edges = _ring_edges(polygons)
+        if not edges:
+            return
+        
+        # The root is the whole DIGIPIN extent; its center is tested once
+        center = GRID_SIZE / 2
+        inside = _horizontal_crossings(edges, center, center, float('inf')) % 2 == 1
+        
+        if compact:
+            cells = DigipinPolyfill._cover_compact(0, 0, 0, 0, edges, inside, precision, mode)
+            if cells is not True:
+                yield from cells
+        else:
+            yield from DigipinPolyfill._cover(0, 0, 0, 0, edges, inside, precision, mode)
+    
+    @staticmethod
+    def polyfill_features(features, precision, mode=MODE_CENTER, compact=False):
+        """
+        Cover the union of several features' polygons
+        
+        Each feature is filled on its own, since edge crossings are counted
+        over all the edges given and overlapping features would cancel each
+        other out. The covers are merged in packed order; duplicates and
+        cells inside a cell already yielded are dropped. With compact,
+        cells from different features are not merged into their parent.
+        
+        Args:
+            features (iterable): One list of polygons (see polyfill) per feature
+            precision (int): Precision level (1-10)
+            mode (str): 'center', 'intersects' or 'contains'
+            compact (bool): Emit fully covered cells at the coarsest level
+            
+        Yields:
+            int: Packed codes in sorted order
+            
+        Raises:
+            ValueError: If precision or mode is invalid
+        """
+        covers = [DigipinPolyfill.polyfill(polygons, precision, mode, compact) for polygons in features]
+        covered_until = -1
+        for code in heapq.merge(*covers):
+            if code <= covered_until:
+                continue
+            covered_until = code | ((1 << 4 * (GRID_LEVELS + 1 - (code & PRECISION_MASK))) - 1)
+            yield code
+    
+    @staticmethod
+    def polyfill_count(polygons, precision, mode=MODE_CENTER):
+        """
+        Count the cells covering polygons at one precision
+        
+        Fully covered cells are counted without enumerating their
+        descendants, so this is as fast as a compacted polyfill.
+        
+        Returns:
+            int: Number of cells at precision
+        """
+        return sum(
+            16 ** (precision - (code & PRECISION_MASK))
+            for code in DigipinPolyfill.polyfill(polygons, precision, mode, compact=True)
+        )
+    
+    @staticmethod
+    def _children(code, level, y, x, edges, inside):
+        """
+        Split a boundary cell into its 16 children
+        
+        Yields:
+            tuple: (code, y, x, edges, center_inside) per child in packed order
+        """
+        size = GRID_SIZE >> (2 * level)
+        child_size = size >> 2
+        left = x * size
+        bottom = y * size
+        center_x = left + size / 2
+        center_y = bottom + size / 2
+        
+        # Center status of each child column on the parent's center row,
+        # then up or down the column to each child center
+        column_status = []
+        for col in range(4):
+            child_x = left + (col + 0.5) * child_size
+            crossings = _horizontal_crossings(edges, center_y, center_x, child_x)
+            column_status.append(inside != (crossings % 2 == 1))
+        
+        # Edges touching each child (index y digit * 4 + x digit)
+        child_edges = [[] for _ in range(16)]
+        for edge in edges:
+            ex1, ey1, ex2, ey2 = edge
+            col_min = int((min(ex1, ex2) - left) // child_size)
+            col_max = int((max(ex1, ex2) - left) // child_size)
+            row_min = int((min(ey1, ey2) - bottom) // child_size)
+            row_max = int((max(ey1, ey2) - bottom) // child_size)
+            single = col_min == col_max and row_min == row_max
+            for row in range(max(row_min, 0), min(row_max, 3) + 1):
+                for col in range(max(col_min, 0), min(col_max, 3) + 1):
+                    if single or _segment_hits_box(
+                        edge,
+                        left + col * child_size, bottom + row * child_size,
+                        left + (col + 1) * child_size, bottom + (row + 1) * child_size
+                    ):
+                        child_edges[row * 4 + col].append(edge)
+        
+        shift = 4 * (GRID_LEVELS - level)
+        base = code & ~PRECISION_MASK
+        for nibble in range(16):
+            row = 3 - (nibble >> 2)
+            col = nibble & 3
+            child_x = left + (col + 0.5) * child_size
+            child_y = bottom + (row + 0.5) * child_size
+            crossings = _vertical_crossings(edges, child_x, center_y, child_y)
+            child_inside = column_status[col] != (crossings % 2 == 1)
+            yield (
+                base | (nibble << shift) | (level + 1),
+                (y << 2) | row, (x << 2) | col,
+                child_edges[row * 4 + col], child_inside
+            )
+    
+    @staticmethod
+    def _boundary_cell_kept(inside, mode):
+        """Whether a cell at the target precision touched by an edge is kept"""
+        if mode == MODE_INTERSECTS:
+            return True
+        if mode == MODE_CONTAINS:
+            return False
+        return inside
+    
+    @staticmethod
+    def _cover(code, level, y, x, edges, inside, precision, mode):
+        """Generate the cells at precision covering a boundary cell"""
+        shift = 4 * (GRID_LEVELS + 1 - precision)
+        for child, child_y, child_x, child_edges, child_inside in DigipinPolyfill._children(
+            code, level, y, x, edges, inside
+        ):
+            if not child_edges:
+                if child_inside:
+                    # Every descendant at precision, as one contiguous range
+                    first = (child & ~PRECISION_MASK) | precision
+                    count = 16 ** (precision - level - 1)
+                    yield from range(first, first + (count << shift), 1 << shift)
+            elif level + 1 == precision:
+                if DigipinPolyfill._boundary_cell_kept(child_inside, mode):
+                    yield child
+            else:
+                yield from DigipinPolyfill._cover(
+                    child, level + 1, child_y, child_x, child_edges, child_inside, precision, mode
+                )
+    
+    @staticmethod
+    def _cover_compact(code, level, y, x, edges, inside, precision, mode):
+        """
+        Compacted cover of a boundary cell
+        
+        Returns:
+            True if the cell is covered completely, otherwise a list of codes
+        """
+        cells = []
+        complete = True
+        for child, child_y, child_x, child_edges, child_inside in DigipinPolyfill._children(
+            code, level, y, x, edges, inside
+        ):
+            if not child_edges:
+                covered = child_inside
+            elif level + 1 == precision:
+                covered = DigipinPolyfill._boundary_cell_kept(child_inside, mode)
+            else:
+                covered = DigipinPolyfill._cover_compact(
+                    child, level + 1, child_y, child_x, child_edges, child_inside, precision, mode
+                )
+            
+            if covered is True:
+                cells.append(child)
+            else:
+                complete = False
+                if covered:
+                    cells.extend(covered)
+        
+        # The root has no code of its own, so its children are returned
+        if complete and level > 0:
+            return True
+        return cells
@@ -0,0 +1,658 @@
+"""
+Streaming batch encoding for large files
+Files are processed in fixed-size chunks so memory use does not grow with file size
+"""
+
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from .digipin_engine import DigipinDecoder, DigipinEncoder
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Below this many rows the scalar encoder is faster than importing NumPy
+VECTORIZE_MIN_ROWS = 1000
+
+# Characters read from a GeoJSON file per block
+READ_BLOCK_SIZE = 1 << 20
+
+# File extensions of newline-delimited GeoJSON (one feature per line)
+GEOJSON_SEQ_EXTENSIONS = ('.geojsonl', '.geojsons', '.geojsonseq', '.ndjson', '.jsonl')
+
+# Distinct values kept by decode_values before its cache is cleared
+DECODE_CACHE_SIZE = 1 << 18
+
+_MISSING = object()
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def parse_coordinate(value):
+    """Parse a coordinate value, returning None if it is empty or malformed"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_coordinates(lats, lons, precision=10):
+    """
+    Encode coordinate lists with the fastest available engine
+    
+    Large batches go through the vectorized encoder when NumPy is
+    available; its output is identical to the scalar encoder.
+    
+    Args:
+        lats (list): Latitudes (None for missing values)
+        lons (list): Longitudes (None for missing values)
+        precision (int): Precision level (1-10)
+        
+    Returns:
+        list: DIGIPIN codes, None where a coordinate is missing or invalid
+    """
+    if len(lats) >= VECTORIZE_MIN_ROWS:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        
+        if numpy is not None:
+            lat_array = numpy.array([numpy.nan if lat is None else lat for lat in lats], dtype=float)
+            lon_array = numpy.array([numpy.nan if lon is None else lon for lon in lons], dtype=float)
+            codes, valid = DigipinEncoder.encode_array(lat_array, lon_array, precision)
+            return [code if ok else None for code, ok in zip(codes.tolist(), valid.tolist())]
+    
+    if precision < 1 or precision > 10:
+        raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+    
+    results = []
+    for lat, lon in zip(lats, lons):
+        try:
+            results.append(None if lat is None or lon is None else DigipinEncoder.encode(lat, lon, precision))
+        except ValueError:
+            results.append(None)
+    return results
+
+
+def decode_values(values, cache=None):
+    """
+    Decode a block of DIGIPIN attribute values, each distinct value once
+    
+    Decoded cells are kept in cache, so values repeated within a block or
+    across blocks sharing the cache are looked up instead of decoded again.
+    The cache is cleared when it grows past DECODE_CACHE_SIZE entries.
+    
+    Args:
+        values (list): DIGIPIN codes (with or without hyphens); empty,
+            null and non-string values are converted or treated as invalid
+        cache (dict): Value -> DigipinCell (or None) shared between calls
+        
+    Returns:
+        list: DigipinCell per value, None where the value is empty or invalid
+    """
+    if cache is None:
+        cache = {}
+    elif len(cache) > DECODE_CACHE_SIZE:
+        cache.clear()
+    
+    results = []
+    for value in values:
+        if not isinstance(value, str):
+            value = str(value) if value else ''
+        cell = cache.get(value, _MISSING)
+        if cell is _MISSING:
+            try:
+                cell = DigipinDecoder.decode_cell(value) if value else None
+            except ValueError:
+                cell = None
+            cache[value] = cell
+        results.append(cell)
+    return results
+
+
+def encode_coordinates_multi(lats, lons, levels):
+    """
+    Encode coordinate lists at several precisions with the fastest available engine
+    
+    Each coordinate is encoded once at the finest level; coarser codes are
+    its prefixes (see DigipinEncoder.encode_multi).
+    
+    Args:
+        lats (list): Latitudes (None for missing values)
+        lons (list): Longitudes (None for missing values)
+        levels (list): Precision levels (1-10), in output order
+        
+    Returns:
+        list: Per coordinate, a tuple of codes in the order of levels, or
+        None where the coordinate is missing or invalid
+        
+    Raises:
+        ValueError: If any level is out of range
+    """
+    for level in levels:
+        if level < 1 or level > 10:
+            raise ValueError(f'Precision must be between 1 and 10, got {level}')
+    
+    if len(lats) >= VECTORIZE_MIN_ROWS:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        
+        if numpy is not None:
+            from .vectorized import VectorizedEncoder
+            
+            lat_array = numpy.array([numpy.nan if lat is None else lat for lat in lats], dtype=float)
+            lon_array = numpy.array([numpy.nan if lon is None else lon for lon in lons], dtype=float)
+            codes, valid = VectorizedEncoder.encode_multi(lat_array, lon_array, levels)
+            columns = [codes[level].tolist() for level in levels]
+            return [row if ok else None for row, ok in zip(zip(*columns), valid.tolist())]
+    
+    results = []
+    for lat, lon in zip(lats, lons):
+        try:
+            codes = None if lat is None or lon is None else DigipinEncoder.encode_multi(lat, lon, levels)
+        except ValueError:
+            codes = None
+        results.append(None if codes is None else tuple(codes[level] for level in levels))
+    return results
+
+
+def output_columns(names, output_names):
+    """
+    Positions of output columns in records that may already have them
+    
+    As with CSV files, an existing column of the same name keeps its
+    position and gets the new values; the other output columns are
+    appended in order.
+    
+    Args:
+        names (list): Existing column names
+        output_names (list): Output column names
+        
+    Returns:
+        tuple: (indices, missing) - the position of each output column and
+        the output names that have to be appended, in order
+    """
+    positions = {}
+    for index, name in enumerate(names):
+        positions.setdefault(name, index)
+    
+    indices = []
+    missing = []
+    for name in output_names:
+        if name not in positions:
+            positions[name] = len(names) + len(missing)
+            missing.append(name)
+        indices.append(positions[name])
+    return indices, missing
+
+
+def set_columns(values, width, indices, output_values):
+    """
+    Record values with output values assigned by position (see output_columns)
+    
+    Args:
+        values (list): Existing values, padded with None up to width
+        width (int): Number of columns in the output record
+        indices (list): Position of each output value
+        output_values (sequence): Output values
+        
+    Returns:
+        list: New record values
+    """
+    record = list(values)
+    record.extend([None] * (width - len(record)))
+    for index, value in zip(indices, output_values):
+        record[index] = value
+    return record
+
+
+class CsvChunkEncoder:
+    """Read a CSV stream in chunks and add a DIGIPIN column to every row"""
+    
+    def __init__(self, stream, lat_field, lon_field, precision=10, field_name='DIGIPIN',
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            stream: Text stream opened with newline=''
+            lat_field (str): Latitude column
+            lon_field (str): Longitude column
+            precision (int): Precision level (1-10)
+            field_name (str): Output column
+            chunk_size (int): Rows per chunk
+            
+        Raises:
+            ValueError: If the coordinate columns are missing
+        """
+        self._stream = stream
+        self._reader = csv.DictReader(stream)
+        headers = self._reader.fieldnames or []
+        for field in (lat_field, lon_field):
+            if field not in headers:
+                raise ValueError(f'Column not found in CSV: {field}')
+        
+        self.lat_field = lat_field
+        self.lon_field = lon_field
+        self.precision = precision
+        self.field_name = field_name
+        self.chunk_size = chunk_size
+        self.fieldnames = list(headers) if field_name in headers else list(headers) + [field_name]
+        
+        self.rows_read = 0
+        self.success_count = 0
+        self.error_count = 0
+    
+    def __iter__(self):
+        """
+        Yields:
+            list: Encoded row dictionaries, at most chunk_size per chunk
+        """
+        while True:
+            rows = list(islice(self._reader, self.chunk_size))
+            if not rows:
+                return
+            
+            lats = [parse_coordinate(row.get(self.lat_field)) for row in rows]
+            lons = [parse_coordinate(row.get(self.lon_field)) for row in rows]
+            codes = encode_coordinates(lats, lons, self.precision)
+            
+            for row, code in zip(rows, codes):
+                row[self.field_name] = code or ''
+            errors = codes.count(None)
+            
+            self.rows_read += len(rows)
+            self.error_count += errors
+            self.success_count += len(rows) - errors
+            yield rows
+    
+    def bytes_read(self):
+        """Bytes consumed from the underlying file so far (None if unknown)"""
+        try:
+            return self._stream.buffer.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+
+def encode_csv_file(input_path, output_path, lat_field, lon_field, precision=10, field_name='DIGIPIN',
+                    chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, workers=1):
+    """
+    Encode a CSV file chunk by chunk, writing each chunk as it finishes
+    
+    Only one chunk is held in memory at a time.
+    
+    Args:
+        input_path (str): Input CSV
+        output_path (str): Output CSV, or None to only pass chunks to on_chunk
+        lat_field (str): Latitude column
+        lon_field (str): Longitude column
+        precision (int): Precision level (1-10)
+        field_name (str): Output column
+        chunk_size (int): Rows per chunk
+        on_chunk (callable): Called as on_chunk(rows, fieldnames, progress)
+            after each chunk, with progress a fraction 0-1; returning False
+            cancels the run
+        workers (int): Worker processes; more than one encodes shards in a
+            process pool (see core.parallel), None or 0 uses every CPU
+            
+    Returns:
+        dict: 'rows', 'success', 'errors', 'canceled', 'seconds' and
+        'rows_per_second'
+        
+    Raises:
+        ValueError: If the coordinate columns are missing
+    """
+    if workers != 1:
+        from .parallel import encode_csv_file_parallel
+        return encode_csv_file_parallel(
+            input_path, output_path, lat_field, lon_field, precision, field_name,
+            chunk_size, on_chunk, workers
+        )
+    
+    total_bytes = os.path.getsize(input_path) or 1
+    started = time.perf_counter()
+    canceled = False
+    
+    with open(input_path, newline='', encoding='utf-8-sig') as source:
+        encoder = CsvChunkEncoder(source, lat_field, lon_field, precision, field_name, chunk_size)
+        
+        target = open(output_path, 'w', newline='', encoding='utf-8') if output_path else None
+        try:
+            writer = None
+            if target is not None:
+                writer = csv.DictWriter(target, fieldnames=encoder.fieldnames, extrasaction='ignore')
+                writer.writeheader()
+            
+            for rows in encoder:
+                if writer is not None:
+                    writer.writerows(rows)
+                if on_chunk is not None:
+                    position = encoder.bytes_read()
+                    progress = min(position / total_bytes, 1.0) if position is not None else 0.0
+                    if on_chunk(rows, encoder.fieldnames, progress) is False:
+                        canceled = True
+                        break
+        finally:
+            if target is not None:
+                target.close()
+    
+    seconds = time.perf_counter() - started
+    return {
+        'rows': encoder.rows_read,
+        'success': encoder.success_count,
+        'errors': encoder.error_count,
+        'canceled': canceled,
+        'seconds': seconds,
+        'rows_per_second': encoder.rows_read / seconds if seconds > 0 else 0.0
+    }
+
+
+def is_geojson_seq(path):
+    """Check whether a path names a newline-delimited GeoJSON file"""
+    return path.lower().endswith(GEOJSON_SEQ_EXTENSIONS)
+
+
+class GeoJsonFeatureReader:
+    """
+    Read features one at a time from GeoJSON
+    
+    Accepts a FeatureCollection, a single Feature, or a GeoJSONSeq file of
+    features separated by newlines or record separators. The file is read
+    in blocks and each feature is decoded on its own, so memory does not
+    depend on the size of the file.
+    """
+    
+    def __init__(self, stream, block_size=READ_BLOCK_SIZE):
+        """
+        Args:
+            stream: Text stream
+            block_size (int): Characters to read at a time
+        """
+        self._stream = stream
+        self._block_size = block_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        
+        # Characters dropped from the front of the buffer, for error offsets
+        self._offset = 0
+        
+        # Start of the first object, kept in the buffer until it is known
+        # to be a collection rather than a bare feature
+        self._anchor = None
+        
+        # Top-level FeatureCollection members other than features, such as
+        # name or crs, filled in as they are passed
+        self.members = {}
+    
+    def __iter__(self):
+        """
+        Yields:
+            dict: GeoJSON features in file order
+            
+        Raises:
+            ValueError: If the file is not valid GeoJSON
+        """
+        char = self._skip('\x1e')
+        if not char:
+            return
+        if char != '{':
+            raise ValueError('GeoJSON must be a FeatureCollection or a sequence of features')
+        
+        self._anchor = self._pos
+        self._pos += 1
+        while True:
+            char = self._skip(',')
+            if char == '}':
+                self._pos += 1
+                break
+            if not char:
+                raise ValueError('Unexpected end of GeoJSON')
+            
+            key = self._decode()
+            if self._skip() != ':':
+                raise ValueError(f'Invalid GeoJSON near member {key!r}')
+            self._pos += 1
+            
+            if key == 'features':
+                self._anchor = None
+                yield from self._read_features()
+                continue
+            
+            value = self._decode()
+            if key == 'type' and value == 'Feature':
+                # Bare features rather than a collection: decode them whole
+                self.members = {}
+                self._pos = self._anchor
+                self._anchor = None
+                yield from self._read_sequence()
+                return
+            self.members[key] = value
+    
+    def bytes_read(self):
+        """Bytes consumed from the underlying file so far (None if unknown)"""
+        try:
+            return self._stream.buffer.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+    
+    def _fill(self, size=None):
+        """Append a block to the buffer, dropping consumed text; False at EOF"""
+        if self._eof:
+            return False
+        block = self._stream.read(size or self._block_size)
+        if not block:
+            self._eof = True
+            return False
+        if self._pos and self._anchor is None:
+            self._buffer = self._buffer[self._pos:]
+            self._offset += self._pos
+            self._pos = 0
+        self._buffer += block
+        return True
+    
+    def _skip(self, extra=''):
+        """Skip whitespace (and extra characters); return the next character or ''"""
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            length = len(buffer)
+            while pos < length and (buffer[pos] in ' \t\r\n' or buffer[pos] in extra):
+                pos += 1
+            self._pos = pos
+            if pos < length:
+                return buffer[pos]
+            if not self._fill():
+                return ''
+    
+    def _decode(self):
+        """Decode the next JSON value"""
+        self._skip()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                # Only an error at the end of the buffer can be a value cut
+                # off by the block boundary; read more, doubling so huge
+                # values are not rescanned often. Anything else is malformed
+                # and fails here rather than after reading the whole file.
+                truncated = e.pos >= len(self._buffer) - 6 or e.msg.startswith('Unterminated string')
+                if truncated and self._fill(max(self._block_size, len(self._buffer) - self._pos)):
+                    continue
+                raise ValueError(
+                    f'Invalid GeoJSON in the value at character {self._offset + self._pos}: {e.msg}'
+                ) from None
+            
+            # A number cut off by the block boundary decodes as its prefix
+            # ("12." or "1e+" stop before the dot or the exponent), so read
+            # more while only number characters follow it
+            tail = self._buffer[end:]
+            if len(tail) <= 2 and not tail.strip('0123456789+-.eE') and self._fill():
+                continue
+            self._pos = end
+            return value
+    
+    def _read_features(self):
+        """Yield the elements of the features array"""
+        if self._skip() != '[':
+            raise ValueError('GeoJSON "features" must be an array')
+        self._pos += 1
+        while True:
+            char = self._skip(',')
+            if char == ']':
+                self._pos += 1
+                return
+            if not char:
+                raise ValueError('Unexpected end of GeoJSON')
+            yield self._decode()
+    
+    def _read_sequence(self):
+        """Yield features separated by whitespace or record separators"""
+        while self._skip('\x1e'):
+            yield self._decode()
+
+
+class GeoJsonFeatureWriter:
+    """Write features one at a time as a FeatureCollection or GeoJSONSeq"""
+    
+    def __init__(self, stream, seq=False, members=None):
+        """
+        Args:
+            stream: Text stream
+            seq (bool): Write GeoJSONSeq (one feature per line)
+            members (dict): Extra FeatureCollection members, such as crs
+        """
+        self._stream = stream
+        self.seq = seq
+        self.count = 0
+        
+        if not seq:
+            header = {'type': 'FeatureCollection'}
+            header.update((key, value) for key, value in (members or {}).items() if key not in ('type', 'features'))
+            stream.write(_JSON_ENCODER.encode(header)[:-1] + ', "features": [\n')
+    
+    def write(self, feature):
+        """Write one feature"""
+        text = _JSON_ENCODER.encode(feature)
+        if self.seq:
+            self._stream.write(text + '\n')
+        else:
+            self._stream.write(',\n' + text if self.count else text)
+        self.count += 1
+    
+    def close(self):
+        """Finish the collection (the stream itself is left open)"""
+        if not self.seq:
+            self._stream.write('\n]}\n')
+
+
+def _point_coordinates(feature):
+    """(lat, lon) of a Point feature, or (None, None)"""
+    try:
+        geometry = feature['geometry']
+        if geometry['type'] != 'Point':
+            return None, None
+        lon, lat = geometry['coordinates'][:2]
+        return parse_coordinate(lat), parse_coordinate(lon)
+    except (KeyError, TypeError, ValueError):
+        return None, None
+
+
+def encode_geojson_file(input_path, output_path, precision=10, field_name='DIGIPIN',
+                        chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, seq=None):
+    """
+    Encode the Point features of a GeoJSON file chunk by chunk
+    
+    Features are read, encoded and written one chunk at a time. Features
+    that are not points or lie outside India are written unchanged and
+    counted as errors.
+    
+    Args:
+        input_path (str): FeatureCollection or GeoJSONSeq file
+        output_path (str): Output file, or None to only pass chunks to on_chunk
+        precision (int): Precision level (1-10)
+        field_name (str): Property to add
+        chunk_size (int): Features per chunk
+        on_chunk (callable): Called as on_chunk(features, progress) after
+            each chunk, with progress a fraction 0-1; returning False
+            cancels the run
+        seq (bool): Write GeoJSONSeq; by default chosen from output_path
+        
+    Returns:
+        dict: 'features', 'success', 'errors', 'canceled', 'seconds' and
+        'features_per_second'
+        
+    Raises:
+        ValueError: If the input is not valid GeoJSON
+    """
+    if seq is None:
+        seq = bool(output_path) and is_geojson_seq(output_path)
+    
+    total_bytes = os.path.getsize(input_path) or 1
+    started = time.perf_counter()
+    count = 0
+    errors = 0
+    canceled = False
+    
+    with open(input_path, encoding='utf-8-sig') as source:
+        reader = GeoJsonFeatureReader(source)
+        features = iter(reader)
+        
+        target = open(output_path, 'w', encoding='utf-8') if output_path else None
+        try:
+            writer = None
+            while True:
+                chunk = list(islice(features, chunk_size))
+                
+                # Members before the features are known once reading starts
+                if target is not None and writer is None:
+                    writer = GeoJsonFeatureWriter(target, seq, reader.members)
+                if not chunk:
+                    break
+                
+                lats = []
+                lons = []
+                for feature in chunk:
+                    lat, lon = _point_coordinates(feature)
+                    lats.append(lat)
+                    lons.append(lon)
+                
+                for feature, code in zip(chunk, encode_coordinates(lats, lons, precision)):
+                    if code is None:
+                        errors += 1
+                        continue
+                    if not isinstance(feature.get('properties'), dict):
+                        feature['properties'] = {}
+                    feature['properties'][field_name] = code
+                
+                count += len(chunk)
+                if writer is not None:
+                    for feature in chunk:
+                        writer.write(feature)
+                
+                if on_chunk is not None:
+                    position = reader.bytes_read()
+                    progress = min(position / total_bytes, 1.0) if position is not None else 0.0
+                    if on_chunk(chunk, progress) is False:
+                        canceled = True
+                        break
+            
+            if writer is not None:
+                writer.close()
+        finally:
+            if target is not None:
+                target.close()
+    
+    seconds = time.perf_counter() - started
+    return {
+        'features': count,
+        'success': count - errors,
+        'errors': errors,
+        'canceled': canceled,
+        'seconds': seconds,
+        'features_per_second': count / seconds if seconds > 0 else 0.0
+    }
@@ -0,0 +1,217 @@
+"""
+Neighbor, ring and disk queries on the DIGIPIN integer grid
+All operations work on packed codes (see core.packed) without decoding
+"""
+
+from .digipin_engine import DigipinGrid
+from .packed import PackedDigipin
+
+# (lat, lon) offsets of the 8 surrounding cells and of the 4 edge-sharing cells
+NEIGHBOR_OFFSETS = [
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1),           (0, 1),
+    (1, -1),  (1, 0),  (1, 1)
+]
+EDGE_OFFSETS = [
+    (-1, 0),
+    (0, -1), (0, 1),
+    (1, 0)
+]
+
+
+def _grid_position(code):
+    """Return (precision, y, x) for a packed code, validating it"""
+    if not PackedDigipin.is_valid(code):
+        raise ValueError(f'Invalid packed DIGIPIN: {code}')
+    return DigipinGrid.from_packed(code)
+
+
+def _offset_cells(precision, y, x, offsets):
+    """Packed codes at the given (lat, lon) offsets that lie inside the grid"""
+    size = 4 ** precision
+    to_packed = DigipinGrid.to_packed
+    return [
+        to_packed(y + dy, x + dx, precision)
+        for dy, dx in offsets
+        if 0 <= y + dy < size and 0 <= x + dx < size
+    ]
+
+
+class DigipinTopology:
+    """Grid topology queries on packed DIGIPIN codes"""
+    
+    @staticmethod
+    def neighbors(code, include_diagonals=True):
+        """
+        Find the cells surrounding a cell at the same precision
+        
+        Args:
+            code (int): Packed code
+            include_diagonals (bool): Include the 4 diagonal neighbors
+            
+        Returns:
+            list: Packed codes of neighbors inside the DIGIPIN extent
+            
+        Raises:
+            ValueError: If the packed code is invalid
+        """
+        offsets = NEIGHBOR_OFFSETS if include_diagonals else EDGE_OFFSETS
+        return _offset_cells(*_grid_position(code), offsets)
+    
+    @staticmethod
+    def ring(code, k):
+        """
+        Find the cells exactly k steps away (a hollow square ring)
+        
+        Cells are returned walking the ring from the south-west corner,
+        eastward along the southern edge and then counter-clockwise.
+        
+        Args:
+            code (int): Packed code
+            k (int): Ring radius in cells (0 returns the cell itself)
+            
+        Returns:
+            list: Packed codes inside the DIGIPIN extent
+            
+        Raises:
+            ValueError: If the packed code is invalid or k is negative
+        """
+        if k < 0:
+            raise ValueError(f'Ring radius must be non-negative, got {k}')
+        precision, y, x = _grid_position(code)
+        if k == 0:
+            return [code]
+        
+        offsets = [(-k, dx) for dx in range(-k, k)]
+        offsets += [(dy, k) for dy in range(-k, k)]
+        offsets += [(k, dx) for dx in range(k, -k, -1)]
+        offsets += [(dy, -k) for dy in range(k, -k, -1)]
+        return _offset_cells(precision, y, x, offsets)
+    
+    @staticmethod
+    def disk(code, k):
+        """
+        Find every cell within k steps, including the cell itself
+        
+        Cells are returned row by row from the south, west to east.
+        
+        Args:
+            code (int): Packed code
+            k (int): Disk radius in cells
+            
+        Returns:
+            list: Packed codes inside the DIGIPIN extent
+            
+        Raises:
+            ValueError: If the packed code is invalid or k is negative
+        """
+        if k < 0:
+            raise ValueError(f'Disk radius must be non-negative, got {k}')
+        precision, y, x = _grid_position(code)
+        offsets = [(dy, dx) for dy in range(-k, k + 1) for dx in range(-k, k + 1)]
+        return _offset_cells(precision, y, x, offsets)
+    
+    @staticmethod
+    def distance(code_a, code_b):
+        """
+        Grid distance in cells between two cells of the same precision
+        
+        Diagonal steps count as one, so the result is the smallest k for
+        which code_b lies in disk(code_a, k).
+        
+        Raises:
+            ValueError: If the codes are invalid or differ in precision
+        """
+        precision_a, y_a, x_a = _grid_position(code_a)
+        precision_b, y_b, x_b = _grid_position(code_b)
+        if precision_a != precision_b:
+            raise ValueError(f'Cells differ in precision: {precision_a} != {precision_b}')
+        return max(abs(y_a - y_b), abs(x_a - x_b))
+    
+    @staticmethod
+    def neighbors_batch(codes, include_diagonals=True):
+        """
+        Find the neighbors of many cells
+        
+        Args:
+            codes (iterable): Packed codes
+            include_diagonals (bool): Include diagonal neighbors
+            
+        Returns:
+            list: One list of neighboring packed codes per input code
+            (None for invalid codes)
+        """
+        offsets = NEIGHBOR_OFFSETS if include_diagonals else EDGE_OFFSETS
+        results = []
+        for code in codes:
+            try:
+                results.append(_offset_cells(*_grid_position(code), offsets))
+            except ValueError:
+                results.append(None)
+        return results
+    
+    @staticmethod
+    def disk_batch(codes, k):
+        """
+        Find the cells within k steps of many cells
+        
+        Args:
+            codes (iterable): Packed codes
+            k (int): Disk radius in cells
+            
+        Returns:
+            list: One list of packed codes per input code (None for invalid codes)
+        """
+        if k < 0:
+            raise ValueError(f'Disk radius must be non-negative, got {k}')
+        offsets = [(dy, dx) for dy in range(-k, k + 1) for dx in range(-k, k + 1)]
+        results = []
+        for code in codes:
+            try:
+                results.append(_offset_cells(*_grid_position(code), offsets))
+            except ValueError:
+                results.append(None)
+        return results
+    
+    @staticmethod
+    def adjacency(codes, include_diagonals=True):
+        """
+        Build the adjacency of a set of cells
+        
+        Only neighbors that are themselves in the set are reported, so this
+        gives the cell adjacency graph of a layer. Cells of different
+        precision are never adjacent.
+        
+        Args:
+            codes (iterable): Packed codes
+            include_diagonals (bool): Treat diagonal cells as adjacent
+            
+        Returns:
+            dict: Packed code -> list of adjacent packed codes in the set
+        """
+        cells = set(codes)
+        offsets = NEIGHBOR_OFFSETS if include_diagonals else EDGE_OFFSETS
+        return {
+            code: [
+                neighbor for neighbor in _offset_cells(*_grid_position(code), offsets)
+                if neighbor in cells
+            ]
+            for code in cells
+        }
+    
+    @staticmethod
+    def adjacency_array(codes, include_diagonals=True):
+        """
+        Build the adjacency of a large array of cells with NumPy
+        
+        Args:
+            codes (array-like): Unique packed codes
+            include_diagonals (bool): Treat diagonal cells as adjacent
+            
+        Returns:
+            tuple: (source, target) index arrays into codes, one entry per
+            adjacent pair (each pair appears in both directions)
+        """
+        from .vectorized import VectorizedGrid
+        offsets = NEIGHBOR_OFFSETS if include_diagonals else EDGE_OFFSETS
+        return VectorizedGrid.adjacency(codes, offsets)
@@ -0,0 +1,349 @@
+"""
+Vectorized DIGIPIN encoding and decoding for NumPy arrays
+Array-in/array-out counterparts of DigipinEncoder.encode and DigipinDecoder.decode
+"""
+
+import numpy as np
+
+from .constants import DIGIPIN_GRID, BOUNDS, GRID_LEVELS, GRID_SIZE
+
+_LAT_SPAN = BOUNDS['maxLat'] - BOUNDS['minLat']
+_LON_SPAN = BOUNDS['maxLon'] - BOUNDS['minLon']
+
+# Grid characters flattened row-major, so that row * 4 + col indexes them
+_GRID_CHARS = np.array([char for row in DIGIPIN_GRID for char in row], dtype='<U1')
+
+# Code point -> flattened grid index (-1 for characters that are not valid)
+_CHAR_INDEX = np.full(128, -1, dtype=np.int64)
+for _index, _char in enumerate(_GRID_CHARS):
+    _CHAR_INDEX[ord(_char)] = _index
+
+_HYPHEN = ord('-')
+
+
+def _hyphenated_columns(precision):
+    """Column positions of each level in the hyphenated code, and its total width"""
+    columns = []
+    width = 0
+    for level in range(1, precision + 1):
+        columns.append(width)
+        width += 1
+        if level == 3 or level == 6:
+            width += 1
+    return columns, width
+
+
+def _quantize(lats, lons):
+    """Quantize coordinate arrays to the finest grid, as DigipinGrid.quantize"""
+    lat = np.asarray(lats, dtype=np.float64).ravel()
+    lon = np.asarray(lons, dtype=np.float64).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError(f'Latitude and longitude arrays differ in length: {lat.size} != {lon.size}')
+    
+    valid = (
+        (lat >= BOUNDS['minLat']) & (lat <= BOUNDS['maxLat']) &
+        (lon >= BOUNDS['minLon']) & (lon <= BOUNDS['maxLon'])
+    )
+    # Park invalid rows on a valid coordinate so the arithmetic stays finite
+    lat = np.where(valid, lat, BOUNDS['minLat'])
+    lon = np.where(valid, lon, BOUNDS['minLon'])
+    
+    # Quantize once to the finest fixed-point grid, as DigipinGrid.quantize
+    y = ((lat - BOUNDS['minLat']) * GRID_SIZE / _LAT_SPAN).astype(np.int64)
+    x = ((lon - BOUNDS['minLon']) * GRID_SIZE / _LON_SPAN).astype(np.int64)
+    np.minimum(y, GRID_SIZE - 1, out=y)
+    np.minimum(x, GRID_SIZE - 1, out=x)
+    return y, x, valid
+
+
+class VectorizedEncoder:
+    """Encode arrays of latitude/longitude coordinates to DIGIPIN codes"""
+    
+    @staticmethod
+    def encode(lats, lons, precision=10):
+        """
+        Encode coordinate arrays to DIGIPIN
+        
+        Coordinates are quantized to the fixed-point grid exactly as in
+        DigipinEncoder.encode and every level is derived by whole-array
+        shifts, so valid rows are identical to the scalar result.
+        
+        Args:
+            lats (array-like): Latitudes
+            lons (array-like): Longitudes
+            precision (int): Precision level (1-10)
+        
+        Returns:
+            tuple: (codes, valid) - unicode array of DIGIPIN codes (empty
+            string where invalid) and boolean validity mask
+        
+        Raises:
+            ValueError: If precision is out of range or array shapes differ
+        """
+        if precision < 1 or precision > 10:
+            raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+        
+        y, x, valid = _quantize(lats, lons)
+        
+        columns, width = _hyphenated_columns(precision)
+        chars = np.full((y.size, width), '-', dtype='<U1')
+        
+        for level in range(precision):
+            shift = 2 * (GRID_LEVELS - 1 - level)
+            row = 3 - ((y >> shift) & 3)
+            col = (x >> shift) & 3
+            chars[:, columns[level]] = _GRID_CHARS[row * 4 + col]
+        
+        codes = np.ascontiguousarray(chars).view(f'<U{width}').ravel()
+        codes = np.where(valid, codes, '')
+        return codes, valid
+    
+    @staticmethod
+    def encode_packed(lats, lons, precision=10):
+        """
+        Encode coordinate arrays to packed integer codes
+        
+        Args:
+            lats (array-like): Latitudes
+            lons (array-like): Longitudes
+            precision (int): Precision level (1-10)
+            
+        Returns:
+            tuple: (codes, valid) - uint64 packed codes (0 where invalid,
+            see core.packed) and boolean validity mask
+        """
+        if precision < 1 or precision > 10:
+            raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+        
+        y, x, valid = _quantize(lats, lons)
+        shift = 2 * (GRID_LEVELS - precision)
+        codes = VectorizedGrid.to_packed(y >> shift, x >> shift, precision)
+        codes[~valid] = 0
+        return codes, valid
+    
+    @staticmethod
+    def encode_multi(lats, lons, precisions):
+        """
+        Encode coordinate arrays at several precisions in one pass
+        
+        Codes are encoded once at the finest precision; each coarser code is
+        the hyphenated prefix of the finest one.
+        
+        Args:
+            lats (array-like): Latitudes
+            lons (array-like): Longitudes
+            precisions (iterable): Precision levels (1-10)
+            
+        Returns:
+            tuple: (codes, valid) - dict of precision -> unicode array, and
+            boolean validity mask
+        """
+        levels = sorted(set(precisions))
+        if not levels:
+            raise ValueError('At least one precision level is required')
+        if levels[0] < 1:
+            raise ValueError(f'Precision must be between 1 and 10, got {levels[0]}')
+        
+        finest, valid = VectorizedEncoder.encode(lats, lons, levels[-1])
+        codes = {}
+        for level in levels:
+            _, width = _hyphenated_columns(level)
+            codes[level] = finest.astype(f'<U{width}')
+        return codes, valid
+
+
+class VectorizedDecoder:
+    """Decode arrays of DIGIPIN codes to centers and bounds"""
+    
+    @staticmethod
+    def decode(digipins):
+        """
+        Decode an array of DIGIPIN codes
+        
+        Codes may be hyphenated or not and may mix precision levels. Values
+        are the unrounded results of the same fixed-point arithmetic
+        DigipinDecoder.decode performs before rounding for display.
+        
+        Args:
+            digipins (array-like): DIGIPIN codes
+        
+        Returns:
+            dict: Arrays 'latitude', 'longitude', 'minLat', 'maxLat',
+            'minLon', 'maxLon' (NaN where invalid), 'precision' and 'valid'
+        """
+        codes = np.asarray(digipins)
+        if codes.dtype.kind != 'U':
+            codes = codes.astype(str)
+        codes = codes.ravel()
+        
+        n = codes.size
+        points = np.ascontiguousarray(codes).view(np.uint32).reshape(n, codes.dtype.itemsize // 4)
+        
+        # Compact the characters of each code, dropping hyphens and the NUL
+        # padding at the end of fixed-width strings. A NUL inside a code is
+        # kept, so it is rejected as an invalid character
+        padding = np.logical_and.accumulate(points[:, ::-1] == 0, axis=1)[:, ::-1]
+        keep = (points != _HYPHEN) & ~padding
+        length = keep.sum(axis=1)
+        position = np.cumsum(keep, axis=1) - 1
+        keep &= position < 10
+        
+        pin = np.zeros((n, 10), dtype=np.uint32)
+        rows = np.nonzero(keep)[0]
+        pin[rows, position[keep]] = points[keep]
+        
+        index = np.where(pin < 128, _CHAR_INDEX[np.minimum(pin, 127)], -1)
+        active = np.arange(10) < length[:, None]
+        
+        valid = (length >= 1) & (length <= 10) & ~np.any(active & (index < 0), axis=1)
+        
+        # Descend the integer grid one level per column (rows count from the south)
+        safe_index = np.where(active & valid[:, None], index, 0)
+        y = np.zeros(n, dtype=np.int64)
+        x = np.zeros(n, dtype=np.int64)
+        
+        for level in range(10):
+            step = active[:, level]
+            y = np.where(step, (y << 2) | (3 - safe_index[:, level] // 4), y)
+            x = np.where(step, (x << 2) | (safe_index[:, level] % 4), x)
+        
+        lat_size = _LAT_SPAN / 4.0 ** length
+        lon_size = _LON_SPAN / 4.0 ** length
+        
+        min_lat = BOUNDS['minLat'] + y * lat_size
+        min_lon = BOUNDS['minLon'] + x * lon_size
+        max_lat = BOUNDS['minLat'] + (y + 1) * lat_size
+        max_lon = BOUNDS['minLon'] + (x + 1) * lon_size
+        
+        result = {
+            'latitude': BOUNDS['minLat'] + (2 * y + 1) * (lat_size / 2),
+            'longitude': BOUNDS['minLon'] + (2 * x + 1) * (lon_size / 2),
+            'minLat': min_lat,
+            'maxLat': max_lat,
+            'minLon': min_lon,
+            'maxLon': max_lon
+        }
+        for key in result:
+            result[key][~valid] = np.nan
+        
+        result['precision'] = np.where(valid, length, 0)
+        result['valid'] = valid
+        return result
+
+
+class VectorizedGrid:
+    """Convert between packed code arrays and integer grid coordinates"""
+    
+    @staticmethod
+    def from_packed(codes):
+        """
+        Convert packed codes to grid coordinates at their own precision
+        
+        Args:
+            codes (array-like): Packed codes (see core.packed)
+            
+        Returns:
+            tuple: (precision, y, x) int64 arrays
+        """
+        codes = np.asarray(codes, dtype=np.uint64).astype(np.int64).ravel()
+        precision = codes & 15
+        digits = codes >> (4 * (GRID_LEVELS + 1 - precision))
+        
+        y = np.zeros(codes.size, dtype=np.int64)
+        x = np.zeros(codes.size, dtype=np.int64)
+        for level in range(GRID_LEVELS):
+            active = level < precision
+            shift = np.maximum(4 * (precision - 1 - level), 0)
+            nibble = (digits >> shift) & 15
+            y = np.where(active, (y << 2) | (3 - (nibble >> 2)), y)
+            x = np.where(active, (x << 2) | (nibble & 3), x)
+        return precision, y, x
+    
+    @staticmethod
+    def to_packed(y, x, precision):
+        """
+        Convert grid coordinates to packed codes
+        
+        Args:
+            y (array-like): Rows from the south
+            x (array-like): Columns from the west
+            precision (int or array-like): Precision level(s)
+            
+        Returns:
+            numpy.ndarray: uint64 packed codes
+        """
+        y = np.asarray(y, dtype=np.int64)
+        x = np.asarray(x, dtype=np.int64)
+        precision = np.broadcast_to(np.asarray(precision, dtype=np.int64), y.shape)
+        
+        digits = np.zeros(y.shape, dtype=np.int64)
+        for level in range(GRID_LEVELS):
+            active = level < precision
+            shift = np.maximum(2 * (precision - 1 - level), 0)
+            nibble = (3 - ((y >> shift) & 3)) * 4 + ((x >> shift) & 3)
+            digits = np.where(active, (digits << 4) | nibble, digits)
+        return ((digits << (4 * (GRID_LEVELS + 1 - precision))) | precision).astype(np.uint64)
+    
+    @staticmethod
+    def adjacency(codes, offsets):
+        """
+        Find adjacent pairs within an array of cells
+        
+        Cells are matched through a sorted key array, so the cost is
+        O(n log n) for n cells regardless of how they are spread.
+        
+        Args:
+            codes (array-like): Unique packed codes
+            offsets (list): (lat, lon) cell offsets to test
+            
+        Returns:
+            tuple: (source, target) index arrays, one entry per adjacent pair
+        """
+        precision, y, x = VectorizedGrid.from_packed(codes)
+        size = np.int64(4) ** precision
+        keys = (precision << 40) | (y << 20) | x
+        
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        
+        sources = []
+        targets = []
+        for dy, dx in offsets:
+            ny = y + dy
+            nx = x + dx
+            inside = (ny >= 0) & (nx >= 0) & (ny < size) & (nx < size)
+            neighbor_keys = (precision << 40) | (np.clip(ny, 0, None) << 20) | np.clip(nx, 0, None)
+            
+            position = np.minimum(np.searchsorted(sorted_keys, neighbor_keys), max(keys.size - 1, 0))
+            hit = inside & (sorted_keys[position] == neighbor_keys) if keys.size else inside
+            sources.append(np.nonzero(hit)[0])
+            targets.append(order[position[hit]])
+        
+        if not sources:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(sources), np.concatenate(targets)
+    
+    @staticmethod
+    def truncate(codes, precision):
+        """
+        Truncate packed codes to a coarser precision (their ancestor cells)
+        
+        Args:
+            codes (array-like): Packed codes, all at precision or finer
+            precision (int): Target precision (1-10)
+            
+        Returns:
+            numpy.ndarray: uint64 packed codes
+            
+        Raises:
+            ValueError: If precision is out of range or finer than a code
+        """
+        codes = np.asarray(codes, dtype=np.uint64)
+        if precision < 1 or precision > GRID_LEVELS:
+            raise ValueError(f'Precision must be between 1 and 10, got {precision}')
+        if codes.size and int((codes & np.uint64(15)).min()) < precision:
+            raise ValueError(f'Every code must be at precision {precision} or finer')
+        
+        mask = ~np.uint64((1 << (4 * (GRID_LEVELS + 1 - precision))) - 1)
+        return (codes & mask) | np.uint64(precision)
@@ -20,6 +20,8 @@ from qgis.PyQt.QtCore import QVariant
 
 from ..core.digipin_engine import DigipinEncoder, DigipinDecoder, DigipinValidator
 from ..core.constants import PRECISION_INFO, DEFAULT_PRECISION
+from ..core.columnar import columnar_format
+from ..core.streaming import is_geojson_seq
 
 
 class QDigipinMainDialog(QDialog):
@@ -31,6 +33,14 @@ class QDigipinMainDialog(QDialog):
         self.iface = iface
         self.plugin_dir = plugin_dir
         
+        # Running background grid task, if any
+        self.grid_task = None
+        
+        # Batch encoding jobs: queued tasks and their table rows
+        from .tasks import TaskQueue
+        self.batch_queue = TaskQueue(2, self.batch_job_finished)
+        self.batch_jobs = {}
+        
         self.setWindowTitle('Q-DIGIPIN India - Geocoding Tools')
         self.setMinimumSize(800, 600)
         
@@ -283,6 +293,14 @@ class QDigipinMainDialog(QDialog):
         self.output_field_name = QLineEdit('DIGIPIN')
         settings_layout.addRow('Output Field Name:', self.output_field_name)
         
+        self.batch_workers = QSpinBox()
+        self.batch_workers.setMinimum(0)
+        self.batch_workers.setMaximum(256)
+        self.batch_workers.setValue(1)
+        self.batch_workers.setSpecialValueText('All CPU cores')
+        self.batch_workers.setToolTip('Worker processes for file encoding (1 = encode in QGIS)')
+        settings_layout.addRow('Worker Processes:', self.batch_workers)
+        
         # Output options
         self.create_new_layer_check = QCheckBox('Create new layer with results')
         self.create_new_layer_check.setChecked(True)
@@ -291,15 +309,37 @@ class QDigipinMainDialog(QDialog):
         self.save_to_file_check = QCheckBox('Save output to file')
         settings_layout.addRow('', self.save_to_file_check)
         
+        self.bypass_undo_check = QCheckBox('Write codes directly to the data source (faster, cannot be undone)')
+        self.bypass_undo_check.setToolTip('Only used when encoding an existing layer in place')
+        settings_layout.addRow('', self.bypass_undo_check)
+        
+        self.batch_max_jobs = QSpinBox()
+        self.batch_max_jobs.setMinimum(1)
+        self.batch_max_jobs.setMaximum(8)
+        self.batch_max_jobs.setValue(self.batch_queue.max_running)
+        self.batch_max_jobs.valueChanged.connect(self.batch_queue.set_max_running)
+        settings_layout.addRow('Concurrent Jobs:', self.batch_max_jobs)
+        
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
         
-        # Process button
+        # Process button: every click queues a background job
         process_btn = QPushButton('Process and Encode to DIGIPIN')
         process_btn.setStyleSheet('QPushButton { font-weight: bold; padding: 8px; }')
         process_btn.clicked.connect(self.batch_process)
         layout.addWidget(process_btn)
         
+        # Job queue
+        self.batch_jobs_table = QTableWidget(0, 2)
+        self.batch_jobs_table.setHorizontalHeaderLabels(['Job', 'Status'])
+        self.batch_jobs_table.horizontalHeader().setStretchLastSection(True)
+        self.batch_jobs_table.setMaximumHeight(120)
+        layout.addWidget(self.batch_jobs_table)
+        
+        cancel_jobs_btn = QPushButton('Cancel All Jobs')
+        cancel_jobs_btn.clicked.connect(self.batch_queue.cancel_all)
+        layout.addWidget(cancel_jobs_btn)
+        
         # Results
         self.batch_result = QTextEdit()
         self.batch_result.setReadOnly(True)
@@ -356,11 +396,18 @@ class QDigipinMainDialog(QDialog):
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
         
-        # Generate button
-        generate_btn = QPushButton('🔲 Generate DIGIPIN Grid')
-        generate_btn.setStyleSheet('QPushButton { font-weight: bold; padding: 10px; background-color: #007bff; color: white; } QPushButton:hover { background-color: #0056b3; }')
-        generate_btn.clicked.connect(self.generate_grid)
-        layout.addWidget(generate_btn)
+        # Generate and cancel buttons
+        button_layout = QHBoxLayout()
+        self.grid_generate_btn = QPushButton('🔲 Generate DIGIPIN Grid')
+        self.grid_generate_btn.setStyleSheet('QPushButton { font-weight: bold; padding: 10px; background-color: #007bff; color: white; } QPushButton:hover { background-color: #0056b3; }')
+        self.grid_generate_btn.clicked.connect(self.generate_grid)
+        button_layout.addWidget(self.grid_generate_btn)
+        
+        self.grid_cancel_btn = QPushButton('Cancel')
+        self.grid_cancel_btn.setEnabled(False)
+        self.grid_cancel_btn.clicked.connect(self.cancel_grid)
+        button_layout.addWidget(self.grid_cancel_btn)
+        layout.addLayout(button_layout)
         
         # Info/Results
         self.grid_result = QTextEdit()
@@ -731,7 +778,9 @@ class QDigipinMainDialog(QDialog):
             self.layer_combo.addItem(layer.name(), layer)
     
     def batch_encode_layer(self):
-        """Batch encode all points in selected layer"""
+        """Queue a background job encoding all points in the selected layer"""
+        from .tasks import LayerEncodeTask
+        
         if self.layer_combo.count() == 0:
             QMessageBox.warning(self, 'Warning', 'No point layers available')
             return
@@ -752,87 +801,75 @@ class QDigipinMainDialog(QDialog):
         create_new = self.create_new_layer_check.isChecked()
         save_to_file = self.save_to_file_check.isChecked()
         
-        try:
-            # Determine which layer to work with
-            if create_new:
-                # Create a copy of the layer
-                target_layer = self.create_layer_copy(layer, f'{layer.name()}_DIGIPIN')
-            else:
-                # Work with the original layer
-                target_layer = layer
-            
-            # Add DIGIPIN field if it doesn't exist
-            if target_layer.fields().indexOf(field_name) == -1:
-                target_layer.dataProvider().addAttributes([QgsField(field_name, QVariant.String)])
-                target_layer.updateFields()
-            
-            field_idx = target_layer.fields().indexOf(field_name)
-            
-            # Start editing
-            target_layer.startEditing()
-            
-            # Show progress
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setMaximum(target_layer.featureCount())
-            
-            success_count = 0
-            error_count = 0
-            
-            # Process features
-            for i, feature in enumerate(target_layer.getFeatures()):
-                geom = feature.geometry()
-                if geom and not geom.isNull():
-                    point = geom.asPoint()
-                    try:
-                        digipin = DigipinEncoder.encode(point.y(), point.x(), precision)
-                        target_layer.changeAttributeValue(feature.id(), field_idx, digipin)
-                        success_count += 1
-                    except ValueError:
-                        error_count += 1
-                
-                self.progress_bar.setValue(i + 1)
-            
-            # Commit changes
-            target_layer.commitChanges()
-            
-            # Add new layer to project if created
-            if create_new:
+        task = LayerEncodeTask(
+            layer, field_name, precision,
+            new_layer_name=f'{layer.name()}_DIGIPIN' if create_new else None,
+            bypass_undo=self.bypass_undo_check.isChecked()
+        )
+        
+        def on_done(task):
+            target_layer = task.layer
+            if task.copy:
                 QgsProject.instance().addMapLayer(target_layer)
                 self.status_label.setText(f'Created new layer: {target_layer.name()}')
+            else:
+                self.status_label.setText(f'Batch encoding complete: {task.success_count} features processed')
             
-            # Save to file if requested
             if save_to_file:
                 self.save_layer_to_file(target_layer, field_name)
             
-            # Hide progress
-            self.progress_bar.setVisible(False)
-            
-            # Show results
-            result_text = f'''
+            rate = task.feature_count / max(task.elapsed, 1e-9)
+            self.batch_result.setHtml(f'''
 <b>Batch Encoding Complete</b><br>
 <br>
 Layer: {target_layer.name()}<br>
 Field: {field_name}<br>
 Precision: Level {precision}<br>
 <br>
-Successfully encoded: {success_count}<br>
-Errors: {error_count}<br>
-            '''
-            
-            self.batch_result.setHtml(result_text)
-            self.status_label.setText(f'Batch encoding complete: {success_count} features processed')
-            
-            QMessageBox.information(
-                self, 
-                'Success', 
-                f'Successfully encoded {success_count} features.\\nErrors: {error_count}'
+Successfully encoded: {task.success_count}<br>
+Errors: {task.error_count}<br>
+Throughput: {rate:,.0f} features/s<br>
+            ''')
+        
+        task.featuresEncoded.connect(
+            lambda count, rate: self.set_batch_job_status(
+                task, f'Running {count:,} / {task.total:,} ({rate:,.0f} features/s)'
             )
-            
-        except Exception as e:
-            if 'target_layer' in locals():
-                target_layer.rollBack()
-            self.progress_bar.setVisible(False)
-            QMessageBox.critical(self, 'Error', f'Batch encoding failed: {str(e)}')
+        )
+        self.submit_batch_job(task, f'Layer: {layer.name()}', on_done)
+    
+    def submit_batch_job(self, task, description, on_done):
+        """Add a job to the queue and the jobs table"""
+        row = self.batch_jobs_table.rowCount()
+        self.batch_jobs_table.insertRow(row)
+        self.batch_jobs_table.setItem(row, 0, QTableWidgetItem(description))
+        self.batch_jobs_table.setItem(row, 1, QTableWidgetItem('Queued'))
+        self.batch_jobs[task] = (row, on_done)
+        self.batch_queue.submit(task)
+        self.status_label.setText(f'Queued: {description} ({len(self.batch_queue)} jobs)')
+    
+    def set_batch_job_status(self, task, text):
+        """Show a job's status in the jobs table"""
+        if task in self.batch_jobs:
+            self.batch_jobs_table.item(self.batch_jobs[task][0], 1).setText(text)
+    
+    def batch_job_finished(self, task):
+        """Report a finished, failed or cancelled job and hand its results on"""
+        from qgis.core import QgsTask
+        
+        row, on_done = self.batch_jobs[task]
+        if task.status() == QgsTask.Complete and task.exception is None:
+            self.set_batch_job_status(task, 'Done')
+            del self.batch_jobs[task]
+            on_done(task)
+            return
+        
+        if task.exception is not None:
+            self.set_batch_job_status(task, f'Failed: {task.exception}')
+            QMessageBox.critical(self, 'Error', f'Batch encoding failed: {str(task.exception)}')
+        else:
+            self.set_batch_job_status(task, 'Cancelled')
+        del self.batch_jobs[task]
     
     def toggle_batch_source(self):
         """Toggle between layer and file input for batch processing"""
@@ -846,44 +883,49 @@ Errors: {error_count}<br>
             self,
             'Select Input File',
             '',
-            'Supported Files (*.csv *.geojson *.json);;CSV Files (*.csv);;GeoJSON Files (*.geojson *.json);;All Files (*.*)'
+            'Supported Files (*.csv *.geojson *.json *.geojsonl *.geojsons *.ndjson *.parquet *.pq *.arrow *.feather);;'
+            'CSV Files (*.csv);;GeoJSON Files (*.geojson *.json);;GeoJSONSeq Files (*.geojsonl *.geojsons *.ndjson);;'
+            'Parquet/Arrow Files (*.parquet *.pq *.arrow *.feather);;All Files (*.*)'
         )
         
         if file_path:
             self.file_path_input.setText(file_path)
             
-            # If CSV, try to detect lat/lon columns
-            if file_path.lower().endswith('.csv'):
+            # If CSV, Parquet or Arrow, try to detect lat/lon columns
+            if file_path.lower().endswith('.csv') or columnar_format(file_path):
                 self.detect_csv_columns(file_path)
     
     def detect_csv_columns(self, file_path):
-        """Detect and populate latitude/longitude columns from CSV"""
+        """Detect and populate latitude/longitude columns from CSV, Parquet or Arrow"""
         try:
-            import csv
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                headers = next(reader)
-                
-                self.csv_lat_combo.clear()
-                self.csv_lon_combo.clear()
-                
-                for header in headers:
-                    self.csv_lat_combo.addItem(header)
-                    self.csv_lon_combo.addItem(header)
-                
-                # Try to auto-select common column names
-                lat_keywords = ['lat', 'latitude', 'y']
-                lon_keywords = ['lon', 'long', 'longitude', 'x']
-                
-                for i, header in enumerate(headers):
-                    header_lower = header.lower()
-                    if any(kw in header_lower for kw in lat_keywords):
-                        self.csv_lat_combo.setCurrentIndex(i)
-                    if any(kw in header_lower for kw in lon_keywords):
-                        self.csv_lon_combo.setCurrentIndex(i)
-                        
+            if columnar_format(file_path):
+                from ..core.columnar import column_names
+                headers = column_names(file_path)
+            else:
+                import csv
+                with open(file_path, 'r', encoding='utf-8-sig') as f:
+                    headers = next(csv.reader(f))
+            
+            self.csv_lat_combo.clear()
+            self.csv_lon_combo.clear()
+            
+            for header in headers:
+                self.csv_lat_combo.addItem(header)
+                self.csv_lon_combo.addItem(header)
+            
+            # Try to auto-select common column names
+            lat_keywords = ['lat', 'latitude', 'y']
+            lon_keywords = ['lon', 'long', 'longitude', 'x']
+            
+            for i, header in enumerate(headers):
+                header_lower = header.lower()
+                if any(kw in header_lower for kw in lat_keywords):
+                    self.csv_lat_combo.setCurrentIndex(i)
+                if any(kw in header_lower for kw in lon_keywords):
+                    self.csv_lon_combo.setCurrentIndex(i)
+        
         except Exception as e:
-            QMessageBox.warning(self, 'Warning', f'Could not read CSV headers: {str(e)}')
+            QMessageBox.warning(self, 'Warning', f'Could not read column names: {str(e)}')
     
     def batch_process(self):
         """Main batch processing function"""
@@ -893,7 +935,11 @@ Errors: {error_count}<br>
             self.batch_encode_file()
     
     def batch_encode_file(self):
-        """Batch encode from CSV or GeoJSON file"""
+        """Queue a background job encoding a CSV, GeoJSON, Parquet or Arrow file"""
+        import os
+        import tempfile
+        from .tasks import FileEncodeTask
+        
         file_path = self.file_path_input.text()
         
         if not file_path:
@@ -907,245 +953,91 @@ Errors: {error_count}<br>
             QMessageBox.warning(self, 'Warning', 'Please enter a field name')
             return
         
-        try:
-            if file_path.lower().endswith('.csv'):
-                self.process_csv_file(file_path, precision, field_name)
-            elif file_path.lower().endswith(('.geojson', '.json')):
-                self.process_geojson_file(file_path, precision, field_name)
-            else:
-                QMessageBox.warning(self, 'Warning', 'Unsupported file format')
-                
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'File processing failed: {str(e)}')
-    
-    def process_csv_file(self, file_path, precision, field_name):
-        """Process CSV file and encode to DIGIPIN"""
-        import csv
-        import os
-        
+        lower = file_path.lower()
+        create_layer = self.create_new_layer_check.isChecked()
         lat_field = self.csv_lat_combo.currentText()
         lon_field = self.csv_lon_combo.currentText()
+        stem = os.path.splitext(file_path)[0]
+        temporary = False
         
-        if not lat_field or not lon_field:
-            QMessageBox.warning(self, 'Warning', 'Please select latitude and longitude fields')
-            return
-        
-        # Read CSV
-        rows = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            headers = reader.fieldnames
-            
-            # Add DIGIPIN field if not exists
-            if field_name not in headers:
-                headers = list(headers) + [field_name]
-            
-            self.progress_bar.setVisible(True)
-            success_count = 0
-            error_count = 0
-            
-            for row in reader:
-                try:
-                    lat = float(row[lat_field])
-                    lon = float(row[lon_field])
-                    digipin = DigipinEncoder.encode(lat, lon, precision)
-                    row[field_name] = digipin
-                    success_count += 1
-                except (ValueError, KeyError):
-                    row[field_name] = ''
-                    error_count += 1
-                
-                rows.append(row)
+        # Ask for outputs here: the job itself runs off the UI thread
+        if lower.endswith('.csv') or columnar_format(file_path):
+            if not lat_field or not lon_field:
+                QMessageBox.warning(self, 'Warning', 'Please select latitude and longitude fields')
+                return
         
-        # Save output
-        if self.save_to_file_check.isChecked():
+        if lower.endswith('.csv'):
+            kind, layer_name = 'CSV', 'CSV_DIGIPIN_Layer'
+            output_path = None
+            if self.save_to_file_check.isChecked():
+                output_path, _ = QFileDialog.getSaveFileName(
+                    self, 'Save Output CSV', stem + '_digipin.csv', 'CSV Files (*.csv)'
+                )
+                output_path = output_path or None
+        elif columnar_format(file_path):
+            # Columnar output always goes to a file, in the input's format by default
+            kind, layer_name = 'Columnar', 'Parquet_DIGIPIN_Layer'
             output_path, _ = QFileDialog.getSaveFileName(
-                self,
-                'Save Output CSV',
-                os.path.splitext(file_path)[0] + '_digipin.csv',
-                'CSV Files (*.csv)'
+                self, 'Save Output File', stem + '_digipin' + os.path.splitext(file_path)[1],
+                'Parquet Files (*.parquet *.pq);;Arrow Files (*.arrow *.feather)'
             )
+            if not output_path:
+                return
+        elif lower.endswith(('.geojson', '.json')) or is_geojson_seq(file_path):
+            kind, layer_name = 'GeoJSON', 'GeoJSON_DIGIPIN_Layer'
+            output_path = None
+            if self.save_to_file_check.isChecked():
+                output_path, _ = QFileDialog.getSaveFileName(
+                    self, 'Save Output GeoJSON', stem + '_digipin.geojson',
+                    'GeoJSON Files (*.geojson *.json);;GeoJSONSeq Files (*.geojsonl *.geojsons)'
+                )
+                output_path = output_path or None
             
-            if output_path:
-                with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=headers)
-                    writer.writeheader()
-                    writer.writerows(rows)
-                
-                self.status_label.setText(f'Saved to: {output_path}')
-        
-        # Create layer if requested
-        if self.create_new_layer_check.isChecked():
-            self.create_layer_from_csv_data(rows, lat_field, lon_field, field_name, 'CSV_DIGIPIN_Layer')
-        
-        self.progress_bar.setVisible(False)
-        
-        # Show results
-        result_text = f'''
-<b>CSV Processing Complete</b><br>
-<br>
-File: {os.path.basename(file_path)}<br>
-Field: {field_name}<br>
-Precision: Level {precision}<br>
-<br>
-Successfully encoded: {success_count}<br>
-Errors: {error_count}<br>
-        '''
-        
-        self.batch_result.setHtml(result_text)
-        QMessageBox.information(self, 'Success', f'Processed {success_count} records.\nErrors: {error_count}')
-    
-    def process_geojson_file(self, file_path, precision, field_name):
-        """Process GeoJSON file and encode to DIGIPIN"""
-        import json
-        import os
-        
-        # Read GeoJSON
-        with open(file_path, 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        
-        if 'features' not in geojson_data:
-            QMessageBox.warning(self, 'Warning', 'Invalid GeoJSON format')
+            # A new layer is loaded from the output; without one, from a temporary GeoJSONSeq
+            if create_layer and not output_path:
+                handle, output_path = tempfile.mkstemp(prefix='digipin_', suffix='.geojsonl')
+                os.close(handle)
+                temporary = True
+        else:
+            QMessageBox.warning(self, 'Warning', 'Unsupported file format')
             return
         
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(geojson_data['features']))
-        
-        success_count = 0
-        error_count = 0
-        
-        for i, feature in enumerate(geojson_data['features']):
-            try:
-                geom = feature['geometry']
-                if geom['type'] == 'Point':
-                    lon, lat = geom['coordinates']
-                    digipin = DigipinEncoder.encode(lat, lon, precision)
-                    
-                    if 'properties' not in feature:
-                        feature['properties'] = {}
-                    feature['properties'][field_name] = digipin
-                    success_count += 1
-                else:
-                    error_count += 1
-            except (ValueError, KeyError, TypeError):
-                error_count += 1
-            
-            self.progress_bar.setValue(i + 1)
-        
-        # Save output
-        if self.save_to_file_check.isChecked():
-            output_path, _ = QFileDialog.getSaveFileName(
-                self,
-                'Save Output GeoJSON',
-                os.path.splitext(file_path)[0] + '_digipin.geojson',
-                'GeoJSON Files (*.geojson *.json)'
+        try:
+            task = FileEncodeTask(
+                file_path, output_path, precision, field_name, lat_field, lon_field,
+                layer_name if create_layer else None, self.batch_workers.value()
             )
-            
-            if output_path:
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(geojson_data, f, indent=2)
-                
-                self.status_label.setText(f'Saved to: {output_path}')
-        
-        # Create layer if requested
-        if self.create_new_layer_check.isChecked():
-            self.create_layer_from_geojson(geojson_data, 'GeoJSON_DIGIPIN_Layer')
-        
-        self.progress_bar.setVisible(False)
+        except Exception as e:
+            QMessageBox.critical(self, 'Error', f'File processing failed: {str(e)}')
+            return
         
-        # Show results
-        result_text = f'''
-<b>GeoJSON Processing Complete</b><br>
+        def on_done(task):
+            stats = task.stats
+            if task.layer is not None:
+                QgsProject.instance().addMapLayer(task.layer)
+                self.status_label.setText(f'Created layer: {task.layer.name()}')
+            if output_path and not temporary:
+                self.status_label.setText(f'Saved to: {output_path}')
+            
+            count = stats.get('rows', stats.get('features'))
+            rate = stats.get('rows_per_second', stats.get('features_per_second'))
+            self.batch_result.setHtml(f'''
+<b>{kind} Processing Complete</b><br>
 <br>
 File: {os.path.basename(file_path)}<br>
 Field: {field_name}<br>
 Precision: Level {precision}<br>
 <br>
-Successfully encoded: {success_count}<br>
-Errors: {error_count}<br>
-        '''
-        
-        self.batch_result.setHtml(result_text)
-        QMessageBox.information(self, 'Success', f'Processed {success_count} features.\nErrors: {error_count}')
-    
-    def create_layer_from_csv_data(self, rows, lat_field, lon_field, digipin_field, layer_name):
-        """Create a point layer from CSV data"""
-        layer = QgsVectorLayer('Point?crs=EPSG:4326', layer_name, 'memory')
-        provider = layer.dataProvider()
-        
-        # Add fields from CSV
-        if rows:
-            fields = []
-            for key in rows[0].keys():
-                fields.append(QgsField(key, QVariant.String))
-            provider.addAttributes(fields)
-            layer.updateFields()
-            
-            # Add features
-            for row in rows:
-                try:
-                    lat = float(row[lat_field])
-                    lon = float(row[lon_field])
-                    
-                    feature = QgsFeature()
-                    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(lon, lat)))
-                    feature.setAttributes(list(row.values()))
-                    provider.addFeature(feature)
-                except (ValueError, KeyError):
-                    pass
-            
-            layer.updateExtents()
-            QgsProject.instance().addMapLayer(layer)
-            self.status_label.setText(f'Created layer: {layer_name}')
-    
-    def create_layer_from_geojson(self, geojson_data, layer_name):
-        """Create a layer from GeoJSON data"""
-        import tempfile
-        import json
-        import os
-        
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.geojson', delete=False, encoding='utf-8')
-        json.dump(geojson_data, temp_file)
-        temp_file.close()
-        
-        # Load as layer
-        layer = QgsVectorLayer(temp_file.name, layer_name, 'ogr')
-        
-        if layer.isValid():
-            QgsProject.instance().addMapLayer(layer)
-            self.status_label.setText(f'Created layer: {layer_name}')
-        
-        # Clean up temp file
-        try:
-            os.unlink(temp_file.name)
-        except:
-            pass
-    
-    def create_layer_copy(self, source_layer, new_name):
-        """Create a copy of a layer with a new name"""
-        # Create memory layer with same geometry type and CRS
-        geom_type = source_layer.geometryType()
-        geom_type_str = 'Point' if geom_type == QgsWkbTypes.PointGeometry else 'Polygon' if geom_type == QgsWkbTypes.PolygonGeometry else 'LineString'
-        crs = source_layer.crs().authid()
-        
-        new_layer = QgsVectorLayer(f'{geom_type_str}?crs={crs}', new_name, 'memory')
-        provider = new_layer.dataProvider()
-        
-        # Copy fields
-        provider.addAttributes(source_layer.fields().toList())
-        new_layer.updateFields()
-        
-        # Copy features
-        features = []
-        for feature in source_layer.getFeatures():
-            new_feature = QgsFeature(feature)
-            features.append(new_feature)
-        
-        provider.addFeatures(features)
-        new_layer.updateExtents()
-        
-        return new_layer
+Records read: {count}<br>
+Successfully encoded: {stats['success']}<br>
+Errors: {stats['errors']}<br>
+Throughput: {rate:,.0f} records/s<br>
+            ''')
+        
+        task.chunkEncoded.connect(
+            lambda fraction: self.set_batch_job_status(task, f'Running {fraction:.0%}')
+        )
+        self.submit_batch_job(task, f'{kind}: {os.path.basename(file_path)}', on_done)
     
     def save_layer_to_file(self, layer, field_name):
         """Save layer to file (CSV or GeoJSON)"""
@@ -1254,9 +1146,13 @@ Errors: {error_count}<br>
             self.grid_warning_label.setText('')
     
     def generate_grid(self):
-        """Generate DIGIPIN grid"""
-        from qgis.core import QgsRectangle
+        """Generate DIGIPIN grid in a background task"""
+        from qgis.core import QgsApplication
         from ..core.grid_utils import OptimizedGridGenerator
+        from .tasks import GridGenerationTask
+        
+        if self.grid_task is not None:
+            return
         
         precision = self.grid_precision.value()
         extent_type = self.grid_extent_combo.currentText()
@@ -1282,44 +1178,71 @@ Errors: {error_count}<br>
             reply = QMessageBox.question(
                 self,
                 'Large Grid Warning',
-                f'Estimated {estimated_cells:,} cells. This may take a long time and use significant memory.\n\nContinue anyway?',
+                f'The grid has {estimated_cells:,} cells. This may take a long time and use significant memory.\n\nContinue anyway?',
                 QMessageBox.Yes | QMessageBox.No
             )
             if reply == QMessageBox.No:
                 return
         
-        try:
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            self.status_label.setText('Generating grid...')
-            
-            # Progress callback
-            def update_progress(value):
-                self.progress_bar.setValue(value)
-                from qgis.PyQt.QtWidgets import QApplication
-                QApplication.processEvents()
-            
-            # Generate grid
-            max_cells = 50000 if precision >= 8 else 100000
-            layer = OptimizedGridGenerator.generate_grid_chunked(
-                extent,
-                precision,
-                progress_callback=update_progress,
-                max_cells=max_cells
+        max_cells = 50000 if precision >= 8 else 100000
+        task = GridGenerationTask(extent, precision, max_cells)
+        task.progressChanged.connect(lambda value: self.progress_bar.setValue(int(value)))
+        task.cellsWritten.connect(
+            lambda cells, rate: self.status_label.setText(
+                f'Generating grid... {cells:,} / {task.total:,} cells ({rate:,.0f} cells/s)'
             )
-            
-            # Apply styling
-            style_type = self.grid_style_combo.currentText()
-            self.apply_grid_style(layer, style_type, precision)
-            
-            # Add to project
-            QgsProject.instance().addMapLayer(layer)
-            
-            self.progress_bar.setVisible(False)
-            
-            # Show results
-            cell_count = layer.featureCount()
-            result_text = f'''
+        )
+        task.taskCompleted.connect(lambda: self.grid_task_finished(task))
+        task.taskTerminated.connect(lambda: self.grid_task_finished(task))
+        
+        # Keep a reference: the task manager does not own the Python object
+        self.grid_task = task
+        self.grid_generate_btn.setEnabled(False)
+        self.grid_cancel_btn.setEnabled(True)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.status_label.setText('Generating grid...')
+        
+        QgsApplication.taskManager().addTask(task)
+    
+    def cancel_grid(self):
+        """Cancel the running grid task; it stops after the current batch"""
+        if self.grid_task is not None:
+            self.grid_cancel_btn.setEnabled(False)
+            self.status_label.setText('Cancelling grid generation...')
+            self.grid_task.cancel()
+    
+    def grid_task_finished(self, task):
+        """Add the grid layer of a completed task, or report why it stopped"""
+        from qgis.core import QgsTask
+        
+        self.grid_task = None
+        self.grid_generate_btn.setEnabled(True)
+        self.grid_cancel_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        
+        if task.status() != QgsTask.Complete:
+            if task.exception is not None:
+                self.status_label.setText('Grid generation failed')
+                QMessageBox.critical(self, 'Error', f'Grid generation failed: {str(task.exception)}')
+            else:
+                self.status_label.setText(f'Grid generation cancelled after {task.cell_count:,} cells')
+            return
+        
+        layer = task.layer
+        precision = task.precision
+        
+        # Apply styling
+        style_type = self.grid_style_combo.currentText()
+        self.apply_grid_style(layer, style_type, precision)
+        
+        # Add to project
+        QgsProject.instance().addMapLayer(layer)
+        
+        # Show results
+        cell_count = task.cell_count
+        rate = cell_count / max(task.elapsed, 1e-9)
+        result_text = f'''
 <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 15px; border-radius: 10px; color: white;">
     <h3 style="margin: 0 0 10px 0; color: #fff;">✓ Grid Generated Successfully</h3>
 </div>
@@ -1328,18 +1251,13 @@ Errors: {error_count}<br>
     <p style="margin: 5px 0; color: #495057;"><b>📊 Grid Statistics:</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Precision Level: <b>{precision}</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Total Cells: <b>{cell_count:,}</b></p>
+    <p style="margin: 5px 0 5px 20px; color: #6c757d;">Time: <b>{task.elapsed:.1f} s ({rate:,.0f} cells/s)</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Style: <b>{style_type}</b></p>
 </div>
             '''
-            
-            self.grid_result.setHtml(result_text)
-            self.status_label.setText(f'✓ Grid generated: {cell_count:,} cells')
-            
-            QMessageBox.information(self, 'Success', f'Grid generated with {cell_count:,} cells')
-            
-        except Exception as e:
-            self.progress_bar.setVisible(False)
-            QMessageBox.critical(self, 'Error', f'Grid generation failed: {str(e)}')
+        
+        self.grid_result.setHtml(result_text)
+        self.status_label.setText(f'✓ Grid generated: {cell_count:,} cells')
     
     def apply_grid_style(self, layer, style_type, precision):
         """Apply styling to grid layer"""
@@ -1496,6 +1414,7 @@ Errors: {error_count}<br>
 <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-top: 10px;">
     <p style="margin: 5px 0; color: #495057;"><b>📊 Coverage Statistics:</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Unique Cells: <b>{stats.get('unique_cells', 0):,}</b></p>
+    <p style="margin: 5px 0 5px 20px; color: #6c757d;">Compacted Cells: <b>{stats.get('compacted_cells', 0):,}</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Total Features: <b>{stats.get('total_features', 0):,}</b></p>
 </div>
 
@@ -1512,7 +1431,8 @@ Errors: {error_count}<br>
     
     def run_neighbor_analysis(self, layer, digipin_field):
         """Run neighbor analysis"""
-        from ..core.analysis_utils import DigipinSpatialAnalysis
+        from ..core.packed import PackedDigipin
+        from ..core.topology import DigipinTopology
         
         include_diagonals = self.analysis_include_diagonals.isChecked()
         
@@ -1522,22 +1442,25 @@ Errors: {error_count}<br>
             QMessageBox.warning(self, 'Warning', 'DIGIPIN field not found')
             return
         
-        unique_digipins = set()
+        unique_codes = set()
         for feature in layer.getFeatures():
             digipin = feature.attribute(digipin_field)
             if digipin:
-                unique_digipins.add(digipin.replace('-', ''))
-        
-        # Analyze first few DIGIPINs (to prevent long processing)
-        sample_size = min(10, len(unique_digipins))
-        sample_digipins = list(unique_digipins)[:sample_size]
+                try:
+                    unique_codes.add(PackedDigipin.pack(str(digipin)))
+                except ValueError:
+                    continue
         
-        neighbor_counts = []
-        for digipin in sample_digipins:
-            neighbors = DigipinSpatialAnalysis.find_neighbors(digipin, include_diagonals)
-            neighbor_counts.append(len(neighbors))
+        # Neighbors are computed on the integer grid, so every cell is analyzed
+        sample_size = len(unique_codes)
+        neighbor_lists = DigipinTopology.neighbors_batch(unique_codes, include_diagonals)
+        neighbor_counts = [len(neighbors) for neighbors in neighbor_lists]
+        adjacency = DigipinTopology.adjacency(unique_codes, include_diagonals)
+        occupied_counts = [len(neighbors) for neighbors in adjacency.values()]
         
         avg_neighbors = sum(neighbor_counts) / len(neighbor_counts) if neighbor_counts else 0
+        avg_occupied = sum(occupied_counts) / len(occupied_counts) if occupied_counts else 0
+        isolated = sum(1 for count in occupied_counts if count == 0)
         
         result_text = f'''
 <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 15px; border-radius: 10px; color: white;">
@@ -1548,6 +1471,8 @@ Errors: {error_count}<br>
     <p style="margin: 5px 0; color: #495057;"><b>📊 Neighbor Statistics:</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Analyzed Cells: <b>{sample_size}</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Average Neighbors: <b>{avg_neighbors:.1f}</b></p>
+    <p style="margin: 5px 0 5px 20px; color: #6c757d;">Average Occupied Neighbors: <b>{avg_occupied:.2f}</b></p>
+    <p style="margin: 5px 0 5px 20px; color: #6c757d;">Isolated Cells: <b>{isolated:,}</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Include Diagonals: <b>{'Yes' if include_diagonals else 'No'}</b></p>
 </div>
         '''
@@ -1555,28 +1480,32 @@ Errors: {error_count}<br>
         self.analysis_result.setHtml(result_text)
         self.status_label.setText(f'✓ Neighbor analysis complete')
         
-        QMessageBox.information(self, 'Success', f'Analyzed {sample_size} cells')
+        QMessageBox.information(self, 'Success', f'Analyzed {sample_size:,} cells')
     
     def run_distance_analysis(self, layer, digipin_field):
         """Run distance matrix analysis"""
         from ..core.analysis_utils import DigipinSpatialAnalysis
         
-        # Calculate distance matrix (limited to first 50 features)
-        matrix = DigipinSpatialAnalysis.calculate_distance_matrix(layer, digipin_field, max_features=50)
+        import numpy
+        
+        # Calculate distance matrix (limited to the first 2,000 features).
+        # Haversine keeps this fast enough for the UI thread; it is within
+        # 0.5% of the ellipsoid, which is plenty for summary statistics
+        digipins, matrix = DigipinSpatialAnalysis.calculate_distance_array(
+            layer, digipin_field, max_features=2000, method='haversine'
+        )
         
-        if not matrix:
+        if not digipins:
             QMessageBox.warning(self, 'Warning', 'No valid DIGIPIN data found')
             return
         
-        # Calculate statistics
-        all_distances = []
-        for digipin1, distances in matrix.items():
-            all_distances.extend(distances.values())
+        # Calculate statistics over each pair once
+        all_distances = matrix[numpy.triu_indices(len(digipins), 1)]
         
-        if all_distances:
-            avg_distance = sum(all_distances) / len(all_distances)
-            min_distance = min(all_distances)
-            max_distance = max(all_distances)
+        if all_distances.size:
+            avg_distance = float(all_distances.mean())
+            min_distance = float(all_distances.min())
+            max_distance = float(all_distances.max())
         else:
             avg_distance = min_distance = max_distance = 0
         
@@ -1587,7 +1516,7 @@ Errors: {error_count}<br>
 
 <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-top: 10px;">
     <p style="margin: 5px 0; color: #495057;"><b>📊 Distance Statistics:</b></p>
-    <p style="margin: 5px 0 5px 20px; color: #6c757d;">Analyzed Points: <b>{len(matrix)}</b></p>
+    <p style="margin: 5px 0 5px 20px; color: #6c757d;">Analyzed Points: <b>{len(digipins):,}</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Average Distance: <b>{avg_distance:.2f} km</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Minimum Distance: <b>{min_distance:.2f} km</b></p>
     <p style="margin: 5px 0 5px 20px; color: #6c757d;">Maximum Distance: <b>{max_distance:.2f} km</b></p>
@@ -1597,6 +1526,6 @@ Errors: {error_count}<br>
         self.analysis_result.setHtml(result_text)
         self.status_label.setText(f'✓ Distance analysis complete')
         
-        QMessageBox.information(self, 'Success', f'Distance matrix calculated for {len(matrix)} points')
+        QMessageBox.information(self, 'Success', f'Distance matrix calculated for {len(digipins):,} points')
 
 
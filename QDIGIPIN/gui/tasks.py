@@ -0,0 +1,470 @@
+"""
+Background tasks for the main dialog
+Tasks run on the QGIS task manager, off the UI thread; their results are
+picked up by the dialog when the task manager reports them finished
+"""
+
+import csv
+import time
+from collections import deque
+
+from qgis.core import (
+    QgsApplication, QgsTask, QgsRectangle, QgsFeature, QgsFeatureRequest,
+    QgsField, QgsGeometry, QgsPointXY, QgsVectorLayer,
+    QgsVectorLayerFeatureSource, QgsWkbTypes
+)
+from qgis.PyQt.QtCore import QVariant, pyqtSignal
+
+from ..core.columnar import column_names, columnar_format
+from ..core.grid_utils import OptimizedGridGenerator
+from ..core.streaming import DEFAULT_CHUNK_SIZE, encode_coordinates
+
+
+def create_text_layer(fieldnames, layer_name):
+    """Create an empty point layer with a String field per column"""
+    layer = QgsVectorLayer('Point?crs=EPSG:4326', layer_name, 'memory')
+    layer.dataProvider().addAttributes([QgsField(name, QVariant.String) for name in fieldnames])
+    layer.updateFields()
+    return layer
+
+
+def add_rows_to_layer(layer, rows, lat_field, lon_field):
+    """Add one chunk of row dictionaries to a layer in a single provider call"""
+    names = layer.fields().names()
+    features = []
+    for row in rows:
+        try:
+            lat = float(row[lat_field])
+            lon = float(row[lon_field])
+        except (TypeError, ValueError, KeyError):
+            continue
+        
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(lon, lat)))
+        feature.setAttributes([row.get(name) for name in names])
+        features.append(feature)
+    
+    layer.dataProvider().addFeatures(features)
+
+
+class TaskQueue:
+    """
+    Run tasks on the QGIS task manager, at most max_running at a time
+    
+    Tasks wait in submission order. The queue keeps a reference to every
+    task until it has finished, since the task manager does not own the
+    Python objects.
+    """
+    
+    def __init__(self, max_running=2, on_finished=None):
+        """
+        Args:
+            max_running (int): Tasks allowed to run at once
+            on_finished (callable): Called as on_finished(task) when a task
+                completes, fails or is cancelled (also before it started)
+        """
+        self.max_running = max_running
+        self.on_finished = on_finished
+        self.pending = deque()
+        self.running = []
+    
+    def __len__(self):
+        return len(self.pending) + len(self.running)
+    
+    def submit(self, task):
+        """Queue a task, starting it at once if a slot is free"""
+        self.pending.append(task)
+        self.start_next()
+    
+    def set_max_running(self, max_running):
+        """Change the concurrency limit; running tasks are not interrupted"""
+        self.max_running = max_running
+        self.start_next()
+    
+    def start_next(self):
+        """Start queued tasks while slots are free"""
+        while self.pending and len(self.running) < self.max_running:
+            task = self.pending.popleft()
+            self.running.append(task)
+            task.taskCompleted.connect(lambda task=task: self.finish(task))
+            task.taskTerminated.connect(lambda task=task: self.finish(task))
+            QgsApplication.taskManager().addTask(task)
+    
+    def finish(self, task):
+        """Release a finished task's slot and start the next one"""
+        if task in self.running:
+            self.running.remove(task)
+        if self.on_finished is not None:
+            self.on_finished(task)
+        self.start_next()
+    
+    def cancel_all(self):
+        """Drop queued tasks and cancel running ones"""
+        pending = list(self.pending)
+        self.pending.clear()
+        for task in pending:
+            if self.on_finished is not None:
+                self.on_finished(task)
+        for task in list(self.running):
+            task.cancel()
+
+
+class GridGenerationTask(QgsTask):
+    """Generate a DIGIPIN grid into a memory layer in the background"""
+    
+    # Cells written so far and the write rate in cells per second
+    cellsWritten = pyqtSignal(int, float)
+    
+    def __init__(self, extent, precision, max_cells=None, batch_size=5000):
+        """
+        Args:
+            extent: QgsRectangle defining the area (EPSG:4326)
+            precision: Precision level (1-10)
+            max_cells: Maximum cells to generate (default: no limit)
+            batch_size: Features written to the provider at a time
+        """
+        super().__init__(f'Generating DIGIPIN grid (level {precision})', QgsTask.CanCancel)
+        self.extent = QgsRectangle(extent)
+        self.precision = precision
+        self.max_cells = max_cells
+        self.batch_size = batch_size
+        
+        self.stream = OptimizedGridGenerator.grid_stream(self.extent, precision, max_cells, batch_size)
+        self.total = self.stream.total
+        
+        # Created here on the UI thread; the task only writes to its provider
+        # and the layer is not added to the project until the task finishes
+        self.layer = OptimizedGridGenerator.create_layer(precision)
+        self.cell_count = 0
+        self.elapsed = 0.0
+        self.exception = None
+    
+    def run(self):
+        """Write the grid in batches, stopping at the first batch after a cancel"""
+        provider = self.layer.dataProvider()
+        stream = self.stream
+        
+        def progress(count, total):
+            self.cell_count = count
+            self.elapsed = stream.seconds
+            self.setProgress(count * 100 / max(total, 1))
+            self.cellsWritten.emit(count, stream.cells_per_second)
+            return not self.isCanceled()
+        
+        try:
+            for features in OptimizedGridGenerator.feature_batches(stream, progress=progress):
+                provider.addFeatures(features)
+        except Exception as e:
+            self.exception = e
+            return False
+        
+        self.elapsed = stream.seconds
+        return not stream.canceled
+    
+    def finished(self, result):
+        """Runs on the UI thread once run() has returned"""
+        if result:
+            self.layer.updateExtents()
+
+
+class LayerEncodeTask(QgsTask):
+    """
+    Encode the points of a vector layer to DIGIPIN codes in the background
+    
+    Features are read from a snapshot of the layer in blocks and encoded a
+    block at a time. Into a new layer, encoded features are added to the
+    copy's provider as each block finishes. In place, only geometries are
+    read and the codes are applied in finished(), on the UI thread, in one
+    go: through the edit buffer as one undo command, or with
+    bypass_undo straight to the data provider. A missing output field is
+    only added to the layer then, after a successful run.
+    """
+    
+    # Features encoded so far and the rate in features per second
+    featuresEncoded = pyqtSignal(int, float)
+    
+    def __init__(self, layer, field_name, precision, new_layer_name=None, bypass_undo=False,
+                 block_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            layer (QgsVectorLayer): Point layer to encode
+            field_name (str): Output field, added if missing
+            precision (int): Precision level (1-10)
+            new_layer_name (str): Write to a new memory layer with this name
+                instead of changing layer
+            bypass_undo (bool): Write in-place results with
+                dataProvider().changeAttributeValues, outside the undo stack
+            block_size (int): Features encoded at a time
+        """
+        super().__init__(f'Encoding {layer.name()} to DIGIPIN', QgsTask.CanCancel)
+        self.source_layer = layer
+        self.field_name = field_name
+        self.precision = precision
+        self.bypass_undo = bypass_undo
+        self.block_size = block_size
+        self.copy = new_layer_name is not None
+        
+        # Snapshot that can be read from the task's thread
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.total = layer.featureCount()
+        
+        if self.copy:
+            uri = f'{QgsWkbTypes.displayString(layer.wkbType())}?crs={layer.crs().authid()}'
+            self.layer = QgsVectorLayer(uri, new_layer_name, 'memory')
+            self.layer.dataProvider().addAttributes(layer.fields().toList())
+            self.layer.updateFields()
+            self.append_field = self.layer.fields().indexOf(field_name) == -1
+            if self.append_field:
+                self.layer.dataProvider().addAttributes([QgsField(field_name, QVariant.String)])
+                self.layer.updateFields()
+            self.field_idx = self.layer.fields().indexOf(field_name)
+        else:
+            self.layer = layer
+            self.append_field = False
+            self.field_idx = None
+        
+        # In-place codes by feature ID, applied in finished()
+        self.changes = {}
+        self.feature_count = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.elapsed = 0.0
+        self.exception = None
+    
+    def run(self):
+        """Read and encode blocks of features, stopping between blocks when cancelled"""
+        request = QgsFeatureRequest()
+        if not self.copy:
+            request.setNoAttributes()
+        
+        start = time.perf_counter()
+        try:
+            block = []
+            for feature in self.source.getFeatures(request):
+                block.append(feature)
+                if len(block) >= self.block_size:
+                    if self.isCanceled():
+                        return False
+                    self.encode_block(block, start)
+                    block = []
+            
+            if block and not self.isCanceled():
+                self.encode_block(block, start)
+        except Exception as e:
+            self.exception = e
+            return False
+        
+        self.elapsed = time.perf_counter() - start
+        return not self.isCanceled()
+    
+    def encode_block(self, block, start):
+        """Encode one block and add it to the copy or to the pending changes"""
+        lats = []
+        lons = []
+        for feature in block:
+            geom = feature.geometry()
+            if geom is None or geom.isNull():
+                lats.append(None)
+                lons.append(None)
+                continue
+            point = geom.centroid().asPoint() if geom.isMultipart() else geom.asPoint()
+            lats.append(point.y())
+            lons.append(point.x())
+        
+        codes = encode_coordinates(lats, lons, self.precision)
+        errors = codes.count(None)
+        
+        if self.copy:
+            for feature, code in zip(block, codes):
+                attributes = feature.attributes()
+                if self.append_field:
+                    attributes.append(code)
+                else:
+                    attributes[self.field_idx] = code
+                feature.setAttributes(attributes)
+            self.layer.dataProvider().addFeatures(block)
+        else:
+            self.changes.update(
+                (feature.id(), code) for feature, code in zip(block, codes) if code is not None
+            )
+        
+        self.feature_count += len(block)
+        self.success_count += len(block) - errors
+        self.error_count += errors
+        self.elapsed = time.perf_counter() - start
+        
+        self.setProgress(self.feature_count * 100 / max(self.total, 1))
+        self.featuresEncoded.emit(self.feature_count, self.feature_count / max(self.elapsed, 1e-9))
+    
+    def finished(self, result):
+        """Runs on the UI thread: apply in-place codes to the layer"""
+        if not result:
+            return
+        if self.copy:
+            self.layer.updateExtents()
+            return
+        if not self.changes:
+            return
+        
+        layer = self.layer
+        field = QgsField(self.field_name, QVariant.String)
+        if self.bypass_undo:
+            provider = layer.dataProvider()
+            if layer.fields().indexOf(self.field_name) == -1:
+                if not provider.addAttributes([field]):
+                    self.exception = ValueError(f'The data provider could not add the field {self.field_name}')
+                    return
+                layer.updateFields()
+            field_idx = layer.fields().indexOf(self.field_name)
+            changes = {fid: {field_idx: code} for fid, code in self.changes.items()}
+            if not provider.changeAttributeValues(changes):
+                self.exception = ValueError('The data provider rejected the attribute changes')
+            layer.reload()
+            layer.triggerRepaint()
+            self.changes = {}
+            return
+        
+        # One undo command, which also removes a field it added; an edit
+        # session the user already had stays open
+        started = not layer.isEditable()
+        if started:
+            layer.startEditing()
+        layer.beginEditCommand(f'Encode {self.field_name} to DIGIPIN')
+        if layer.fields().indexOf(self.field_name) == -1 and not layer.addAttribute(field):
+            layer.destroyEditCommand()
+            if started:
+                layer.rollBack()
+            self.exception = ValueError(f'Could not add the field {self.field_name}')
+            return
+        field_idx = layer.fields().indexOf(self.field_name)
+        for fid, code in self.changes.items():
+            layer.changeAttributeValues(fid, {field_idx: code})
+        layer.endEditCommand()
+        if started and not layer.commitChanges():
+            self.exception = ValueError('; '.join(layer.commitErrors()))
+            layer.rollBack()
+        self.changes = {}
+
+
+class FileEncodeTask(QgsTask):
+    """
+    Encode a CSV, GeoJSON, Parquet or Arrow file in the background
+    
+    Runs the streaming file encoders of core.streaming and core.columnar,
+    checking for cancellation after every chunk. CSV and columnar rows can
+    be collected into a new memory layer as they are encoded; a GeoJSON
+    output is loaded as a layer in finished().
+    """
+    
+    # Fraction of the input done (0-1)
+    chunkEncoded = pyqtSignal(float)
+    
+    def __init__(self, file_path, output_path, precision, field_name, lat_field=None, lon_field=None,
+                 layer_name=None, workers=1):
+        """
+        Args:
+            file_path (str): Input file
+            output_path (str): Output file (None: only build the layer; required
+                for GeoJSON layers and columnar input)
+            precision (int): Precision level (1-10)
+            field_name (str): Output column
+            lat_field (str): Latitude column (CSV and columnar)
+            lon_field (str): Longitude column (CSV and columnar)
+            layer_name (str): Create a layer with this name from the results
+            workers (int): Worker processes for CSV files
+            
+        Raises:
+            ValueError: If the input format is not supported
+        """
+        super().__init__(f'Encoding {file_path} to DIGIPIN', QgsTask.CanCancel)
+        lower = file_path.lower()
+        if lower.endswith('.csv'):
+            self.kind = 'csv'
+        elif columnar_format(file_path):
+            self.kind = 'columnar'
+        else:
+            from ..core.streaming import is_geojson_seq
+            if not (lower.endswith(('.geojson', '.json')) or is_geojson_seq(file_path)):
+                raise ValueError(f'Unsupported file format: {file_path}')
+            self.kind = 'geojson'
+        
+        self.file_path = file_path
+        self.output_path = output_path
+        self.precision = precision
+        self.field_name = field_name
+        self.lat_field = lat_field
+        self.lon_field = lon_field
+        self.layer_name = layer_name
+        self.workers = workers
+        
+        # Row layers are created here, on the UI thread, and filled by run()
+        self.layer = None
+        if layer_name and self.kind != 'geojson':
+            if self.kind == 'csv':
+                with open(file_path, newline='', encoding='utf-8-sig') as f:
+                    fieldnames = next(csv.reader(f), [])
+            else:
+                fieldnames = column_names(file_path)
+            if field_name not in fieldnames:
+                fieldnames = list(fieldnames) + [field_name]
+            self.layer = create_text_layer(fieldnames, layer_name)
+        
+        self.stats = None
+        self.exception = None
+    
+    def report(self, fraction):
+        """Publish progress; False once the task is cancelled"""
+        self.setProgress(fraction * 100)
+        self.chunkEncoded.emit(fraction)
+        return not self.isCanceled()
+    
+    def run(self):
+        """Run the file encoder for the input format"""
+        try:
+            if self.kind == 'csv':
+                from ..core.streaming import encode_csv_file
+                
+                def on_chunk(rows, fieldnames, fraction):
+                    if self.layer is not None:
+                        add_rows_to_layer(self.layer, rows, self.lat_field, self.lon_field)
+                    return self.report(fraction)
+                
+                self.stats = encode_csv_file(
+                    self.file_path, self.output_path, self.lat_field, self.lon_field,
+                    self.precision, self.field_name, on_chunk=on_chunk, workers=self.workers
+                )
+            elif self.kind == 'columnar':
+                from ..core.columnar import encode_columnar_file
+                
+                def on_batch(batch, rows_done, total_rows):
+                    if self.layer is not None:
+                        add_rows_to_layer(self.layer, batch.to_pylist(), self.lat_field, self.lon_field)
+                    return self.report(rows_done / total_rows if total_rows else 0.0)
+                
+                self.stats = encode_columnar_file(
+                    self.file_path, self.output_path, self.lat_field, self.lon_field,
+                    self.precision, self.field_name, on_batch=on_batch
+                )
+            else:
+                from ..core.streaming import encode_geojson_file
+                
+                self.stats = encode_geojson_file(
+                    self.file_path, self.output_path, self.precision, self.field_name,
+                    on_chunk=lambda features, fraction: self.report(fraction)
+                )
+        except Exception as e:
+            self.exception = e
+            return False
+        
+        return not self.stats['canceled']
+    
+    def finished(self, result):
+        """Runs on the UI thread: finish the result layer"""
+        if not result:
+            return
+        if self.layer is not None:
+            self.layer.updateExtents()
+        elif self.kind == 'geojson' and self.layer_name and self.output_path:
+            layer = QgsVectorLayer(self.output_path, self.layer_name, 'ogr')
+            if layer.isValid():
+                self.layer = layer
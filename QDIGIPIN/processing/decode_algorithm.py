@@ -7,19 +7,34 @@ from qgis.core import (
     QgsProcessingAlgorithm,
     QgsProcessingParameterVectorLayer,
     QgsProcessingParameterField,
+    QgsProcessingParameterEnum,
     QgsProcessingParameterFeatureSink,
     QgsProcessingException,
     QgsFeature,
+    QgsFeatureRequest,
+    QgsFeatureSink,
     QgsField,
     QgsFields,
     QgsGeometry,
     QgsPointXY,
+    QgsRectangle,
     QgsWkbTypes,
     QgsCoordinateReferenceSystem
 )
 from qgis.PyQt.QtCore import QVariant
 
-from ..core.digipin_engine import DigipinDecoder
+from itertools import islice
+
+from ..core.streaming import decode_values
+
+# Features read, decoded and written at a time
+BLOCK_SIZE = 10000
+
+# Invalid codes reported one by one before only the total is reported
+MAX_REPORTED_ERRORS = 100
+
+# Output geometry choices: (write points, write polygons)
+GEOMETRY_MODES = [(True, False), (False, True), (True, True)]
 
 
 class DecodeDigipinAlgorithm(QgsProcessingAlgorithm):
@@ -27,7 +42,9 @@ class DecodeDigipinAlgorithm(QgsProcessingAlgorithm):
     
     INPUT = 'INPUT'
     DIGIPIN_FIELD = 'DIGIPIN_FIELD'
+    GEOMETRY = 'GEOMETRY'
     OUTPUT = 'OUTPUT'
+    OUTPUT_POLYGONS = 'OUTPUT_POLYGONS'
     
     def tr(self, string):
         return string
@@ -49,7 +66,11 @@ class DecodeDigipinAlgorithm(QgsProcessingAlgorithm):
     
     def shortHelpString(self):
         return self.tr('Decode DIGIPIN codes to point features. '
-                      'Creates point layer from DIGIPIN field.')
+                      'Creates point layer from DIGIPIN field. '
+                      'The output geometry option writes the cell center '
+                      'points, the cell polygons, or both layers from a '
+                      'single read of the input. Repeated codes are decoded '
+                      'once.')
     
     def initAlgorithm(self, config=None):
         """Define algorithm parameters"""
@@ -71,19 +92,58 @@ class DecodeDigipinAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.GEOMETRY,
+                self.tr('Output geometry'),
+                options=[
+                    self.tr('Cell center points'),
+                    self.tr('Cell polygons'),
+                    self.tr('Both')
+                ],
+                defaultValue=0
+            )
+        )
+        
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.OUTPUT,
-                self.tr('Output points')
+                self.tr('Output points'),
+                type=QgsProcessing.TypeVectorPoint,
+                optional=True
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_POLYGONS,
+                self.tr('Output cell polygons'),
+                type=QgsProcessing.TypeVectorPolygon,
+                optional=True,
+                createByDefault=False
             )
         )
     
+    def checkParameterValues(self, parameters, context):
+        """Both sinks are optional, but each selected output geometry needs its sink"""
+        ok, message = super().checkParameterValues(parameters, context)
+        if not ok:
+            return ok, message
+        
+        write_points, write_polygons = GEOMETRY_MODES[self.parameterAsEnum(parameters, self.GEOMETRY, context)]
+        if write_points and not self.parameterAsOutputLayer(parameters, self.OUTPUT, context):
+            return False, self.tr('Output points are required for cell center points')
+        if write_polygons and not self.parameterAsOutputLayer(parameters, self.OUTPUT_POLYGONS, context):
+            return False, self.tr('Output cell polygons are required for cell polygons')
+        return True, ''
+    
     def processAlgorithm(self, parameters, context, feedback):
         """Process the algorithm"""
         
         # Get parameters
         source = self.parameterAsSource(parameters, self.INPUT, context)
         digipin_field = self.parameterAsString(parameters, self.DIGIPIN_FIELD, context)
+        write_points, write_polygons = GEOMETRY_MODES[self.parameterAsEnum(parameters, self.GEOMETRY, context)]
         
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
@@ -98,18 +158,24 @@ class DecodeDigipinAlgorithm(QgsProcessingAlgorithm):
         fields.append(QgsField('MinLon', QVariant.Double))
         fields.append(QgsField('MaxLon', QVariant.Double))
         
-        # Create output sink
-        (sink, dest_id) = self.parameterAsSink(
-            parameters,
-            self.OUTPUT,
-            context,
-            fields,
-            QgsWkbTypes.Point,
-            QgsCoordinateReferenceSystem('EPSG:4326')
-        )
-        
-        if sink is None:
-            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+        # Create the requested output sinks
+        crs = QgsCoordinateReferenceSystem('EPSG:4326')
+        results = {}
+        sink = polygon_sink = None
+        if write_points:
+            (sink, dest_id) = self.parameterAsSink(
+                parameters, self.OUTPUT, context, fields, QgsWkbTypes.Point, crs
+            )
+            if sink is None:
+                raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+            results[self.OUTPUT] = dest_id
+        if write_polygons:
+            (polygon_sink, polygon_dest_id) = self.parameterAsSink(
+                parameters, self.OUTPUT_POLYGONS, context, fields, QgsWkbTypes.Polygon, crs
+            )
+            if polygon_sink is None:
+                raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT_POLYGONS))
+            results[self.OUTPUT_POLYGONS] = polygon_dest_id
         
         # Get field index
         field_idx = source.fields().indexOf(digipin_field)
@@ -119,40 +185,69 @@ class DecodeDigipinAlgorithm(QgsProcessingAlgorithm):
         # Process features
         total = source.featureCount()
         if total == 0:
-            return {self.OUTPUT: dest_id}
+            return results
+        
+        # Only the code is read; input geometries are not needed
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([field_idx])
+        features = source.getFeatures(request)
         
-        for current, feature in enumerate(source.getFeatures()):
-            if feedback.isCanceled():
+        cache = {}
+        done = 0
+        errors = 0
+        last_percent = -1
+        while not feedback.isCanceled():
+            block = [feature.attribute(field_idx) for feature in islice(features, BLOCK_SIZE)]
+            if not block:
                 break
             
-            digipin = feature.attribute(digipin_field)
-            
-            if digipin:
-                try:
-                    # Decode DIGIPIN
-                    result = DigipinDecoder.decode(str(digipin))
-                    
-                    # Create point feature
+            points = []
+            polygons = []
+            for digipin, cell in zip(block, decode_values(block, cache)):
+                if cell is None:
+                    # Empty values are skipped silently
+                    if digipin:
+                        if errors < MAX_REPORTED_ERRORS:
+                            feedback.reportError(f'Error decoding DIGIPIN {digipin}: invalid code')
+                        errors += 1
+                    continue
+                
+                attributes = [
+                    digipin,
+                    cell.latitude,
+                    cell.longitude,
+                    cell.min_lat,
+                    cell.max_lat,
+                    cell.min_lon,
+                    cell.max_lon
+                ]
+                if write_points:
                     out_feature = QgsFeature(fields)
-                    point = QgsPointXY(result['longitude'], result['latitude'])
-                    out_feature.setGeometry(QgsGeometry.fromPointXY(point))
-                    
-                    # Set attributes
-                    out_feature.setAttributes([
-                        digipin,
-                        result['latitude'],
-                        result['longitude'],
-                        result['bounds']['minLat'],
-                        result['bounds']['maxLat'],
-                        result['bounds']['minLon'],
-                        result['bounds']['maxLon']
-                    ])
-                    
-                    sink.addFeature(out_feature)
-                    
-                except ValueError as e:
-                    feedback.reportError(f'Error decoding DIGIPIN {digipin}: {str(e)}')
+                    out_feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(cell.longitude, cell.latitude)))
+                    out_feature.setAttributes(attributes)
+                    points.append(out_feature)
+                if write_polygons:
+                    out_feature = QgsFeature(fields)
+                    out_feature.setGeometry(QgsGeometry.fromRect(
+                        QgsRectangle(cell.min_lon, cell.min_lat, cell.max_lon, cell.max_lat)
+                    ))
+                    out_feature.setAttributes(attributes)
+                    polygons.append(out_feature)
+            
+            if points:
+                sink.addFeatures(points, QgsFeatureSink.FastInsert)
+            if polygons:
+                polygon_sink.addFeatures(polygons, QgsFeatureSink.FastInsert)
             
-            feedback.setProgress(int(current * 100 / total))
+            # Progress is reported once per block, and only when it changes
+            done += len(block)
+            percent = done * 100 // total
+            if percent != last_percent:
+                feedback.setProgress(percent)
+                last_percent = percent
+        
+        if errors > MAX_REPORTED_ERRORS:
+            feedback.reportError(f'{errors} DIGIPIN codes could not be decoded')
         
-        return {self.OUTPUT: dest_id}
+        return results
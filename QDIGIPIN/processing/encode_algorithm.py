@@ -9,15 +9,24 @@ from qgis.core import (
     QgsProcessingParameterNumber,
     QgsProcessingParameterString,
     QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterDefinition,
     QgsProcessingException,
-    QgsFeature,
-    QgsField,
-    QgsFields,
-    QgsWkbTypes
+    QgsFeatureSink,
+    QgsField
 )
 from qgis.PyQt.QtCore import QVariant
 
-from ..core.digipin_engine import DigipinEncoder
+from collections import deque
+from itertools import islice
+
+from ..core.parallel import encode_multi_chunks
+from ..core.streaming import output_columns, set_columns
+
+# Features read, encoded and written at a time
+BLOCK_SIZE = 10000
+
+# Invalid features reported one by one before only the total is reported
+MAX_REPORTED_ERRORS = 100
 
 
 class EncodePointsAlgorithm(QgsProcessingAlgorithm):
@@ -26,6 +35,8 @@ class EncodePointsAlgorithm(QgsProcessingAlgorithm):
     INPUT = 'INPUT'
     PRECISION = 'PRECISION'
     FIELD_NAME = 'FIELD_NAME'
+    EXTRA_PRECISIONS = 'EXTRA_PRECISIONS'
+    WORKERS = 'WORKERS'
     OUTPUT = 'OUTPUT'
     
     def tr(self, string):
@@ -48,7 +59,12 @@ class EncodePointsAlgorithm(QgsProcessingAlgorithm):
     
     def shortHelpString(self):
         return self.tr('Encode point features to DIGIPIN codes. '
-                      'Adds a new field with DIGIPIN codes for each point.')
+                      'Adds a new field with DIGIPIN codes for each point. '
+                      'Additional precision levels (e.g. 4,6,8) are written to '
+                      'extra fields named <field>_L<level>, derived from the '
+                      'same encoding pass. With more than one worker process, '
+                      'features are encoded in blocks across CPU cores '
+                      '(0 uses every core).')
     
     def initAlgorithm(self, config=None):
         """Define algorithm parameters"""
@@ -80,6 +96,25 @@ class EncodePointsAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.EXTRA_PRECISIONS,
+                self.tr('Additional precision levels (comma-separated, e.g. 4,6,8)'),
+                defaultValue='',
+                optional=True
+            )
+        )
+        
+        workers = QgsProcessingParameterNumber(
+            self.WORKERS,
+            self.tr('Worker processes (0 = all CPU cores)'),
+            type=QgsProcessingParameterNumber.Integer,
+            defaultValue=1,
+            minValue=0
+        )
+        workers.setFlags(workers.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(workers)
+        
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.OUTPUT,
@@ -87,6 +122,23 @@ class EncodePointsAlgorithm(QgsProcessingAlgorithm):
             )
         )
     
+    def parseExtraPrecisions(self, value, precision):
+        """Parse the additional precision levels, excluding the main one"""
+        levels = set()
+        for item in (value or '').replace(';', ',').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            try:
+                level = int(item)
+            except ValueError:
+                raise QgsProcessingException(f'Invalid precision level: {item}')
+            if level < 1 or level > 10:
+                raise QgsProcessingException(f'Precision must be between 1 and 10, got {level}')
+            if level != precision:
+                levels.add(level)
+        return sorted(levels)
+    
     def processAlgorithm(self, parameters, context, feedback):
         """Process the algorithm"""
         
@@ -94,13 +146,23 @@ class EncodePointsAlgorithm(QgsProcessingAlgorithm):
         source = self.parameterAsSource(parameters, self.INPUT, context)
         precision = self.parameterAsInt(parameters, self.PRECISION, context)
         field_name = self.parameterAsString(parameters, self.FIELD_NAME, context)
+        extra_precisions = self.parseExtraPrecisions(
+            self.parameterAsString(parameters, self.EXTRA_PRECISIONS, context),
+            precision
+        )
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
         
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
         
-        # Prepare output fields
+        # Prepare output fields; input fields with an output name are overwritten
+        levels = [precision] + extra_precisions
+        output_names = [field_name] + [f'{field_name}_L{level}' for level in extra_precisions]
         fields = source.fields()
-        fields.append(QgsField(field_name, QVariant.String))
+        indices, missing = output_columns(fields.names(), output_names)
+        for name in missing:
+            fields.append(QgsField(name, QVariant.String))
+        columns = (indices, fields.count())
         
         # Create output sink
         (sink, dest_id) = self.parameterAsSink(
@@ -120,35 +182,88 @@ class EncodePointsAlgorithm(QgsProcessingAlgorithm):
         if total == 0:
             return {self.OUTPUT: dest_id}
         
-        for current, feature in enumerate(source.getFeatures()):
-            if feedback.isCanceled():
-                break
-            
-            # Get point coordinates
-            geom = feature.geometry()
-            if geom and not geom.isNull():
-                point = geom.asPoint()
+        # Read, encode and write a block of features at a time. With one
+        # worker blocks are encoded in this process; otherwise at most two
+        # blocks per worker are in flight (see core.parallel.ordered_map)
+        features = source.getFeatures()
+        blocks = deque()
+        
+        def shards():
+            while not feedback.isCanceled():
+                block = list(islice(features, BLOCK_SIZE))
+                if not block:
+                    return
+                blocks.append(block)
+                yield self.blockCoordinates(block)
+        
+        done = 0
+        errors = 0
+        last_percent = -1
+        results = encode_multi_chunks(shards(), levels, workers)
+        try:
+            for rows in results:
+                block = blocks.popleft()
+                errors += self.writeBlock(block, rows, columns, sink, errors, feedback)
                 
-                try:
-                    # Encode to DIGIPIN
-                    digipin = DigipinEncoder.encode(point.y(), point.x(), precision)
-                    
-                    # Create output feature
-                    out_feature = QgsFeature(fields)
-                    out_feature.setGeometry(geom)
-                    
-                    # Copy attributes
-                    for i, attr in enumerate(feature.attributes()):
-                        out_feature.setAttribute(i, attr)
-                    
-                    # Add DIGIPIN
-                    out_feature.setAttribute(field_name, digipin)
-                    
-                    sink.addFeature(out_feature)
-                    
-                except ValueError as e:
-                    feedback.reportError(f'Error encoding feature {feature.id()}: {str(e)}')
-            
-            feedback.setProgress(int(current * 100 / total))
+                # Progress is reported once per block, and only when it changes
+                done += len(block)
+                percent = done * 100 // total
+                if percent != last_percent:
+                    feedback.setProgress(percent)
+                    last_percent = percent
+                if feedback.isCanceled():
+                    break
+        finally:
+            results.close()
+        
+        if errors > MAX_REPORTED_ERRORS:
+            feedback.reportError(f'{errors} features could not be encoded')
         
         return {self.OUTPUT: dest_id}
+    
+    def blockCoordinates(self, block):
+        """Latitude and longitude lists of a block of point features (None without geometry)"""
+        lats = []
+        lons = []
+        for feature in block:
+            geom = feature.geometry()
+            if geom is None or geom.isNull():
+                lats.append(None)
+                lons.append(None)
+                continue
+            point = geom.asPoint()
+            lats.append(point.y())
+            lons.append(point.x())
+        return lats, lons
+    
+    def writeBlock(self, block, rows, columns, sink, reported, feedback):
+        """
+        Set each feature's codes in its attributes and add the block to the sink
+        
+        The input features are reused as output features: only their
+        attribute lists are replaced, and geometries are shared. columns is
+        the (indices, width) pair of the output fields (see
+        core.streaming.output_columns).
+        
+        Features without geometry are skipped silently.
+        
+        Returns:
+            int: Number of features left out because they could not be encoded
+        """
+        indices, width = columns
+        out_features = []
+        errors = 0
+        for feature, codes in zip(block, rows):
+            if codes is None:
+                if not feature.hasGeometry():
+                    continue
+                if reported + errors < MAX_REPORTED_ERRORS:
+                    feedback.reportError(f'Error encoding feature {feature.id()}: invalid or out-of-range point')
+                errors += 1
+                continue
+            
+            feature.setAttributes(set_columns(feature.attributes(), width, indices, codes))
+            out_features.append(feature)
+        
+        sink.addFeatures(out_features, QgsFeatureSink.FastInsert)
+        return errors
@@ -8,19 +8,21 @@ from qgis.core import (
     QgsProcessingParameterExtent,
     QgsProcessingParameterNumber,
     QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFileDestination,
     QgsProcessingException,
-    QgsFeature,
-    QgsField,
-    QgsFields,
-    QgsGeometry,
-    QgsRectangle,
+    QgsFeatureSink,
     QgsWkbTypes,
     QgsCoordinateReferenceSystem
 )
-from qgis.PyQt.QtCore import QVariant
 
-from ..core.digipin_engine import DigipinEncoder, DigipinDecoder
-from ..core.constants import BOUNDS
+from ..core.cellstore import CELL_COLUMNS, CellStoreWriter
+from ..core.grid_utils import OptimizedGridGenerator
+
+# Features written to the sink at a time
+BLOCK_SIZE = 10000
+
+# Default for the cell limit; grids larger than this fail before writing
+DEFAULT_MAX_CELLS = 1000000
 
 
 class GenerateGridAlgorithm(QgsProcessingAlgorithm):
@@ -28,7 +30,9 @@ class GenerateGridAlgorithm(QgsProcessingAlgorithm):
     
     EXTENT = 'EXTENT'
     PRECISION = 'PRECISION'
+    MAX_CELLS = 'MAX_CELLS'
     OUTPUT = 'OUTPUT'
+    CELL_STORE = 'CELL_STORE'
     
     def tr(self, string):
         return string
@@ -50,7 +54,15 @@ class GenerateGridAlgorithm(QgsProcessingAlgorithm):
     
     def shortHelpString(self):
         return self.tr('Generate a DIGIPIN grid for the specified extent. '
-                      'Creates polygon features for each DIGIPIN cell.')
+                      'Creates polygon features for each DIGIPIN cell with '
+                      'the same fields as the plugin dialog\'s grid, including '
+                      'the approximate area in km², in a fixed order: row by '
+                      'row from the south, west to east. The number of cells '
+                      'is counted exactly before anything is written, and the '
+                      'algorithm fails if it exceeds the maximum cell count '
+                      '(0 = no limit). '
+                      'Optionally also writes a memory-mapped cell store (.dpcs) '
+                      'with each cell\'s center and area.')
     
     def initAlgorithm(self, config=None):
         """Define algorithm parameters"""
@@ -73,12 +85,32 @@ class GenerateGridAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.MAX_CELLS,
+                self.tr('Maximum cell count (0 = no limit)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=DEFAULT_MAX_CELLS,
+                minValue=0
+            )
+        )
+        
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.OUTPUT,
                 self.tr('Output grid')
             )
         )
+        
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.CELL_STORE,
+                self.tr('Cell store file'),
+                fileFilter='DIGIPIN cell store (*.dpcs)',
+                optional=True,
+                createByDefault=False
+            )
+        )
     
     def processAlgorithm(self, parameters, context, feedback):
         """Process the algorithm"""
@@ -86,13 +118,22 @@ class GenerateGridAlgorithm(QgsProcessingAlgorithm):
         # Get parameters
         extent = self.parameterAsExtent(parameters, self.EXTENT, context)
         precision = self.parameterAsInt(parameters, self.PRECISION, context)
+        max_cells = self.parameterAsInt(parameters, self.MAX_CELLS, context)
+        
+        # Cells are counted exactly before anything is created
+        stream = OptimizedGridGenerator.grid_stream(extent, precision, batch_size=BLOCK_SIZE)
+        feedback.pushInfo(f'The grid at precision level {precision} has {stream.total:,} cells')
+        if max_cells and stream.total > max_cells:
+            raise QgsProcessingException(
+                f'The grid has {stream.total:,} cells, more than the maximum of {max_cells:,}. '
+                f'Use a smaller extent or a coarser precision, or raise the maximum cell count.'
+            )
+        
+        store_path = self.parameterAsFileOutput(parameters, self.CELL_STORE, context)
+        store = CellStoreWriter(store_path, CELL_COLUMNS) if store_path else None
         
         # Prepare output fields
-        fields = QgsFields()
-        fields.append(QgsField('DIGIPIN', QVariant.String))
-        fields.append(QgsField('CenterLat', QVariant.Double))
-        fields.append(QgsField('CenterLon', QVariant.Double))
-        fields.append(QgsField('Precision', QVariant.Int))
+        fields = OptimizedGridGenerator.grid_fields()
         
         # Create output sink
         (sink, dest_id) = self.parameterAsSink(
@@ -107,71 +148,29 @@ class GenerateGridAlgorithm(QgsProcessingAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
         
-        # Constrain extent to India bounds
-        min_lat = max(extent.yMinimum(), BOUNDS['minLat'])
-        max_lat = min(extent.yMaximum(), BOUNDS['maxLat'])
-        min_lon = max(extent.xMinimum(), BOUNDS['minLon'])
-        max_lon = min(extent.xMaximum(), BOUNDS['maxLon'])
-        
         # Generate grid
         feedback.pushInfo(f'Generating grid at precision level {precision}...')
         
-        # Calculate step size based on precision
-        # This is approximate - we'll generate points and get their DIGIPINs
-        lat_step = (max_lat - min_lat) / 20  # Adjust density as needed
-        lon_step = (max_lon - min_lon) / 20
-        
-        digipins_set = set()
-        
-        # Sample points to find unique DIGIPINs in extent
-        lat = min_lat
-        while lat <= max_lat:
-            lon = min_lon
-            while lon <= max_lon:
-                try:
-                    digipin = DigipinEncoder.encode(lat, lon, precision)
-                    digipins_set.add(digipin)
-                except ValueError:
-                    pass
-                lon += lon_step
-            lat += lat_step
-        
-        # Create polygon for each unique DIGIPIN
-        total = len(digipins_set)
-        for current, digipin in enumerate(digipins_set):
+        def progress(count, total):
+            feedback.setProgress(int(count * 100 / max(total, 1)))
+            return not feedback.isCanceled()
+        
+        # The cell store is written from the same records as the features
+        for records in stream.batches(progress):
+            sink.addFeatures(OptimizedGridGenerator.record_features(records, fields), QgsFeatureSink.FastInsert)
+            if store is not None:
+                for record in records:
+                    store.add(record.code, (record.latitude, record.longitude, record.area_km2))
+        
+        feedback.pushInfo(f'Generated {stream.count} of {stream.total} grid cells '
+                          f'({stream.cells_per_second:,.0f} cells/s)')
+        
+        results = {self.OUTPUT: dest_id}
+        if store is not None:
+            # A canceled run would leave a valid-looking but truncated store
             if feedback.isCanceled():
-                break
-            
-            try:
-                # Decode to get bounds
-                result = DigipinDecoder.decode(digipin)
-                bounds = result['bounds']
-                
-                # Create polygon
-                rect = QgsRectangle(
-                    bounds['minLon'], bounds['minLat'],
-                    bounds['maxLon'], bounds['maxLat']
-                )
-                
-                polygon = QgsGeometry.fromRect(rect)
-                
-                # Create feature
-                feature = QgsFeature(fields)
-                feature.setGeometry(polygon)
-                feature.setAttributes([
-                    digipin,
-                    result['latitude'],
-                    result['longitude'],
-                    precision
-                ])
-                
-                sink.addFeature(feature)
-                
-            except ValueError as e:
-                feedback.reportError(f'Error processing DIGIPIN {digipin}: {str(e)}')
-            
-            feedback.setProgress(int(current * 100 / total))
-        
-        feedback.pushInfo(f'Generated {total} grid cells')
-        
-        return {self.OUTPUT: dest_id}
+                store.discard()
+            else:
+                store.close()
+                results[self.CELL_STORE] = store_path
+        return results
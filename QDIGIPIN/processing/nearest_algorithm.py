@@ -0,0 +1,236 @@
+"""
+Nearest Neighbours Algorithm
+"""
+
+from qgis.core import (
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingParameterVectorLayer,
+    QgsProcessingParameterField,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingException,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsFeatureSink,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsWkbTypes,
+    QgsCoordinateReferenceSystem
+)
+from qgis.PyQt.QtCore import QVariant
+
+from ..core.nearest import DigipinNearest
+from ..core.streaming import output_columns, set_columns
+
+
+class NearestNeighboursAlgorithm(QgsProcessingAlgorithm):
+    """Find the k nearest reference points to each input point"""
+    
+    INPUT = 'INPUT'
+    REFERENCE = 'REFERENCE'
+    REFERENCE_FIELD = 'REFERENCE_FIELD'
+    K = 'K'
+    MAX_DISTANCE = 'MAX_DISTANCE'
+    OUTPUT = 'OUTPUT'
+    
+    def tr(self, string):
+        return string
+    
+    def createInstance(self):
+        return NearestNeighboursAlgorithm()
+    
+    def name(self):
+        return 'nearest_neighbours'
+    
+    def displayName(self):
+        return self.tr('Nearest Neighbours by DIGIPIN Cell')
+    
+    def group(self):
+        return self.tr('Analysis')
+    
+    def groupId(self):
+        return 'analysis'
+    
+    def shortHelpString(self):
+        return self.tr('Find the k nearest reference points to every input '
+                      'point. Reference points are bucketed by DIGIPIN cell '
+                      'and each search expands outwards ring by ring from its '
+                      'own cell, stopping as soon as no unsearched cell can '
+                      'hold a closer point. One line is written per neighbour, '
+                      'from the input point to the reference point, with the '
+                      'rank and the great-circle distance in km. A maximum '
+                      'distance of 0 means no limit.')
+    
+    def initAlgorithm(self, config=None):
+        """Define algorithm parameters"""
+        
+        self.addParameter(
+            QgsProcessingParameterVectorLayer(
+                self.INPUT,
+                self.tr('Input point layer'),
+                [QgsProcessing.TypeVectorPoint]
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterVectorLayer(
+                self.REFERENCE,
+                self.tr('Reference point layer'),
+                [QgsProcessing.TypeVectorPoint]
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.REFERENCE_FIELD,
+                self.tr('Reference id field (default: feature id)'),
+                parentLayerParameterName=self.REFERENCE,
+                optional=True
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.K,
+                self.tr('Number of neighbours'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=5,
+                minValue=1
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.MAX_DISTANCE,
+                self.tr('Maximum distance in km (0 = no limit)'),
+                type=QgsProcessingParameterNumber.Double,
+                defaultValue=0,
+                minValue=0
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT,
+                self.tr('Nearest neighbour lines')
+            )
+        )
+    
+    def readPoints(self, source, crs, context, attributes):
+        """Read point coordinates in EPSG:4326, with the requested attributes only"""
+        request = QgsFeatureRequest().setDestinationCrs(crs, context.transformContext())
+        request.setSubsetOfAttributes(attributes)
+        
+        points = []
+        for feature in source.getFeatures(request):
+            geom = feature.geometry()
+            if geom is None or geom.isNull():
+                continue
+            point = geom.centroid().asPoint() if geom.isMultipart() else geom.asPoint()
+            points.append((feature, point))
+        return points
+    
+    def processAlgorithm(self, parameters, context, feedback):
+        """Process the algorithm"""
+        
+        # Get parameters
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        reference = self.parameterAsSource(parameters, self.REFERENCE, context)
+        reference_field = self.parameterAsString(parameters, self.REFERENCE_FIELD, context)
+        k = self.parameterAsInt(parameters, self.K, context)
+        max_distance = self.parameterAsDouble(parameters, self.MAX_DISTANCE, context) or None
+        
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        if reference is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.REFERENCE))
+        
+        # Prepare output fields; input fields with an output name are overwritten
+        if reference_field:
+            field_idx = reference.fields().indexOf(reference_field)
+            if field_idx == -1:
+                raise QgsProcessingException(f'Field not found: {reference_field}')
+            id_type = reference.fields().field(field_idx).type()
+        else:
+            field_idx = None
+            id_type = QVariant.LongLong
+        output_types = {'Nearest_ID': id_type, 'Rank': QVariant.Int, 'Distance_km': QVariant.Double}
+        fields = source.fields()
+        indices, missing = output_columns(fields.names(), list(output_types))
+        for name in missing:
+            fields.append(QgsField(name, output_types[name]))
+        width = fields.count()
+        
+        # Create output sink
+        crs = QgsCoordinateReferenceSystem('EPSG:4326')
+        (sink, dest_id) = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            fields,
+            QgsWkbTypes.LineString,
+            crs
+        )
+        
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+        
+        # Index the reference points by position in the list read
+        feedback.setProgressText(self.tr('Indexing reference points'))
+        references = self.readPoints(reference, crs, context, [] if field_idx is None else [field_idx])
+        nearest = DigipinNearest(
+            [point.y() for _, point in references],
+            [point.x() for _, point in references],
+            k=k
+        )
+        feedback.pushInfo(f'Indexed {len(nearest)} of {len(references)} reference points '
+                          f'at precision {nearest.precision}')
+        
+        queries = self.readPoints(source, crs, context, source.fields().allAttributesList())
+        total = len(queries)
+        if total == 0 or not len(nearest):
+            return {self.OUTPUT: dest_id}
+        
+        def progress(done, count):
+            feedback.setProgress(int(done * 100 / count))
+            return not feedback.isCanceled()
+        
+        feedback.setProgressText(self.tr('Searching nearest neighbours'))
+        results = nearest.query_batch(
+            [point.y() for _, point in queries],
+            [point.x() for _, point in queries],
+            k,
+            max_distance,
+            progress
+        )
+        
+        line_count = 0
+        features = []
+        for (feature, point), neighbours in zip(queries, results):
+            if neighbours is None:
+                break
+            
+            attributes = feature.attributes()
+            for rank, (position, distance) in enumerate(neighbours, 1):
+                match, match_point = references[position]
+                match_id = match.id() if field_idx is None else match.attribute(field_idx)
+                
+                out_feature = QgsFeature(fields)
+                out_feature.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(point), QgsPointXY(match_point)]))
+                out_feature.setAttributes(set_columns(attributes, width, indices, (match_id, rank, distance)))
+                features.append(out_feature)
+            
+            if len(features) >= 1000:
+                sink.addFeatures(features, QgsFeatureSink.FastInsert)
+                line_count += len(features)
+                features = []
+        
+        if features:
+            sink.addFeatures(features, QgsFeatureSink.FastInsert)
+            line_count += len(features)
+        
+        feedback.pushInfo(f'Wrote {line_count} neighbour lines')
+        
+        return {self.OUTPUT: dest_id}
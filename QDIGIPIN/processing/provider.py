@@ -9,6 +9,8 @@ import os
 from .encode_algorithm import EncodePointsAlgorithm
 from .decode_algorithm import DecodeDigipinAlgorithm
 from .generate_grid_algorithm import GenerateGridAlgorithm
+from .polyfill_algorithm import PolyfillAlgorithm
+from .nearest_algorithm import NearestNeighboursAlgorithm
 
 
 class DigipinProvider(QgsProcessingProvider):
@@ -35,3 +37,5 @@ class DigipinProvider(QgsProcessingProvider):
         self.addAlgorithm(EncodePointsAlgorithm())
         self.addAlgorithm(DecodeDigipinAlgorithm())
         self.addAlgorithm(GenerateGridAlgorithm())
+        self.addAlgorithm(PolyfillAlgorithm())
+        self.addAlgorithm(NearestNeighboursAlgorithm())
@@ -0,0 +1,141 @@
+"""
+Test suite for memory-mapped cell store files
+"""
+
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from core.cellstore import CellStore, CellStoreWriter, write_density_store, write_grid_store
+from core.coverage import DigipinCoverage
+from core.digipin_engine import DigipinEncoder
+from core.packed import PackedDigipin
+
+
+class TestCellStore(unittest.TestCase):
+    """Test writing, mapping and querying cell stores"""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cells.dpcs')
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_grid_store(self):
+        """Test that grid cells are stored sorted and found by code"""
+        cells = list(DigipinCoverage.extent_cells(28.5, 77.1, 28.6, 77.2, 6))
+        self.assertEqual(write_grid_store(self.path, cells), len(cells))
+        
+        with CellStore(self.path) as store:
+            self.assertEqual(len(store), len(cells))
+            self.assertEqual(list(store), sorted(cell.code for cell in cells))
+            self.assertEqual([name for name, _ in store.columns], ['latitude', 'longitude', 'area_km2'])
+            
+            for cell in cells[::7]:
+                row = store.get(cell.code)
+                self.assertEqual(row['code'], cell.code)
+                self.assertAlmostEqual(row['latitude'], cell.latitude)
+                self.assertAlmostEqual(row['area_km2'], cell.area_km2)
+            
+            missing = PackedDigipin.pack(DigipinEncoder.encode(12.9716, 77.5946, 6))
+            self.assertNotIn(missing, store)
+            self.assertIsNone(store.get(missing))
+            self.assertEqual(store.value(missing, 'latitude', 0.0), 0.0)
+    
+    def test_within(self):
+        """Test that the cells inside a parent are one contiguous row range"""
+        cells = list(DigipinCoverage.extent_cells(28.5, 77.1, 28.6, 77.2, 6))
+        write_grid_store(self.path, cells)
+        parent = PackedDigipin.truncate(cells[0].code, 4)
+        expected = sorted(cell.code for cell in cells if PackedDigipin.truncate(cell.code, 4) == parent)
+        
+        with CellStore(self.path) as store:
+            rows = store.within(parent)
+            self.assertEqual([store.codes[index] for index in rows], expected)
+    
+    def test_density_store(self):
+        """Test density maps with string and packed keys"""
+        density = {
+            DigipinEncoder.encode(28.6139, 77.2090, 8).replace('-', ''): 3,
+            PackedDigipin.pack(DigipinEncoder.encode(19.0760, 72.8777, 8)): 5
+        }
+        write_density_store(self.path, density)
+        
+        with CellStore(self.path) as store:
+            code = PackedDigipin.pack(DigipinEncoder.encode(19.0760, 72.8777, 8))
+            self.assertEqual(store.value(code, 'count'), 5)
+            self.assertEqual(sorted(store.column('count')), [3, 5])
+    
+    def test_writer_errors(self):
+        """Test duplicate cells, bad column types and non-store files"""
+        with self.assertRaises(ValueError):
+            CellStoreWriter(self.path, [('count', 'int8')])
+        
+        code = PackedDigipin.pack(DigipinEncoder.encode(28.6139, 77.2090, 6))
+        writer = CellStoreWriter(self.path, [('count', 'int32')])
+        writer.add(code, (1,))
+        writer.add(code, (2,))
+        with self.assertRaises(ValueError):
+            writer.close()
+        
+        with open(self.path, 'wb') as f:
+            f.write(b'not a cell store')
+        with self.assertRaises(ValueError):
+            CellStore(self.path)
+        
+        # Unknown column type code
+        write_density_store(self.path, {code: 1})
+        with open(self.path, 'rb') as f:
+            data = bytearray(f.read())
+        with CellStore(self.path) as store:
+            name = store.columns[0][0].encode('utf-8')
+        data[data.index(name) + len(name)] = ord('z')
+        with open(self.path, 'wb') as f:
+            f.write(data)
+        with self.assertRaises(ValueError):
+            CellStore(self.path)
+    
+    def test_discard(self):
+        """Test that a discarded writer leaves no file behind"""
+        write_grid_store(self.path, [])
+        writer = CellStoreWriter(self.path, [('count', 'int32')])
+        writer.add(PackedDigipin.pack('FCJ'), (1,))
+        writer.discard()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(writer), 0)
+    
+    def test_empty_store(self):
+        """Test a store with no cells"""
+        write_grid_store(self.path, [])
+        with CellStore(self.path) as store:
+            self.assertEqual(len(store), 0)
+            self.assertEqual(store.find(1), -1)
+    
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numpy_views(self):
+        """Test zero-copy arrays and vectorized lookups"""
+        cells = list(DigipinCoverage.extent_cells(28.5, 77.1, 28.6, 77.2, 5))
+        write_grid_store(self.path, cells)
+        
+        store = CellStore(self.path)
+        codes = store.array()
+        self.assertEqual(codes.dtype, numpy.uint64)
+        self.assertTrue(numpy.all(codes[1:] > codes[:-1]))
+        
+        rows = store.find_array([cells[3].code, 1])
+        self.assertEqual(rows[0], store.find(cells[3].code))
+        self.assertEqual(rows[1], -1)
+        self.assertAlmostEqual(store.array('latitude')[rows[0]], cells[3].latitude)
+        
+        del codes
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Test suite for the command-line interface
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run_cli(*args, stdin=''):
+    """Run python -m <package> the way a batch server would"""
+    return subprocess.run(
+        [sys.executable, '-m', os.path.basename(PACKAGE_DIR)] + list(args),
+        input=stdin, capture_output=True, text=True,
+        cwd=os.path.dirname(PACKAGE_DIR)
+    )
+
+
+class TestCommandLine(unittest.TestCase):
+    """Test the encode, decode, validate and grid subcommands"""
+    
+    def test_encode_csv(self):
+        """Test encoding CSV from stdin"""
+        result = run_cli('encode', '--precision', '8', stdin='name,lat,lon\nDelhi,28.6139,77.2090\nBad,1,2\n')
+        
+        self.assertEqual(result.returncode, 0)
+        lines = result.stdout.splitlines()
+        self.assertEqual(lines[0], 'name,lat,lon,DIGIPIN')
+        self.assertEqual(lines[1], 'Delhi,28.6139,77.2090,39J-438-TJ')
+        self.assertEqual(lines[2], 'Bad,1,2,')
+    
+    def test_encode_workers(self):
+        """Test that parallel encoding keeps the input order"""
+        rows = ''.join(f'{i},{10 + i * 0.001:.4f},{75 + i * 0.002:.4f}\n' for i in range(200))
+        serial = run_cli('encode', '--precision', '6', stdin='id,lat,lon\n' + rows)
+        parallel = run_cli('encode', '--precision', '6', '--workers', '2', stdin='id,lat,lon\n' + rows)
+        
+        self.assertEqual(parallel.returncode, 0)
+        self.assertEqual(parallel.stdout, serial.stdout)
+    
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_encode_parquet_columns(self):
+        """Test column-wise Parquet encoding with a packed code column"""
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, 'points.parquet')
+            target = os.path.join(folder, 'encoded.parquet')
+            pyarrow.parquet.write_table(pyarrow.table({'Latitude': [28.6139, 99.0], 'Longitude': [77.2090, 77.0]}), source)
+            
+            result = run_cli('encode', source, '-o', target, '--precision', '8', '--packed-column', 'Packed')
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('2 records (1 invalid)', result.stderr)
+            
+            rows = pyarrow.parquet.read_table(target).to_pylist()
+            self.assertEqual(rows[0]['DIGIPIN'], '39J-438-TJ')
+            self.assertIsNone(rows[1]['Packed'])
+        
+        result = run_cli('encode', '--packed-column', 'Packed', stdin='lat,lon\n28.6,77.2\n')
+        self.assertEqual(result.returncode, 2)
+    
+    def test_decode_jsonl(self):
+        """Test decoding JSONL records"""
+        result = run_cli('decode', '--format', 'jsonl', stdin='{"DIGIPIN": "39J-438-TJC7"}\n{"DIGIPIN": "ABC"}\n')
+        
+        self.assertEqual(result.returncode, 0)
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertAlmostEqual(records[0]['Latitude'], 28.6139, places=4)
+        self.assertAlmostEqual(records[0]['Longitude'], 77.2090, places=4)
+        self.assertIsNone(records[1]['Latitude'])
+    
+    def test_validate_exit_status(self):
+        """Test that validate exits 1 when invalid codes are found"""
+        result = run_cli('validate', '--invalid-only', stdin='DIGIPIN\nFCJ-3K4\nFC0\n')
+        
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(len(result.stdout.splitlines()), 2)
+        self.assertIn('FC0', result.stdout)
+    
+    def test_json_document(self):
+        """Test that .json files are not read as JSON Lines"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'points.json')
+            with open(path, 'w', encoding='utf-8') as stream:
+                json.dump({'type': 'FeatureCollection', 'features': []}, stream)
+            result = run_cli('encode', path)
+        
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('JSON Lines', result.stderr)
+    
+    def test_grid(self):
+        """Test the grid subcommand and its error handling"""
+        result = run_cli('grid', '--bbox', '77.0,28.4,77.2,28.6', '--precision', '5', '--output-format', 'jsonl')
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(len(result.stdout.splitlines()), 42)
+        
+        result = run_cli('grid', '--bbox', '77.0,28.4', '--precision', '5')
+        self.assertEqual(result.returncode, 2)
+    
+    def test_closed_output(self):
+        """Test that a reader closing stdout early (grid | head) stops the command quietly"""
+        process = subprocess.Popen(
+            [sys.executable, '-m', os.path.basename(PACKAGE_DIR),
+             'grid', '--bbox', '70,20,80,30', '--precision', '6', '--output-format', 'jsonl'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=os.path.dirname(PACKAGE_DIR)
+        )
+        self.assertTrue(process.stdout.readline())
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        self.assertEqual(process.wait(), 141)
+        self.assertEqual(stderr, '')
+    
+    def test_grid_overlapping_polygons(self):
+        """Test that cells where two features overlap are kept once"""
+        squares = [
+            [[77.0, 28.0], [77.4, 28.0], [77.4, 28.4], [77.0, 28.4], [77.0, 28.0]],
+            [[77.2, 28.2], [77.6, 28.2], [77.6, 28.6], [77.2, 28.6], [77.2, 28.2]]
+        ]
+        collection = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+            for ring in squares
+        ]}
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'squares.geojson')
+            with open(path, 'w', encoding='utf-8') as stream:
+                json.dump(collection, stream)
+            result = run_cli('grid', '--polygons', path, '-p', '5', '--output-format', 'jsonl')
+        
+        self.assertEqual(result.returncode, 0)
+        codes = [json.loads(line)['DIGIPIN'] for line in result.stdout.splitlines()]
+        self.assertIn('39K-9K', codes)
+        self.assertEqual(len(codes), len(set(codes)))
+
+
+if __name__ == '__main__':
+    unittest.main()
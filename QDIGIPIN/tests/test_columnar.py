@@ -0,0 +1,90 @@
+"""
+Test suite for Parquet and Arrow batch encoding
+"""
+
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy  # the vectorized encoder needs NumPy
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from core.digipin_engine import DigipinEncoder
+
+if pyarrow is not None:
+    from core.columnar import ColumnarWriter, encode_batch, encode_columnar_file, iter_batches
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestColumnarEncoding(unittest.TestCase):
+    """Test column-wise encoding of record batches and files"""
+    
+    def setUp(self):
+        self.table = pyarrow.table({
+            'id': [1, 2, 3, 4],
+            'lat': [28.6139, None, 19.0760, 60.0],
+            'lon': ['77.2090', '77.0', '72.8777', 'bad']
+        })
+    
+    def test_encode_batch(self):
+        """Test string and packed columns, nulls and malformed values"""
+        batch = self.table.to_batches()[0]
+        encoded, invalid = encode_batch(batch, 'lat', 'lon', 8, packed_field='packed')
+        
+        self.assertEqual(invalid, 2)
+        self.assertEqual(encoded.schema.names, ['id', 'lat', 'lon', 'DIGIPIN', 'packed'])
+        self.assertEqual(encoded.schema.field('packed').type, pyarrow.uint64())
+        self.assertEqual(encoded.column(3).to_pylist(), [
+            DigipinEncoder.encode(28.6139, 77.2090, 8), None, DigipinEncoder.encode(19.0760, 72.8777, 8), None
+        ])
+        self.assertEqual(encoded.column(4)[0].as_py(), DigipinEncoder.encode_packed(28.6139, 77.2090, 8))
+        
+        encoded, _ = encode_batch(batch, 'lat', 'lon', 8, None, 'packed', 'dictionary')
+        self.assertEqual(encoded.schema.names, ['id', 'lat', 'lon', 'packed'])
+        self.assertTrue(pyarrow.types.is_dictionary(encoded.schema.field('packed').type))
+        
+        with self.assertRaises(ValueError):
+            encode_batch(batch, 'latitude', 'lon', 8)
+    
+    def test_file_round_trip(self):
+        """Test Parquet to Parquet and Parquet to Arrow, batch by batch"""
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, 'in.parquet')
+            pyarrow.parquet.write_table(self.table, source, row_group_size=2)
+            
+            for name, packed_format in (('out.parquet', 'uint64'), ('out.arrow', 'dictionary')):
+                target = os.path.join(folder, name)
+                batches = []
+                stats = encode_columnar_file(
+                    source, target, 'lat', 'lon', 6, packed_field='packed', packed_format=packed_format,
+                    batch_size=2, on_batch=lambda batch, done, total: batches.append((done, total))
+                )
+                self.assertEqual((stats['rows'], stats['errors']), (4, 2))
+                self.assertEqual(batches, [(2, 4), (4, 4)])
+                
+                fmt = 'parquet' if name.endswith('.parquet') else 'arrow'
+                rows = [row for batch in iter_batches(target, fmt) for row in batch.to_pylist()]
+                self.assertEqual([row['id'] for row in rows], [1, 2, 3, 4])
+                self.assertEqual(rows[2]['DIGIPIN'], DigipinEncoder.encode(19.0760, 72.8777, 6))
+                self.assertEqual(rows[2]['packed'], DigipinEncoder.encode_packed(19.0760, 72.8777, 6))
+    
+    def test_writer_rows(self):
+        """Test that later row batches are cast to the first batch's schema"""
+        with tempfile.TemporaryDirectory() as folder:
+            target = os.path.join(folder, 'rows.parquet')
+            writer = ColumnarWriter(target, 'parquet')
+            writer.write_rows([{'code': 'FCJ', 'value': 1.5}])
+            writer.write_rows([{'code': None, 'value': None}])
+            writer.close()
+            
+            table = pyarrow.parquet.read_table(target)
+            self.assertEqual(writer.count, 2)
+            self.assertEqual(table.column('code').to_pylist(), ['FCJ', None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Test suite for DIGIPIN cell coverage of extents
+"""
+
+import unittest
+from core.digipin_engine import DigipinEncoder, DigipinGrid
+from core.packed import PackedDigipin
+from core.coverage import DigipinCoverage
+
+
+class TestExtentCoverage(unittest.TestCase):
+    """Test exact enumeration of cells in an extent"""
+    
+    def test_extent_matches_dense_sampling(self):
+        """Test that every sampled point falls in an enumerated cell"""
+        min_lat, min_lon, max_lat, max_lon = 28.50, 77.10, 28.53, 77.14
+        precision = 6
+        
+        codes = list(DigipinCoverage.extent_codes(min_lat, min_lon, max_lat, max_lon, precision))
+        self.assertEqual(len(codes), len(set(codes)))
+        self.assertEqual(len(codes), DigipinCoverage.extent_count(min_lat, min_lon, max_lat, max_lon, precision))
+        
+        sampled = set()
+        steps = 60
+        for i in range(steps + 1):
+            for j in range(steps + 1):
+                lat = min_lat + (max_lat - min_lat) * i / steps
+                lon = min_lon + (max_lon - min_lon) * j / steps
+                sampled.add(DigipinEncoder.encode_packed(lat, lon, precision))
+        
+        self.assertEqual(sampled, set(codes))
+    
+    def test_cells_intersect_extent(self):
+        """Test that every enumerated cell overlaps the extent"""
+        min_lat, min_lon, max_lat, max_lon = 12.9, 77.5, 13.1, 77.7
+        for cell in DigipinCoverage.extent_cells(min_lat, min_lon, max_lat, max_lon, 5):
+            self.assertLessEqual(cell.min_lat, max_lat)
+            self.assertGreaterEqual(cell.max_lat, min_lat)
+            self.assertLessEqual(cell.min_lon, max_lon)
+            self.assertGreaterEqual(cell.max_lon, min_lon)
+    
+    def test_extent_order_and_strings(self):
+        """Test deterministic order and encoder-compatible labels"""
+        cells = list(DigipinCoverage.extent_cells(20.0, 78.0, 21.0, 79.0, 3))
+        self.assertEqual(cells, sorted(cells, key=lambda cell: (cell.y, cell.x)))
+        
+        for cell in cells:
+            label = DigipinGrid.to_digipin(cell.y, cell.x, 3)
+            self.assertEqual(label, DigipinEncoder.encode(cell.latitude, cell.longitude, 3))
+            self.assertEqual(PackedDigipin.pack(label), cell.code)
+    
+    def test_extent_clipping(self):
+        """Test extents partly or wholly outside the DIGIPIN bounds"""
+        self.assertEqual(DigipinCoverage.extent_count(0, 0, 1, 1, 5), 0)
+        self.assertEqual(list(DigipinCoverage.extent_cells(0, 0, 1, 1, 5)), [])
+        self.assertEqual(DigipinCoverage.extent_count(-90, -180, 90, 180, 2), 256)
+        
+        with self.assertRaises(ValueError):
+            DigipinCoverage.extent_count(20, 78, 21, 79, 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
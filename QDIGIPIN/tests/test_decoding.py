@@ -3,7 +3,8 @@ Test suite for DIGIPIN decoding
 """
 
 import unittest
-from core.digipin_engine import DigipinDecoder, DigipinValidator, DigipinEncoder
+from core.digipin_engine import DigipinDecoder, DigipinValidator, DigipinEncoder, DigipinCell
+from core.packed import PackedDigipin
 
 
 class TestDigipinDecoding(unittest.TestCase):
@@ -55,6 +56,13 @@ class TestDigipinDecoding(unittest.TestCase):
         with self.assertRaises(ValueError):
             DigipinDecoder.decode("FCJ3K4LM9287P")
     
+    def test_decode_invalid_character_positions(self):
+        """Test that invalid characters are reported wherever they appear"""
+        for digipin in ["XCJ3K4LM92", "FCJ3K4LM9X", "FCJ3K4LMX", "fcj", "FCJ 3K4"]:
+            with self.assertRaises(ValueError) as context:
+                DigipinDecoder.decode(digipin)
+            self.assertIn('Invalid character', str(context.exception))
+    
     def test_encode_decode_roundtrip(self):
         """Test that encoding and decoding are consistent"""
         # Original coordinates
@@ -71,6 +79,47 @@ class TestDigipinDecoding(unittest.TestCase):
         self.assertAlmostEqual(result['latitude'], orig_lat, places=4)
         self.assertAlmostEqual(result['longitude'], orig_lon, places=4)
     
+    def test_decode_center_encodes_to_same_cell(self):
+        """Test that the decoded center encodes back to the same DIGIPIN"""
+        digipins = ["FCJ-3K4-LM92", "TTT-TTT-TTTT", "LLL-LLL-LLLL", "888-888-8888", "39J-438-TJC7", "39J-438", "3"]
+        
+        for digipin in digipins:
+            precision = len(digipin.replace('-', ''))
+            result = DigipinDecoder.decode(digipin)
+            encoded = DigipinEncoder.encode(result['latitude'], result['longitude'], precision)
+            self.assertEqual(encoded.replace('-', ''), digipin.replace('-', ''))
+    
+    def test_decode_shared_edges(self):
+        """Test that adjacent cells share exactly the same edge"""
+        west = DigipinDecoder.decode("FCJ-3K4-LM9F")
+        east = DigipinDecoder.decode("FCJ-3K4-LM9C")
+        self.assertEqual(west['bounds']['maxLon'], east['bounds']['minLon'])
+        self.assertEqual(west['bounds']['minLat'], east['bounds']['minLat'])
+    
+    def test_decode_cell(self):
+        """Test decoding to a DigipinCell value object"""
+        cell = DigipinDecoder.decode_cell("FCJ3K4LM92")
+        
+        self.assertIsInstance(cell, DigipinCell)
+        self.assertEqual(cell.precision, 10)
+        self.assertEqual(cell.digipin, "FCJ-3K4-LM92")
+        for precision in (3, 6):
+            digipin = DigipinEncoder.encode(28.6139, 77.2090, precision)
+            self.assertEqual(DigipinDecoder.decode_cell(digipin).digipin, digipin)
+        self.assertEqual(cell.code, PackedDigipin.pack("FCJ3K4LM92"))
+        self.assertEqual(cell.to_dict(), DigipinDecoder.decode("FCJ-3K4-LM92"))
+        self.assertEqual(DigipinDecoder.decode_packed(cell.code), cell)
+        
+        # Full precision is kept; the center lies inside the bounds
+        min_lat, min_lon, max_lat, max_lon = cell.bounds
+        self.assertTrue(min_lat < cell.latitude < max_lat)
+        self.assertTrue(min_lon < cell.longitude < max_lon)
+        self.assertEqual(cell.polygon[0], cell.polygon[-1])
+        self.assertGreater(cell.area_km2, 0)
+        
+        with self.assertRaises(AttributeError):
+            cell.extra = 1
+    
     def test_validate_digipin(self):
         """Test DIGIPIN validation"""
         # Valid DIGIPIN
@@ -0,0 +1,93 @@
+"""
+Test suite for blockwise distance matrices
+"""
+
+import math
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from core.distance import DistanceMatrix, condensed_index, haversine_km, vincenty_km
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Scalar reference haversine distance in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    h = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestDistanceMatrix(unittest.TestCase):
+    """Test distance kernels and tiled matrices"""
+    
+    def setUp(self):
+        rng = random.Random(3)
+        self.lats = [rng.uniform(8.0, 35.0) for _ in range(230)]
+        self.lons = [rng.uniform(68.0, 95.0) for _ in range(230)]
+    
+    def test_kernels(self):
+        """Test haversine against a scalar reference and Vincenty against a published geodesic"""
+        self.assertAlmostEqual(
+            float(haversine_km(28.6139, 77.2090, 19.0760, 72.8777)),
+            _haversine(28.6139, 77.2090, 19.0760, 72.8777), places=6
+        )
+        # Flinders Peak to Buninyong (Vincenty, 1975): 54,972.271 m
+        distance = vincenty_km(-37.95103341667, 144.42486789, -37.65282113889, 143.92649552)
+        self.assertAlmostEqual(float(distance), 54.972271, places=5)
+        self.assertEqual(float(vincenty_km(28.6, 77.2, 28.6, 77.2)), 0.0)
+    
+    def test_dense_tiles(self):
+        """Test that small tiles give the same symmetric matrix as one block"""
+        expected = DistanceMatrix.block(self.lats, self.lons, self.lats, self.lons)
+        matrix = DistanceMatrix.dense(self.lats, self.lons, tile_size=64)
+        self.assertEqual(matrix.dtype, numpy.float32)
+        numpy.testing.assert_allclose(matrix, expected, rtol=1e-6, atol=1e-3)
+        
+        other = DistanceMatrix.dense(self.lats[:50], self.lons[:50], self.lats, self.lons,
+                                     method='vincenty', tile_size=32)
+        self.assertEqual(other.shape, (50, 230))
+        block = DistanceMatrix.block(self.lats[:50], self.lons[:50], self.lats, self.lons, 'vincenty')
+        numpy.testing.assert_allclose(other, block, rtol=1e-6)
+        # The sphere and the ellipsoid differ by well under 1%
+        numpy.testing.assert_allclose(other, expected[:50], rtol=1e-2)
+    
+    def test_condensed(self):
+        """Test the pdist layout, in memory and streamed to disk"""
+        n = len(self.lats)
+        expected = DistanceMatrix.block(self.lats, self.lons, self.lats, self.lons)
+        condensed = DistanceMatrix.condensed(self.lats, self.lons, tile_size=40)
+        self.assertEqual(condensed.size, n * (n - 1) // 2)
+        for i, j in ((0, 1), (0, n - 1), (5, 100), (100, 5), (n - 2, n - 1)):
+            self.assertAlmostEqual(float(condensed[condensed_index(i, j, n)]), expected[i, j], places=2)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'condensed.f32')
+            written = DistanceMatrix.condensed(self.lats, self.lons, path, tile_size=40)
+            self.assertEqual(written, condensed.size)
+            numpy.testing.assert_array_equal(numpy.fromfile(path, dtype=numpy.float32), condensed)
+    
+    def test_nearest(self):
+        """Test top-k against a full sort, excluding each point itself"""
+        full = DistanceMatrix.block(self.lats, self.lons, self.lats, self.lons)
+        numpy.fill_diagonal(full, numpy.inf)
+        indices, distances = DistanceMatrix.nearest(self.lats, self.lons, 4, tile_size=50)
+        numpy.testing.assert_array_equal(indices, numpy.argsort(full, axis=1)[:, :4])
+        numpy.testing.assert_allclose(distances, numpy.sort(full, axis=1)[:, :4], rtol=1e-6)
+        
+        indices, distances = DistanceMatrix.nearest(self.lats[:3], self.lons[:3], 5,
+                                                    self.lats[:2], self.lons[:2])
+        self.assertEqual(indices[0].tolist()[2:], [-1, -1, -1])
+        self.assertTrue(numpy.isinf(distances[0, 2:]).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,6 +63,30 @@ class TestDigipinEncoding(unittest.TestCase):
         for digipin in digipins:
             self.assertIsNotNone(digipin)
     
+    def test_encode_prefix_consistency(self):
+        """Test that every coarser code is a prefix of the finer code"""
+        coords = [(28.6139, 77.2090), (2.5, 63.5), (38.5, 99.5), (20.5, 81.5), (11.5, 72.5)]
+        
+        for lat, lon in coords:
+            full = DigipinEncoder.encode(lat, lon, 10).replace('-', '')
+            for precision in range(1, 10):
+                digipin = DigipinEncoder.encode(lat, lon, precision).replace('-', '')
+                self.assertEqual(digipin, full[:precision])
+    
+    def test_encode_multi(self):
+        """Test encoding several precisions in one pass"""
+        lat, lon = 28.6139, 77.2090
+        codes = DigipinEncoder.encode_multi(lat, lon, [10, 4, 6, 8])
+        
+        self.assertEqual(sorted(codes), [4, 6, 8, 10])
+        for precision, digipin in codes.items():
+            self.assertEqual(digipin, DigipinEncoder.encode(lat, lon, precision))
+        
+        with self.assertRaises(ValueError):
+            DigipinEncoder.encode_multi(lat, lon, [0, 5])
+        with self.assertRaises(ValueError):
+            DigipinEncoder.encode_multi(40, 100, [5])
+    
     def test_validate_coordinates(self):
         """Test coordinate validation"""
         # Valid coordinates
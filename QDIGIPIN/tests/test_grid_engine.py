@@ -0,0 +1,80 @@
+"""
+Test suite for the streaming grid engine
+"""
+
+import unittest
+
+from core.coverage import DigipinCoverage
+from core.digipin_engine import DigipinDecoder, DigipinGrid
+from core.grid_engine import GRID_FIELDS, GridStream
+from core.polyfill import DigipinPolyfill
+
+
+class TestGridStream(unittest.TestCase):
+    """Test grid records, ordering, batching and cancellation"""
+    
+    EXTENT = (28.4, 77.0, 28.6, 77.2)
+    
+    def test_extent_records(self):
+        """Test that records match DigipinCoverage.extent_cells, in order"""
+        for precision in (3, 6, 8):
+            stream = GridStream.from_extent(*self.EXTENT, precision)
+            records = list(stream)
+            cells = list(DigipinCoverage.extent_cells(*self.EXTENT, precision))
+            self.assertEqual(len(records), len(cells))
+            self.assertEqual(stream.total, len(cells))
+            for record, cell in zip(records, cells):
+                self.assertEqual(record.digipin, DigipinGrid.to_digipin(cell.y, cell.x, precision))
+                self.assertEqual(record.code, cell.code)
+                self.assertEqual(
+                    (record.latitude, record.longitude, record.area_km2,
+                     record.min_lat, record.min_lon, record.max_lat, record.max_lon),
+                    (cell.latitude, cell.longitude, cell.area_km2,
+                     cell.min_lat, cell.min_lon, cell.max_lat, cell.max_lon)
+                )
+            self.assertEqual(len(records[0].attributes()), len(GRID_FIELDS))
+    
+    def test_deterministic(self):
+        """Test that batch size and repeated runs do not change the output"""
+        reference = list(GridStream.from_extent(*self.EXTENT, 7))
+        self.assertEqual(list(GridStream.from_extent(*self.EXTENT, 7, batch_size=7)), reference)
+        self.assertEqual(list(GridStream.from_extent(*self.EXTENT, 7, batch_size=10 ** 6)), reference)
+    
+    def test_batches(self):
+        """Test batch sizes, max_cells, progress and statistics"""
+        stream = GridStream.from_extent(*self.EXTENT, 7, max_cells=1000, batch_size=300)
+        reported = []
+        batches = list(stream.batches(lambda count, total: reported.append((count, total))))
+        self.assertEqual([len(batch) for batch in batches], [300, 300, 300, 100])
+        self.assertEqual(reported, [(300, 1000), (600, 1000), (900, 1000), (1000, 1000)])
+        self.assertEqual(stream.count, 1000)
+        self.assertFalse(stream.canceled)
+        self.assertGreater(stream.cells_per_second, 0)
+    
+    def test_cancel(self):
+        """Test that returning False from progress stops after that batch"""
+        stream = GridStream.from_extent(*self.EXTENT, 7, batch_size=100)
+        batches = list(stream.batches(lambda count, total: count < 250))
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(stream.count, 300)
+        self.assertTrue(stream.canceled)
+    
+    def test_other_sources(self):
+        """Test streams from cells and polygons, and empty extents"""
+        polygon = [[(77.0, 28.4), (77.1, 28.4), (77.1, 28.5), (77.0, 28.4)]]
+        codes = list(DigipinPolyfill.polyfill([polygon], 7, 'intersects', True))
+        records = list(GridStream.from_polygons([[polygon]], 7, 'intersects', True))
+        self.assertEqual([record.code for record in records], codes)
+        self.assertEqual({record.precision for record in records}, {6, 7})
+        
+        cell = DigipinDecoder.decode_cell('39J-438-TJC7')
+        (record,) = GridStream.from_cells([cell])
+        self.assertEqual((record.code, record.area_km2), (cell.code, cell.area_km2))
+        
+        self.assertEqual(list(GridStream.from_extent(50.0, 50.0, 51.0, 51.0, 5)), [])
+        with self.assertRaises(ValueError):
+            GridStream.from_extent(*self.EXTENT, 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
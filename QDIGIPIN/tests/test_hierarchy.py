@@ -0,0 +1,124 @@
+"""
+Test suite for DIGIPIN hierarchy operations
+"""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from core.digipin_engine import DigipinEncoder
+from core.packed import PackedDigipin
+from core.hierarchy import DigipinHierarchy
+
+
+class TestDigipinHierarchy(unittest.TestCase):
+    """Test parent, child and descendant operations"""
+    
+    def setUp(self):
+        self.code = PackedDigipin.pack('FCJ3K4LM92')
+    
+    def test_parent_matches_prefix(self):
+        """Test that parents equal the encoded code at the coarser level"""
+        lat, lon = 28.6139, 77.2090
+        code = PackedDigipin.pack(DigipinEncoder.encode(lat, lon, 10))
+        
+        for level in range(1, 10):
+            expected = PackedDigipin.pack(DigipinEncoder.encode(lat, lon, level))
+            self.assertEqual(DigipinHierarchy.parent(code, level), expected)
+        
+        self.assertEqual(PackedDigipin.unpack(DigipinHierarchy.parent(self.code)), 'FCJ-3K4-LM9')
+        with self.assertRaises(ValueError):
+            DigipinHierarchy.parent(PackedDigipin.pack('F'))
+    
+    def test_children(self):
+        """Test that children are the 16 one-character extensions"""
+        children = DigipinHierarchy.children(PackedDigipin.pack('FCJ'))
+        expected = sorted(PackedDigipin.pack('FCJ' + char) for char in 'FC98J327K456LMPT')
+        
+        self.assertEqual(children, expected)
+        self.assertTrue(all(DigipinHierarchy.parent(child) == PackedDigipin.pack('FCJ') for child in children))
+        self.assertEqual(len(DigipinHierarchy.siblings(children[0])), 15)
+        
+        with self.assertRaises(ValueError):
+            DigipinHierarchy.children(self.code)
+    
+    def test_descendants(self):
+        """Test descendant ranges and generators"""
+        parent = PackedDigipin.pack('FCJ')
+        descendants = DigipinHierarchy.descendant_range(parent, 5)
+        
+        self.assertEqual(len(descendants), 256)
+        self.assertIn(PackedDigipin.pack('FCJ3K'), descendants)
+        self.assertNotIn(PackedDigipin.pack('FCC3K'), descendants)
+        self.assertNotIn(PackedDigipin.pack('FCJ3'), descendants)
+        self.assertEqual(list(DigipinHierarchy.descendants(parent, 5)), list(descendants))
+        self.assertTrue(all(PackedDigipin.contains(parent, code) for code in descendants))
+        self.assertEqual(list(DigipinHierarchy.descendant_range(parent, 3)), [parent])
+    
+    def test_common_ancestor(self):
+        """Test lowest common ancestor"""
+        pack = PackedDigipin.pack
+        self.assertEqual(DigipinHierarchy.common_ancestor(pack('FCJ3K4'), pack('FCJ3LL92')), pack('FCJ3'))
+        self.assertEqual(DigipinHierarchy.common_ancestor(pack('FCJ'), pack('FCJ3K')), pack('FCJ'))
+        self.assertEqual(DigipinHierarchy.common_ancestor(self.code, self.code), self.code)
+        self.assertIsNone(DigipinHierarchy.common_ancestor(pack('F'), pack('C9')))
+    
+    def test_rollup(self):
+        """Test mapping many cells to one level"""
+        codes = [self.code, PackedDigipin.pack('FC'), 0]
+        self.assertEqual(DigipinHierarchy.rollup(codes, 6), [PackedDigipin.pack('FCJ3K4'), None, None])
+    
+    def test_compact(self):
+        """Test that complete sibling sets collapse recursively"""
+        pack = PackedDigipin.pack
+        cells = list(DigipinHierarchy.descendant_range(pack('FCJ'), 6))
+        self.assertEqual(DigipinHierarchy.compact(cells), [pack('FCJ')])
+        
+        # One missing cell keeps its 15 siblings and the other 15 parents
+        partial = DigipinHierarchy.compact(cells[1:])
+        self.assertEqual(len(partial), 15 + 15 + 15)
+        self.assertEqual(partial, sorted(partial))
+        
+        # Duplicates and cells inside another cell are dropped
+        mixed = cells[1:] + [pack('FCJF'), pack('FCJ3K4'), pack('FCJFFF')]
+        self.assertEqual(DigipinHierarchy.compact(mixed), [pack('FCJ')])
+        self.assertEqual(DigipinHierarchy.compact([]), [])
+        
+        with self.assertRaises(ValueError):
+            DigipinHierarchy.compact([0])
+    
+    def test_uncompact_roundtrip(self):
+        """Test that uncompacting restores the original cells"""
+        pack = PackedDigipin.pack
+        fc9 = DigipinHierarchy.descendant_range(pack('FC9'), 5)
+        cells = [code for code in DigipinHierarchy.descendant_range(pack('FC'), 5) if code not in fc9 or code % 7]
+        compacted = DigipinHierarchy.compact(cells)
+        
+        self.assertLess(len(compacted), len(cells))
+        self.assertEqual(list(DigipinHierarchy.uncompact(compacted, 5)), sorted(cells))
+        
+        with self.assertRaises(ValueError):
+            list(DigipinHierarchy.uncompact([self.code], 8))
+    
+    def test_covers(self):
+        """Test membership against a compacted set"""
+        pack = PackedDigipin.pack
+        zone = set(DigipinHierarchy.compact([pack('FCJ'), pack('FC9K')]))
+        
+        self.assertTrue(DigipinHierarchy.covers(zone, self.code))
+        self.assertTrue(DigipinHierarchy.covers(zone, pack('FC9K44')))
+        self.assertFalse(DigipinHierarchy.covers(zone, pack('FC9')))
+        self.assertFalse(DigipinHierarchy.covers(zone, pack('FCC3K4')))
+    
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_rollup_array(self):
+        """Test that array roll-up matches the scalar roll-up"""
+        codes = list(DigipinHierarchy.descendant_range(PackedDigipin.pack('FCJ3K4'), 8))
+        self.assertEqual(DigipinHierarchy.rollup_array(codes, 7).tolist(), DigipinHierarchy.rollup(codes, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
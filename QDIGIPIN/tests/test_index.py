@@ -0,0 +1,98 @@
+"""
+Test suite for the prefix-sorted DIGIPIN index
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from core.digipin_engine import DigipinDecoder, DigipinEncoder
+from core.index import DigipinIndex
+from core.packed import PackedDigipin
+
+
+class TestDigipinIndex(unittest.TestCase):
+    """Test building, querying and saving indexes"""
+    
+    def setUp(self):
+        rng = random.Random(7)
+        self.lats = [rng.uniform(28.4, 28.8) for _ in range(3000)]
+        self.lons = [rng.uniform(77.0, 77.4) for _ in range(3000)]
+        self.codes = [DigipinEncoder.encode(lat, lon, 10) for lat, lon in zip(self.lats, self.lons)]
+        self.index = DigipinIndex.from_codes(self.codes)
+    
+    def test_cell(self):
+        """Test that a cell query returns exactly the entries inside it"""
+        parent = self.codes[0][:6]
+        expected = sorted(i for i, code in enumerate(self.codes) if code.startswith(parent))
+        self.assertEqual(sorted(self.index.cell(parent)), expected)
+        self.assertEqual(self.index.count(parent), len(expected))
+        self.assertEqual(self.index.cell('FCJ-3K4-LMT'), [])
+    
+    def test_cells(self):
+        """Test that overlapping query cells return each entry once"""
+        query = [self.codes[0][:5], self.codes[0][:7], self.codes[1]]
+        expected = sorted(
+            i for i, code in enumerate(self.codes)
+            if code.startswith(self.codes[0][:5]) or code == self.codes[1]
+        )
+        self.assertEqual(sorted(self.index.cells(query)), expected)
+    
+    def test_bbox(self):
+        """Test bounding box queries against a brute-force scan"""
+        box = (28.5, 77.1, 28.62, 77.27)
+        expected = []
+        for i, code in enumerate(self.codes):
+            cell = DigipinDecoder.decode_cell(code)
+            if (cell.max_lat >= box[0] and cell.min_lat <= box[2] and
+                    cell.max_lon >= box[1] and cell.min_lon <= box[3]):
+                expected.append(i)
+        self.assertEqual(sorted(self.index.bbox(*box)), expected)
+        self.assertEqual(self.index.bbox(40.0, 60.0, 41.0, 61.0), [])
+    
+    def test_mixed_precision(self):
+        """Test that coarse entries match only query cells they lie within"""
+        index = DigipinIndex.from_codes(['39J-438', '39J-438-TJC7', '39J'], ids=[10, 11, 12])
+        self.assertEqual(index.cell('39J-438'), [10, 11])
+        self.assertEqual(index.cell('39J-4'), [10, 11])
+        self.assertEqual(sorted(index.cell('39J')), [10, 11, 12])
+        
+        cell = DigipinDecoder.decode_cell('39J-438-TJC7')
+        self.assertEqual(sorted(index.bbox(cell.min_lat, cell.min_lon, cell.max_lat, cell.max_lon)), [10, 11, 12])
+    
+    def test_from_coordinates(self):
+        """Test that coordinate and code indexes agree, with and without NumPy sizes"""
+        for size in (50, 3000):
+            lats = self.lats[:size] + [None, 60.0]
+            lons = self.lons[:size] + [77.0, 77.0]
+            index = DigipinIndex.from_coordinates(lats, lons, 10)
+            expected = DigipinIndex.from_codes(self.codes[:size])
+            self.assertEqual(list(index.codes), list(expected.codes))
+            self.assertEqual(list(index.ids), list(expected.ids))
+    
+    def test_counts(self):
+        """Test rolled-up counts"""
+        counts = self.index.counts(6)
+        expected = {}
+        for code in self.codes:
+            key = PackedDigipin.pack(code[:7])
+            expected[key] = expected.get(key, 0) + 1
+        self.assertEqual(counts, expected)
+        self.assertEqual(len(self.index.unique_codes()), len(set(self.codes)))
+    
+    def test_save_load(self):
+        """Test that a saved index is memory-mapped back unchanged"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'points.dpcs')
+            self.index.save(path)
+            with DigipinIndex.load(path) as loaded:
+                self.assertEqual(len(loaded), len(self.index))
+                parent = self.codes[3][:7]
+                self.assertEqual(loaded.cell(parent), self.index.cell(parent))
+                box = (28.5, 77.1, 28.6, 77.2)
+                self.assertEqual(loaded.bbox(*box), self.index.bbox(*box))
+
+
+if __name__ == '__main__':
+    unittest.main()
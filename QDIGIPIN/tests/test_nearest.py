@@ -0,0 +1,98 @@
+"""
+Test suite for k-nearest-neighbour search
+"""
+
+import math
+import random
+import unittest
+
+from core.digipin_engine import DigipinDecoder
+from core.nearest import DigipinNearest
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Scalar reference haversine distance in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    h = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+class TestDigipinNearest(unittest.TestCase):
+    """Test ring-expansion search against a brute-force scan"""
+    
+    def setUp(self):
+        rng = random.Random(11)
+        # Dense clusters plus scattered points, so both cell splitting and
+        # long ring walks are exercised
+        centers = [(rng.uniform(10.0, 32.0), rng.uniform(70.0, 92.0)) for _ in range(5)]
+        self.lats = []
+        self.lons = []
+        for _ in range(2000):
+            lat, lon = rng.choice(centers)
+            self.lats.append(lat + rng.gauss(0, 0.05))
+            self.lons.append(lon + rng.gauss(0, 0.05))
+        for _ in range(300):
+            self.lats.append(rng.uniform(8.0, 35.0))
+            self.lons.append(rng.uniform(68.0, 95.0))
+        self.queries = [(rng.uniform(3.0, 38.0), rng.uniform(64.0, 99.0)) for _ in range(60)]
+        self.queries += [(self.lats[0], self.lons[0]), (0.0, 60.0)]
+        self.nearest = DigipinNearest(self.lats, self.lons, k=4)
+    
+    def brute_force(self, lat, lon, k, limit=math.inf):
+        distances = sorted(
+            (_haversine(lat, lon, self.lats[i], self.lons[i]), i) for i in range(len(self.lats))
+        )
+        return [(i, distance) for distance, i in distances if distance <= limit][:k]
+    
+    def assertNeighbours(self, found, expected):
+        self.assertEqual([i for i, _ in found], [i for i, _ in expected])
+        for (_, distance), (_, reference) in zip(found, expected):
+            self.assertAlmostEqual(distance, reference, places=6)
+    
+    def test_query(self):
+        """Test k nearest at the default and at fixed precisions"""
+        for precision in (None, 1, 6):
+            nearest = self.nearest if precision is None else DigipinNearest(self.lats, self.lons, precision=precision)
+            for lat, lon in self.queries:
+                self.assertNeighbours(nearest.query(lat, lon, 4), self.brute_force(lat, lon, 4))
+    
+    def test_max_distance(self):
+        """Test that points beyond the limit are left out"""
+        for lat, lon in self.queries:
+            self.assertNeighbours(self.nearest.query(lat, lon, 10, 150.0), self.brute_force(lat, lon, 10, 150.0))
+    
+    def test_batch(self):
+        """Test batch queries, ids and stopping early"""
+        ids = [1000 + i for i in range(len(self.lats))]
+        nearest = DigipinNearest(self.lats, self.lons, ids)
+        lats = [lat for lat, _ in self.queries]
+        lons = [lon for _, lon in self.queries]
+        results = nearest.query_batch(lats, lons, 2)
+        for (lat, lon), found in zip(self.queries, results):
+            self.assertEqual([i for i, _ in found], [1000 + i for i, _ in self.brute_force(lat, lon, 2)])
+        
+        self.assertEqual(nearest.query_batch(lats, lons, 2, progress=lambda done, total: False), [None] * len(lats))
+    
+    def test_query_digipin(self):
+        """Test queries from a cell center"""
+        cell = DigipinDecoder.decode_cell('39J-438-TJC7')
+        self.assertNeighbours(
+            self.nearest.query_digipin('39J-438-TJC7', 3),
+            self.brute_force(cell.latitude, cell.longitude, 3)
+        )
+    
+    def test_edge_cases(self):
+        """Test few or no reference points and invalid arguments"""
+        nearest = DigipinNearest([28.6, 19.07, 60.0], [77.2, 72.87, 77.0])
+        self.assertEqual(len(nearest), 2)
+        self.assertEqual([i for i, _ in nearest.query(28.0, 77.0, 5)], [0, 1])
+        self.assertEqual(DigipinNearest([], []).query(28.0, 77.0, 3), [])
+        with self.assertRaises(ValueError):
+            nearest.query(28.0, 77.0, 0)
+        with self.assertRaises(ValueError):
+            DigipinNearest(self.lats, self.lons, precision=11)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Test suite for packed integer DIGIPIN codes
+"""
+
+import unittest
+from core.digipin_engine import DigipinEncoder, DigipinGrid
+from core.packed import PackedDigipin
+
+
+class TestPackedDigipin(unittest.TestCase):
+    """Test packed integer representation"""
+    
+    def test_pack_unpack_roundtrip(self):
+        """Test that packing is lossless for every precision"""
+        lat, lon = 28.6139, 77.2090
+        
+        for precision in range(1, 11):
+            digipin = DigipinEncoder.encode(lat, lon, precision)
+            code = PackedDigipin.pack(digipin)
+            
+            self.assertLess(code, 2 ** 64)
+            self.assertEqual(PackedDigipin.precision(code), precision)
+            self.assertEqual(PackedDigipin.unpack(code), digipin)
+            self.assertEqual(PackedDigipin.unpack(code, add_hyphens=False), digipin.replace('-', ''))
+    
+    def test_unpack_matches_encoder(self):
+        """Test that unpack hyphenates like encode and to_digipin at levels 3 and 6"""
+        for precision in (3, 6):
+            digipin = DigipinEncoder.encode(28.6139, 77.2090, precision)
+            self.assertTrue(digipin.endswith('-'))
+            code = PackedDigipin.pack(digipin)
+            self.assertEqual(PackedDigipin.unpack(code), digipin)
+            level, y, x = DigipinGrid.from_packed(code)
+            self.assertEqual(PackedDigipin.unpack(code), DigipinGrid.to_digipin(y, x, level))
+    
+    def test_pack_ignores_hyphens(self):
+        """Test that hyphenated and plain codes pack identically"""
+        self.assertEqual(PackedDigipin.pack('FCJ-3K4-LM92'), PackedDigipin.pack('FCJ3K4LM92'))
+    
+    def test_pack_invalid(self):
+        """Test packing invalid DIGIPINs"""
+        for digipin in ['', 'FCJ3K4LM9287P', 'ABC', 'FC0', 'fcj', 'FC ', 'FC_J', 'F٣']:
+            with self.assertRaises(ValueError):
+                PackedDigipin.pack(digipin)
+    
+    def test_ordering_preserves_containment(self):
+        """Test that descendants sort directly after their ancestors"""
+        parent = PackedDigipin.pack('FCJ')
+        first, last = PackedDigipin.descendant_range(parent)
+        inside = [PackedDigipin.pack(pin) for pin in ['FCJ', 'FCJF', 'FCJT', 'FCJ3K4LM92', 'FCJTTTTTTT']]
+        outside = [PackedDigipin.pack(pin) for pin in ['FC', 'F', 'FC9', 'FCCF', 'FCFT', 'T']]
+        
+        for code in inside:
+            self.assertTrue(first <= code <= last)
+            self.assertTrue(PackedDigipin.contains(parent, code))
+        for code in outside:
+            self.assertFalse(PackedDigipin.contains(parent, code))
+        
+        # Every ancestor sorts before its descendants
+        self.assertLess(PackedDigipin.pack('FC'), PackedDigipin.pack('FCF'))
+        self.assertLess(PackedDigipin.pack('FCF'), PackedDigipin.pack('FCFF'))
+    
+    def test_truncate(self):
+        """Test truncating to a coarser precision"""
+        code = PackedDigipin.pack('FCJ3K4LM92')
+        self.assertEqual(PackedDigipin.truncate(code, 4), PackedDigipin.pack('FCJ3'))
+        
+        with self.assertRaises(ValueError):
+            PackedDigipin.truncate(PackedDigipin.pack('FCJ'), 5)
+    
+    def test_is_valid(self):
+        """Test packed code validation"""
+        self.assertTrue(PackedDigipin.is_valid(PackedDigipin.pack('T')))
+        self.assertFalse(PackedDigipin.is_valid(0))
+        self.assertFalse(PackedDigipin.is_valid(PackedDigipin.pack('FCJ') | 0x10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test suite for process-pool batch encoding
+"""
+
+import os
+import tempfile
+import unittest
+from core.digipin_engine import DigipinEncoder
+from core.parallel import encode_chunks, encode_multi_parallel, resolve_workers
+from core.streaming import encode_csv_file
+
+
+class TestParallelEncoding(unittest.TestCase):
+    """Test that sharded encoding matches the serial engine"""
+    
+    def test_chunks_keep_order(self):
+        """Test that chunk results come back in input order"""
+        chunks = [([28.6 + i * 0.01] * 3, [77.2 + i * 0.01] * 3) for i in range(6)]
+        results = list(encode_chunks(iter(chunks), 8, workers=2))
+        
+        self.assertEqual(len(results), 6)
+        for (lats, lons), codes in zip(chunks, results):
+            self.assertEqual(codes, [DigipinEncoder.encode(lat, lon, 8) for lat, lon in zip(lats, lons)])
+    
+    def test_multi_levels(self):
+        """Test multi-precision encoding across shards"""
+        lats = [28.6139, None, 19.0760, 60.0]
+        lons = [77.2090, 77.0, 72.8777, 10.0]
+        results = encode_multi_parallel(lats, lons, [4, 8], workers=2, shard_size=1)
+        
+        self.assertEqual(results[0], (DigipinEncoder.encode(28.6139, 77.2090, 4), DigipinEncoder.encode(28.6139, 77.2090, 8)))
+        self.assertIsNone(results[1])
+        self.assertEqual(results[2][0], DigipinEncoder.encode(19.0760, 72.8777, 4))
+        self.assertIsNone(results[3])
+        
+        # Large shards take the vectorized path and keep the level order
+        lats = [8.0 + i * 0.001 for i in range(3000)]
+        lons = [70.0 + i * 0.002 for i in range(3000)]
+        results = encode_multi_parallel(lats, lons, [9, 3], workers=2, shard_size=1000)
+        self.assertEqual(results[1234], (DigipinEncoder.encode(lats[1234], lons[1234], 9), DigipinEncoder.encode(lats[1234], lons[1234], 3)))
+    
+    def test_csv_matches_serial(self):
+        """Test that a sharded CSV run writes the same file as a serial one"""
+        text = 'id,note,lat,lon\n'
+        for i in range(50):
+            text += f'{i},"line one\nline two",{12 + i * 0.05:.4f},{77 + i * 0.03:.4f}\n'
+        text += 'short,row\n'
+        
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, 'in.csv')
+            with open(source, 'w', newline='', encoding='utf-8') as f:
+                f.write(text)
+            
+            outputs = []
+            for workers in (1, 2):
+                target = os.path.join(folder, f'out{workers}.csv')
+                stats = encode_csv_file(source, target, 'lat', 'lon', 7, chunk_size=8, workers=workers)
+                self.assertEqual((stats['rows'], stats['errors']), (51, 1))
+                with open(target, encoding='utf-8') as f:
+                    outputs.append(f.read())
+            
+            self.assertEqual(outputs[0], outputs[1])
+    
+    def test_resolve_workers(self):
+        """Test the worker count setting"""
+        self.assertEqual(resolve_workers(3), 3)
+        self.assertGreaterEqual(resolve_workers(0), 1)
+        with self.assertRaises(ValueError):
+            resolve_workers(-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
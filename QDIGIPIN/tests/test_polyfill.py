@@ -0,0 +1,110 @@
+"""
+Test suite for polygon polyfill
+"""
+
+import math
+import unittest
+from core.digipin_engine import DigipinEncoder, DigipinGrid
+from core.packed import PackedDigipin
+from core.coverage import DigipinCoverage
+from core.polyfill import DigipinPolyfill
+
+
+def point_in_polygon(polygon, lon, lat):
+    """Even-odd ray cast over every ring"""
+    inside = False
+    for ring in polygon:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+def star(lon, lat, radius, points):
+    """Star-shaped ring around a center"""
+    return [
+        (
+            lon + radius * (0.5 + 0.5 * (i % 2)) * math.cos(2 * math.pi * i / points),
+            lat + radius * (0.5 + 0.5 * (i % 2)) * math.sin(2 * math.pi * i / points)
+        )
+        for i in range(points)
+    ]
+
+
+class TestPolyfill(unittest.TestCase):
+    """Test covering polygons with cells"""
+    
+    def setUp(self):
+        # Star with a hole around Delhi
+        self.polygon = [star(77.2, 28.6, 0.05, 14), star(77.2, 28.6, 0.01, 6)]
+        self.precision = 7
+    
+    def expected_centers(self):
+        """Cells whose centers fall inside the polygon, by brute force"""
+        return {
+            cell.code
+            for cell in DigipinCoverage.extent_cells(28.5, 77.1, 28.7, 77.3, self.precision)
+            if point_in_polygon(self.polygon, cell.longitude, cell.latitude)
+        }
+    
+    def test_center_mode_matches_brute_force(self):
+        """Test that center mode keeps exactly the cells with centers inside"""
+        codes = list(DigipinPolyfill.polyfill([self.polygon], self.precision))
+        
+        self.assertEqual(codes, sorted(codes))
+        self.assertEqual(set(codes), self.expected_centers())
+    
+    def test_modes_are_nested(self):
+        """Test that contains <= center <= intersects"""
+        centers = self.expected_centers()
+        contains = set(DigipinPolyfill.polyfill([self.polygon], self.precision, 'contains'))
+        intersects = set(DigipinPolyfill.polyfill([self.polygon], self.precision, 'intersects'))
+        
+        self.assertTrue(contains <= centers <= intersects)
+        for code in contains:
+            precision, y, x = DigipinGrid.from_packed(code)
+            min_lat, min_lon, max_lat, max_lon = DigipinGrid.cell_bounds(y, x, precision)
+            for lon, lat in ((min_lon, min_lat), (max_lon, max_lat), (min_lon, max_lat), (max_lon, min_lat)):
+                self.assertTrue(point_in_polygon(self.polygon, lon, lat))
+    
+    def test_compact_cover(self):
+        """Test that the compacted cover expands to the full cover"""
+        compact = list(DigipinPolyfill.polyfill([self.polygon], self.precision, compact=True))
+        expanded = set()
+        for code in compact:
+            first, last = PackedDigipin.descendant_range(code)
+            step = 1 << 4 * (11 - self.precision)
+            expanded.update(range((first & ~15) | self.precision, last + 1, step))
+        
+        self.assertLess(len(compact), len(expanded))
+        self.assertEqual(expanded, self.expected_centers())
+        self.assertEqual(DigipinPolyfill.polyfill_count([self.polygon], self.precision), len(expanded))
+    
+    def test_overlapping_features(self):
+        """Test that overlapping features cover their union once"""
+        first = [[(77.0, 28.0), (77.4, 28.0), (77.4, 28.4), (77.0, 28.4)]]
+        second = [[(77.2, 28.2), (77.6, 28.2), (77.6, 28.6), (77.2, 28.6)]]
+        union = sorted(set(DigipinPolyfill.polyfill([first], 5)) | set(DigipinPolyfill.polyfill([second], 5)))
+        
+        self.assertEqual(list(DigipinPolyfill.polyfill_features([[first], [second], [first]], 5)), union)
+        self.assertIn(PackedDigipin.pack(DigipinEncoder.encode(28.3, 77.3, 5)), union)
+        
+        # Compacted covers are merged without overlapping cells
+        compact = list(DigipinPolyfill.polyfill_features([[first], [second]], 5, compact=True))
+        expanded = [code for code in union if any(PackedDigipin.contains(cell, code) for cell in compact)]
+        self.assertEqual(expanded, union)
+        self.assertFalse(any(PackedDigipin.contains(a, b) for a, b in zip(compact, compact[1:])))
+    
+    def test_invalid_input(self):
+        """Test invalid precision, mode and empty polygons"""
+        with self.assertRaises(ValueError):
+            list(DigipinPolyfill.polyfill([self.polygon], 11))
+        with self.assertRaises(ValueError):
+            list(DigipinPolyfill.polyfill([self.polygon], 5, 'nearest'))
+        
+        self.assertEqual(list(DigipinPolyfill.polyfill([], 5)), [])
+        self.assertEqual(list(DigipinPolyfill.polyfill([[[(0, 0), (1, 0), (1, 1)]]], 5)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+"""
+Test suite for chunked streaming encoding
+"""
+
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from core.digipin_engine import DigipinDecoder, DigipinEncoder
+from core.streaming import (
+    CsvChunkEncoder, GeoJsonFeatureReader, GeoJsonFeatureWriter, decode_values,
+    encode_coordinates, encode_coordinates_multi, encode_csv_file, encode_geojson_file,
+    output_columns, set_columns
+)
+
+
+class TestEncodeCoordinates(unittest.TestCase):
+    """Test list encoding with either engine"""
+    
+    def test_matches_scalar_encoder(self):
+        """Test that small and large batches match the scalar encoder"""
+        rng = random.Random(13)
+        for size in (10, 2500):
+            lats = [rng.uniform(3.0, 37.0) for _ in range(size)]
+            lons = [rng.uniform(64.0, 99.0) for _ in range(size)]
+            lats[0] = None
+            lats[1] = 50.0
+            
+            codes = encode_coordinates(lats, lons, 7)
+            self.assertIsNone(codes[0])
+            self.assertIsNone(codes[1])
+            for lat, lon, code in list(zip(lats, lons, codes))[2:]:
+                self.assertEqual(code, DigipinEncoder.encode(lat, lon, 7))
+    
+    def test_invalid_precision(self):
+        """Test that an invalid precision is rejected"""
+        with self.assertRaises(ValueError):
+            encode_coordinates([28.6], [77.2], 11)
+    
+    def test_multi(self):
+        """Test multi-level lists against encode_multi, in the requested level order"""
+        rng = random.Random(17)
+        for size in (10, 2500):
+            lats = [rng.uniform(3.0, 37.0) for _ in range(size)]
+            lons = [rng.uniform(64.0, 99.0) for _ in range(size)]
+            lats[0] = None
+            lons[1] = 120.0
+            
+            rows = encode_coordinates_multi(lats, lons, [8, 4, 10])
+            self.assertEqual(rows[:2], [None, None])
+            for lat, lon, row in list(zip(lats, lons, rows))[2:]:
+                codes = DigipinEncoder.encode_multi(lat, lon, [4, 8, 10])
+                self.assertEqual(row, (codes[8], codes[4], codes[10]))
+        
+        with self.assertRaises(ValueError):
+            encode_coordinates_multi([28.6], [77.2], [6, 11])
+
+
+class TestDecodeValues(unittest.TestCase):
+    """Test block decoding with a shared cache"""
+    
+    def test_decode_values(self):
+        """Test that repeated, invalid and empty values decode like decode_cell"""
+        values = ['39J-438-TJC7', '39J438TJC7', '39J-438-TJC7', 'FCJ', 'XYZ', '', None]
+        cache = {}
+        cells = decode_values(values, cache)
+        self.assertEqual(cells[0], DigipinDecoder.decode_cell('39J-438-TJC7'))
+        self.assertEqual(cells[1], cells[0])
+        self.assertIs(cells[2], cells[0])
+        self.assertEqual(cells[3], DigipinDecoder.decode_cell('FCJ'))
+        self.assertEqual(cells[4:], [None, None, None])
+        
+        # A later block reuses the cached cells
+        self.assertIs(decode_values(['FCJ'], cache)[0], cells[3])
+        self.assertEqual(len(cache), 5)
+
+
+class TestOutputColumns(unittest.TestCase):
+    """Test placing output columns in records that may already have them"""
+    
+    def test_existing_columns(self):
+        """Test that existing output columns are overwritten in place"""
+        names = ['id', 'DIGIPIN', 'name', 'DIGIPIN_L4']
+        indices, missing = output_columns(names, ['DIGIPIN', 'DIGIPIN_L6', 'DIGIPIN_L4'])
+        self.assertEqual(indices, [1, 4, 3])
+        self.assertEqual(missing, ['DIGIPIN_L6'])
+        
+        record = set_columns([7, 'stale', 'Delhi', 'old'], len(names) + len(missing), indices,
+                             ('39J-438-TJ', '39J-438', '39J4'))
+        self.assertEqual(record, [7, '39J-438-TJ', 'Delhi', '39J4', '39J-438'])
+    
+    def test_new_columns(self):
+        """Test that missing output columns are appended in order"""
+        indices, missing = output_columns(['id'], ['DIGIPIN', 'Precision'])
+        self.assertEqual((indices, missing), ([1, 2], ['DIGIPIN', 'Precision']))
+        self.assertEqual(set_columns([1], 3, indices, ['FCJ', 3]), [1, 'FCJ', 3])
+
+
+class TestCsvStreaming(unittest.TestCase):
+    """Test chunked CSV encoding"""
+    
+    CSV = 'name,lat,lon\nDelhi,28.6139,77.2090\nBad,,\nMumbai,19.0760,72.8777\nOutside,60.0,10.0\nChennai,13.0827,80.2707\n'
+    
+    def test_chunks(self):
+        """Test chunk sizes, counters and encoded rows"""
+        encoder = CsvChunkEncoder(io.StringIO(self.CSV), 'lat', 'lon', 8, chunk_size=2)
+        chunks = list(encoder)
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(encoder.fieldnames, ['name', 'lat', 'lon', 'DIGIPIN'])
+        self.assertEqual((encoder.rows_read, encoder.success_count, encoder.error_count), (5, 3, 2))
+        self.assertEqual(chunks[0][0]['DIGIPIN'], DigipinEncoder.encode(28.6139, 77.2090, 8))
+        self.assertEqual(chunks[0][1]['DIGIPIN'], '')
+    
+    def test_missing_column(self):
+        """Test that a missing coordinate column is rejected"""
+        with self.assertRaises(ValueError):
+            CsvChunkEncoder(io.StringIO(self.CSV), 'latitude', 'lon')
+    
+    def test_file_round_trip_and_cancel(self):
+        """Test writing an output file and cancelling after the first chunk"""
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, 'in.csv')
+            target = os.path.join(folder, 'out.csv')
+            with open(source, 'w', newline='', encoding='utf-8') as f:
+                f.write(self.CSV)
+            
+            progress = []
+            stats = encode_csv_file(
+                source, target, 'lat', 'lon', 6, chunk_size=2,
+                on_chunk=lambda rows, fieldnames, fraction: progress.append(fraction)
+            )
+            self.assertEqual((stats['rows'], stats['success'], stats['errors']), (5, 3, 2))
+            self.assertFalse(stats['canceled'])
+            self.assertEqual(len(progress), 3)
+            self.assertEqual(progress[-1], 1.0)
+            
+            with open(target, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 5)
+            self.assertEqual(rows[2]['DIGIPIN'], DigipinEncoder.encode(19.0760, 72.8777, 6))
+            
+            stats = encode_csv_file(
+                source, target, 'lat', 'lon', 6, chunk_size=2,
+                on_chunk=lambda rows, fieldnames, fraction: False
+            )
+            self.assertTrue(stats['canceled'])
+            self.assertEqual(stats['rows'], 2)
+            with open(target, newline='', encoding='utf-8') as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 2)
+
+
+
+class TestGeoJsonStreaming(unittest.TestCase):
+    """Test incremental GeoJSON reading and writing"""
+    
+    FEATURES = [
+        {'type': 'Feature', 'properties': {'name': 'Delhi {"x": [1]}'},
+         'geometry': {'type': 'Point', 'coordinates': [77.2090, 28.6139]}},
+        {'type': 'Feature', 'properties': None,
+         'geometry': {'type': 'LineString', 'coordinates': [[77, 28], [78, 29]]}},
+        {'type': 'Feature', 'properties': {'name': 'Outside'},
+         'geometry': {'type': 'Point', 'coordinates': [10.0, 60.0]}},
+        {'type': 'Feature', 'properties': {'name': 'Mumbai'},
+         'geometry': {'type': 'Point', 'coordinates': [72.8777, 19.0760, 14.0]}}
+    ]
+    
+    def test_reader_collection(self):
+        """Test reading a collection in blocks smaller than a feature"""
+        collection = {'type': 'FeatureCollection', 'name': 'places', 'features': self.FEATURES, 'bbox': [1, 2, 3, 4]}
+        for block_size in (1, 5, 1000):
+            reader = GeoJsonFeatureReader(io.StringIO(json.dumps(collection, indent=2)), block_size)
+            self.assertEqual(list(reader), self.FEATURES)
+            self.assertEqual(reader.members['name'], 'places')
+            self.assertEqual(reader.members['bbox'], [1, 2, 3, 4])
+    
+    def test_reader_block_boundaries(self):
+        """Test that numbers split at any block boundary are read whole"""
+        text = ('{"type":"FeatureCollection","version":12.5,"scale":-1.5e+3,"features":['
+                '{"type":"Feature","properties":{"v":0.25,"n":10},'
+                '"geometry":{"type":"Point","coordinates":[77.209,28.6139]}}],"count":1}')
+        expected = json.loads(text)
+        for block_size in range(1, len(text) + 1):
+            reader = GeoJsonFeatureReader(io.StringIO(text), block_size)
+            self.assertEqual(list(reader), expected['features'], block_size)
+            self.assertEqual(reader.members, {key: expected[key] for key in ('type', 'version', 'scale', 'count')},
+                             block_size)
+    
+    def test_reader_sequence(self):
+        """Test newline- and record-separator-delimited features"""
+        lines = '\n'.join(json.dumps(feature) for feature in self.FEATURES) + '\n'
+        self.assertEqual(list(GeoJsonFeatureReader(io.StringIO(lines), 3)), self.FEATURES)
+        
+        separated = ''.join('\x1e' + json.dumps(feature, indent=1) + '\n' for feature in self.FEATURES)
+        self.assertEqual(list(GeoJsonFeatureReader(io.StringIO(separated), 7)), self.FEATURES)
+    
+    def test_reader_invalid(self):
+        """Test that malformed GeoJSON is rejected"""
+        for text in ('[1, 2]', '{"type": "FeatureCollection", "features": [{"type": "Feature"', '{"features": 5}'):
+            with self.assertRaises(ValueError):
+                list(GeoJsonFeatureReader(io.StringIO(text)))
+    
+    def test_reader_fails_early(self):
+        """Test that a malformed feature fails without reading the rest of the file"""
+        bad = '{"type": "Feature", "geometry": nul}'
+        features = [json.dumps(self.FEATURES[0]), bad] + [json.dumps(feature) for feature in self.FEATURES * 5000]
+        text = '{"type": "FeatureCollection", "features": [\n' + ',\n'.join(features) + ']}'
+        stream = io.StringIO(text)
+        reader = GeoJsonFeatureReader(stream, 256)
+        
+        with self.assertRaises(ValueError) as context:
+            list(reader)
+        self.assertLess(stream.tell(), 1024)
+        self.assertIn(f'character {text.index(bad)}', str(context.exception))
+    
+    def test_writer_round_trip(self):
+        """Test that written collections and sequences read back"""
+        for seq in (False, True):
+            output = io.StringIO()
+            writer = GeoJsonFeatureWriter(output, seq, {'name': 'places', 'features': 'ignored'})
+            for feature in self.FEATURES:
+                writer.write(feature)
+            writer.close()
+            
+            if not seq:
+                self.assertEqual(json.loads(output.getvalue())['name'], 'places')
+            self.assertEqual(list(GeoJsonFeatureReader(io.StringIO(output.getvalue()))), self.FEATURES)
+    
+    def test_encode_file(self):
+        """Test encoding a file chunk by chunk"""
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, 'in.geojson')
+            with open(source, 'w', encoding='utf-8') as f:
+                json.dump({'type': 'FeatureCollection', 'features': self.FEATURES}, f)
+            
+            for name in ('out.geojson', 'out.geojsonl'):
+                target = os.path.join(folder, name)
+                chunks = []
+                stats = encode_geojson_file(
+                    source, target, 8, chunk_size=3,
+                    on_chunk=lambda features, fraction: chunks.append(len(features))
+                )
+                self.assertEqual((stats['features'], stats['success'], stats['errors']), (4, 2, 2))
+                self.assertEqual(chunks, [3, 1])
+                
+                with open(target, encoding='utf-8') as f:
+                    features = list(GeoJsonFeatureReader(f))
+                self.assertEqual(features[0]['properties']['DIGIPIN'], DigipinEncoder.encode(28.6139, 77.2090, 8))
+                self.assertEqual(features[3]['properties']['DIGIPIN'], DigipinEncoder.encode(19.0760, 72.8777, 8))
+                self.assertIsNone(features[1]['properties'])
+                self.assertNotIn('DIGIPIN', features[2]['properties'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Test suite for DIGIPIN neighbor, ring and disk queries
+"""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from core.digipin_engine import DigipinEncoder, DigipinDecoder
+from core.packed import PackedDigipin
+from core.topology import DigipinTopology
+
+
+class TestDigipinTopology(unittest.TestCase):
+    """Test grid topology on packed codes"""
+    
+    def setUp(self):
+        self.code = PackedDigipin.pack(DigipinEncoder.encode(28.6139, 77.2090, 8))
+    
+    def test_neighbors_match_offset_encoding(self):
+        """Test that neighbors equal the cells encoded one cell size away"""
+        cell = DigipinDecoder.decode_cell(PackedDigipin.unpack(self.code))
+        lat_size = cell.max_lat - cell.min_lat
+        lon_size = cell.max_lon - cell.min_lon
+        
+        expected = set()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy or dx:
+                    pin = DigipinEncoder.encode(cell.latitude + dy * lat_size, cell.longitude + dx * lon_size, 8)
+                    expected.add(PackedDigipin.pack(pin))
+        
+        self.assertEqual(set(DigipinTopology.neighbors(self.code)), expected)
+        self.assertEqual(len(DigipinTopology.neighbors(self.code, include_diagonals=False)), 4)
+    
+    def test_neighbors_at_extent_edge(self):
+        """Test that cells outside the DIGIPIN extent are dropped"""
+        corner = PackedDigipin.pack(DigipinEncoder.encode(2.5, 63.5, 5))
+        self.assertEqual(len(DigipinTopology.neighbors(corner)), 3)
+        self.assertEqual(len(DigipinTopology.disk(corner, 2)), 9)
+    
+    def test_ring_and_disk(self):
+        """Test ring and disk sizes and their relationship"""
+        for k in range(4):
+            ring = DigipinTopology.ring(self.code, k)
+            disk = DigipinTopology.disk(self.code, k)
+            
+            self.assertEqual(len(ring), max(1, 8 * k))
+            self.assertEqual(len(disk), (2 * k + 1) ** 2)
+            self.assertTrue(all(DigipinTopology.distance(self.code, cell) == k for cell in ring))
+        
+        inner = set(DigipinTopology.disk(self.code, 1))
+        self.assertEqual(set(DigipinTopology.disk(self.code, 2)), inner | set(DigipinTopology.ring(self.code, 2)))
+    
+    def test_invalid_input(self):
+        """Test invalid codes and radii"""
+        with self.assertRaises(ValueError):
+            DigipinTopology.neighbors(0)
+        with self.assertRaises(ValueError):
+            DigipinTopology.ring(self.code, -1)
+        with self.assertRaises(ValueError):
+            DigipinTopology.distance(self.code, PackedDigipin.truncate(self.code, 4))
+        
+        self.assertEqual(DigipinTopology.neighbors_batch([self.code, 0])[1], None)
+    
+    def test_adjacency(self):
+        """Test adjacency restricted to a set of cells"""
+        disk = DigipinTopology.disk(self.code, 1)
+        adjacency = DigipinTopology.adjacency(disk)
+        
+        self.assertEqual(len(adjacency[self.code]), 8)
+        self.assertEqual(sum(len(cells) for cells in adjacency.values()), 40)
+        
+        edges = DigipinTopology.adjacency(disk, include_diagonals=False)
+        self.assertEqual(sum(len(cells) for cells in edges.values()), 24)
+    
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_adjacency_array_matches_adjacency(self):
+        """Test that the NumPy adjacency finds the same pairs"""
+        codes = DigipinTopology.disk(self.code, 3)[::2] + [PackedDigipin.pack('FCJ')]
+        source, target = DigipinTopology.adjacency_array(codes)
+        
+        pairs = {(codes[i], codes[j]) for i, j in zip(source.tolist(), target.tolist())}
+        expected = {(code, cell) for code, cells in DigipinTopology.adjacency(codes).items() for cell in cells}
+        self.assertEqual(pairs, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
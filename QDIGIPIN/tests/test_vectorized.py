@@ -0,0 +1,101 @@
+"""
+Test suite for vectorized DIGIPIN encoding and decoding
+"""
+
+import random
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from core.digipin_engine import DigipinEncoder, DigipinDecoder
+
+if numpy is not None:
+    from core.vectorized import VectorizedEncoder
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestVectorizedCodec(unittest.TestCase):
+    """Test array encode/decode against the scalar functions"""
+    
+    def setUp(self):
+        rng = random.Random(42)
+        self.coords = [(rng.uniform(2.5, 38.5), rng.uniform(63.5, 99.5)) for _ in range(500)]
+        # Corners and points outside India
+        self.coords += [(2.5, 63.5), (38.5, 99.5), (20.5, 81.5), (0, 50), (40, 100)]
+    
+    def test_encode_array_matches_scalar(self):
+        """Test that array encoding is identical to scalar encoding"""
+        lats = [lat for lat, lon in self.coords]
+        lons = [lon for lat, lon in self.coords]
+        
+        for precision in (1, 3, 6, 10):
+            codes, valid = DigipinEncoder.encode_array(lats, lons, precision)
+            expected = DigipinEncoder.encode_batch(self.coords, precision)
+            
+            for code, is_valid, scalar in zip(codes.tolist(), valid.tolist(), expected):
+                self.assertEqual(code if is_valid else None, scalar)
+    
+    def test_encode_packed_matches_scalar(self):
+        """Test that packed array encoding is identical to scalar encoding"""
+        lats = [lat for lat, lon in self.coords]
+        lons = [lon for lat, lon in self.coords]
+        
+        for precision in (1, 5, 10):
+            codes, valid = VectorizedEncoder.encode_packed(lats, lons, precision)
+            for (lat, lon), code, is_valid in zip(self.coords, codes.tolist(), valid.tolist()):
+                if is_valid:
+                    self.assertEqual(code, DigipinEncoder.encode_packed(lat, lon, precision))
+                else:
+                    self.assertEqual(code, 0)
+                    self.assertRaises(ValueError, DigipinEncoder.encode_packed, lat, lon, precision)
+    
+    def test_encode_array_invalid_precision(self):
+        """Test that an invalid precision raises like the scalar encoder"""
+        with self.assertRaises(ValueError):
+            DigipinEncoder.encode_array([28.6], [77.2], 11)
+    
+    def test_encode_multi_matches_scalar(self):
+        """Test that multi-precision array encoding matches each level"""
+        lats = [lat for lat, lon in self.coords]
+        lons = [lon for lat, lon in self.coords]
+        
+        codes, valid = VectorizedEncoder.encode_multi(lats, lons, [4, 6, 8, 10])
+        
+        for precision, level_codes in codes.items():
+            expected = DigipinEncoder.encode_batch(self.coords, precision)
+            for code, is_valid, scalar in zip(level_codes.tolist(), valid.tolist(), expected):
+                self.assertEqual(code if is_valid else None, scalar)
+    
+    def test_decode_array_matches_scalar(self):
+        """Test that array decoding agrees with scalar decoding"""
+        digipins = [code for code in DigipinEncoder.encode_batch(self.coords, 10) if code]
+        digipins += ['FCJ3K', 'F', 'ABC123', '', 'FCJ3K4LM9287P', '39J\x0049LL8T4', '\x00FCJ', 'FC\x00J']
+        
+        result = DigipinDecoder.decode_array(digipins)
+        
+        for i, digipin in enumerate(digipins):
+            try:
+                expected = DigipinDecoder.decode(digipin)
+            except ValueError:
+                self.assertFalse(result['valid'][i])
+                continue
+            
+            self.assertTrue(result['valid'][i])
+            self.assertEqual(round(float(result['latitude'][i]), 6), expected['latitude'])
+            self.assertEqual(round(float(result['longitude'][i]), 6), expected['longitude'])
+            self.assertEqual(round(float(result['minLat'][i]), 6), expected['bounds']['minLat'])
+            self.assertEqual(round(float(result['maxLon'][i]), 6), expected['bounds']['maxLon'])
+    
+    def test_decode_fixed_width(self):
+        """Test that NUL padding of fixed-width string arrays is not part of the code"""
+        for codes in (numpy.array(['39J-438-TJ', 'FCJ'], dtype='<U16'), numpy.array([b'39J438TJ', b'FCJ'], dtype='S12')):
+            result = DigipinDecoder.decode_array(codes)
+            self.assertEqual(result['valid'].tolist(), [True, True])
+            self.assertEqual(result['precision'].tolist(), [8, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()